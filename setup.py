@@ -4,7 +4,9 @@ IT Compass Setup Script
 © 2025 Ekaterina Kudelya. CC BY-ND 4.0
 """
 from setuptools import setup, find_packages
+from setuptools.command.build_py import build_py
 import os
+import sys
 
 def read_file(filename):
     try:
@@ -20,6 +22,17 @@ def read_requirements():
     except FileNotFoundError:
         return []
 
+class BuildPyWithCatalog(build_py):
+    """Собирает архив каталога маркеров в пакет src.data: установленный пакет находит его через importlib.resources."""
+
+    def run(self):
+        super().run()
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        from src.core.catalog_bundle import write_catalog_bundle
+
+        target = write_catalog_bundle("src/data/markers", os.path.join(self.build_lib, "src", "data", "catalog.zip"))
+        print(f"📦 Архив каталога собран: {target}")
+
 setup(
     name="it-compass",
     version="1.0.0",
@@ -29,8 +42,8 @@ setup(
     long_description=read_file("README.md"),
     long_description_content_type="text/markdown",
     url="https://github.com/Control39/it-compass",
-    packages=find_packages(where="src"),
-    package_dir={"": "src"},
+    # Модули импортируют друг друга как src.core.*, поэтому src ставится пакетом верхнего уровня
+    packages=find_packages(include=["src", "src.*"]),
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -50,12 +63,13 @@ setup(
     install_requires=read_requirements(),
     entry_points={
         "console_scripts": [
-            "it-compass=main:main",  # ✅ ИСПРАВЛЕНО
+            "it-compass=src.main:main",  # ✅ ИСПРАВЛЕНО
         ],
     },
+    cmdclass={"build_py": BuildPyWithCatalog},
     include_package_data=True,
     package_data={
-        "": ["*.json", "*.md", "*.txt", "*.sh"],
+        "": ["*.json", "*.md", "*.txt", "*.sh", "*.zip"],
     },
     zip_safe=False,
     project_urls={
@@ -0,0 +1,164 @@
+"""
+Аналитика истории прогресса: темп выполнения маркеров и прогноз сроков.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.core.catalog_index import CatalogIndex
+from src.core.time_bound import parse_time_bound
+
+logger = logging.getLogger(__name__)
+
+EVENT_COMPLETED = "completed"
+EVENT_IN_PROGRESS = "in_progress"
+EVENT_UNCOMPLETED = "uncompleted"
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def format_timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def parse_timestamp(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def week_key(moment: datetime) -> str:
+    year, week, _ = moment.isocalendar()[:3]
+    return f"{year}-W{week:02d}"
+
+
+class ProgressAnalytics:
+    """Агрегаты по событиям прогресса, обновляемые инкрементально при каждом событии."""
+
+    def __init__(self, markers: Dict[str, Any], history: Iterable[Dict[str, str]] = (),
+                 index: Optional[CatalogIndex] = None):
+        self._markers = markers
+        # Навык и time_bound берутся из общего индекса по требованию: стоимость — O(истории), а не O(каталога)
+        self._index = index if index is not None else CatalogIndex(markers)
+        self._durations: Dict[str, Optional[timedelta]] = {}
+
+        self.weekly_completions: Dict[str, int] = defaultdict(int)
+        self.skill_weekly_completions: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.completed_at: Dict[str, datetime] = {}
+        self._started_at: Dict[str, datetime] = {}
+        self._actual_total = timedelta()
+        self._nominal_total = timedelta()
+
+        for event in history:
+            self.apply(event)
+
+    def _skill_of(self, marker_id: str) -> Optional[str]:
+        entry = self._index.get(marker_id)
+        return None if entry is None else entry.skill_name
+
+    def _duration(self, marker_id: str) -> Optional[timedelta]:
+        if marker_id not in self._durations:
+            entry = self._index.get(marker_id)
+            self._durations[marker_id] = (
+                None if entry is None else parse_time_bound(entry.marker.smart_criteria.get("time_bound"))
+            )
+        return self._durations[marker_id]
+
+    def apply(self, event: Dict[str, str]) -> None:
+        try:
+            marker_id = event["marker_id"]
+            kind = event["event"]
+            moment = parse_timestamp(event["timestamp"])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Некорректное событие в истории прогресса: {event} ({e})")
+            return
+
+        if kind == EVENT_IN_PROGRESS:
+            self._started_at.setdefault(marker_id, moment)
+        elif kind == EVENT_COMPLETED and marker_id not in self.completed_at:
+            self.completed_at[marker_id] = moment
+            week = week_key(moment)
+            self.weekly_completions[week] += 1
+            skill_name = self._skill_of(marker_id)
+            if skill_name is not None:
+                self.skill_weekly_completions[skill_name][week] += 1
+
+            started = self._started_at.pop(marker_id, None)
+            nominal = self._duration(marker_id)
+            if started is not None and nominal and moment > started:
+                self._actual_total += moment - started
+                self._nominal_total += nominal
+        elif kind == EVENT_UNCOMPLETED:
+            completed_at = self.completed_at.pop(marker_id, None)
+            if completed_at is None:
+                return
+            week = week_key(completed_at)
+            self.weekly_completions[week] -= 1
+            skill_name = self._skill_of(marker_id)
+            if skill_name is not None:
+                self.skill_weekly_completions[skill_name][week] -= 1
+
+    def completions_per_week(self, weeks: Optional[int] = None, now: Optional[datetime] = None) -> List[Tuple[str, int]]:
+        """Число выполненных маркеров по ISO-неделям (последние `weeks` недель, если задано)."""
+        if weeks is None:
+            return sorted(self.weekly_completions.items())
+        return [(key, self.weekly_completions.get(key, 0)) for key in self._recent_weeks(weeks, now)]
+
+    def skill_velocity(self, skill_name: str, weeks: int = 4, now: Optional[datetime] = None) -> float:
+        """Среднее число выполненных маркеров навыка в неделю за последние `weeks` недель."""
+        counts = self.skill_weekly_completions.get(skill_name, {})
+        return sum(counts.get(key, 0) for key in self._recent_weeks(weeks, now)) / weeks
+
+    def velocities(self, weeks: int = 4, now: Optional[datetime] = None) -> Dict[str, float]:
+        return {skill_name: self.skill_velocity(skill_name, weeks, now) for skill_name in self.skill_weekly_completions}
+
+    @property
+    def pace_factor(self) -> float:
+        """Отношение фактического времени выполнения к time_bound (1.0, пока нет данных)."""
+        if not self._nominal_total:
+            return 1.0
+        return self._actual_total / self._nominal_total
+
+    def eta(self, skill_name: str, level: Optional[str] = None, now: Optional[datetime] = None,
+            completed: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Прогноз завершения навыка (или одного уровня) по time_bound оставшихся маркеров.
+
+        completed — выполненные маркеры из прогресса: у старых файлов прогресса их нет в истории.
+        """
+        skill_data = self._markers.get(skill_name)
+        if skill_data is None or (level is not None and level not in skill_data.levels):
+            return None
+
+        levels = [skill_data.levels[level]] if level is not None else skill_data.levels.values()
+        done = set(completed)
+        remaining = [m.id for level_markers in levels for m in level_markers
+                     if m.id not in self.completed_at and m.id not in done]
+        nominal = sum((self._duration(marker_id) or timedelta() for marker_id in remaining), timedelta())
+        unknown = sum(1 for marker_id in remaining if not self._duration(marker_id))
+        expected = nominal * self.pace_factor
+        now = now or utc_now()
+
+        return {
+            "skill_name": skill_name,
+            "level": level,
+            "remaining_count": len(remaining),
+            "unknown_time_bound": unknown,
+            "nominal": nominal,
+            "pace_factor": self.pace_factor,
+            "expected": expected,
+            "eta": now + expected,
+        }
+
+    def _recent_weeks(self, weeks: int, now: Optional[datetime]) -> List[str]:
+        now = now or utc_now()
+        return [week_key(now - timedelta(weeks=i)) for i in range(weeks - 1, -1, -1)]
+
+
+__all__ = ['ProgressAnalytics', 'EVENT_COMPLETED', 'EVENT_IN_PROGRESS', 'EVENT_UNCOMPLETED']
@@ -0,0 +1,120 @@
+"""
+Каталог маркеров одним архивом: zip с манифестом, версией и контрольными суммами файлов навыков.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Структура архива:
+    manifest.json          {"format": 1, "version": ..., "created_at": ..., "files": {имя: {sha256, size}}}
+    markers/<навык>.json   файлы навыков в исходном виде
+
+Архив читается за один проход прямо из zip (без распаковки на диск): по пути к файлу
+или как ресурс установленного пакета через importlib.resources.
+"""
+import hashlib
+import io
+import json
+import logging
+import os
+import zipfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Union
+
+from src.core.analytics import format_timestamp, utc_now
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_SUFFIX = ".zip"
+BUNDLE_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+MEMBER_PREFIX = "markers/"
+PACKAGED_BUNDLE = ("src.data", "catalog.zip")
+
+
+class CatalogBundleError(ValueError):
+    """Архив каталога повреждён или не соответствует манифесту."""
+
+
+def write_catalog_bundle(markers_dir: str, output: str, version: Optional[str] = None) -> Path:
+    """Упаковывает JSON-файлы навыков в архив; версия по умолчанию — отпечаток содержимого каталога."""
+    from src.core.tracker import load_catalog
+    from src.utils.catalog_migration import catalog_version
+
+    source = Path(markers_dir)
+    files = {}
+    for file_path in sorted(source.glob("*.json")):
+        files[file_path.name] = file_path.read_bytes()
+    if not files:
+        raise CatalogBundleError(f"Нет файлов навыков для упаковки: {markers_dir}")
+
+    manifest = {
+        "format": BUNDLE_FORMAT,
+        "version": version or catalog_version(load_catalog(markers_dir)),
+        "created_at": format_timestamp(utc_now()),
+        "files": {name: {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+                  for name, data in files.items()},
+    }
+
+    target = Path(output)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = target.with_suffix(target.suffix + ".tmp")
+    with zipfile.ZipFile(tmp_file, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+        bundle.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+        for name, data in files.items():
+            bundle.writestr(MEMBER_PREFIX + name, data)
+    os.replace(tmp_file, target)
+    return target
+
+
+def read_manifest(bundle: zipfile.ZipFile) -> Dict[str, Any]:
+    try:
+        manifest = json.loads(bundle.read(MANIFEST_NAME).decode("utf-8"))
+    except KeyError:
+        raise CatalogBundleError(f"В архиве нет {MANIFEST_NAME}")
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise CatalogBundleError(f"Некорректный {MANIFEST_NAME}: {e}")
+    if manifest.get("format") != BUNDLE_FORMAT:
+        raise CatalogBundleError(f"Неподдерживаемый формат архива каталога: {manifest.get('format')!r}")
+    if not isinstance(manifest.get("files"), dict):
+        raise CatalogBundleError(f"В {MANIFEST_NAME} нет списка файлов")
+    return manifest
+
+
+def read_catalog_bundle(source: Union[str, Path, BinaryIO]) -> Dict[str, Any]:
+    """
+    Читает архив и проверяет контрольные суммы всех файлов.
+
+    Возвращает {"version": ..., "skills": {имя файла: JSON навыка}}; CatalogBundleError при несовпадении.
+    """
+    with zipfile.ZipFile(source) as bundle:
+        manifest = read_manifest(bundle)
+        skills = {}
+        for name, meta in manifest["files"].items():
+            try:
+                data = bundle.read(MEMBER_PREFIX + name)
+            except KeyError:
+                raise CatalogBundleError(f"Файл {name} из манифеста отсутствует в архиве")
+            if len(data) != meta.get("size") or hashlib.sha256(data).hexdigest() != meta.get("sha256"):
+                raise CatalogBundleError(f"Контрольная сумма не совпадает: {name}")
+            try:
+                skills[name] = json.loads(data.decode("utf-8"))
+            except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                raise CatalogBundleError(f"Ошибка парсинга JSON в {name}: {e}")
+    return {"version": manifest.get("version"), "skills": skills}
+
+
+def open_packaged_bundle() -> Optional[BinaryIO]:
+    """Архив каталога, установленный вместе с пакетом (None, если его нет)."""
+    import importlib.resources as resources
+
+    package, name = PACKAGED_BUNDLE
+    try:
+        if hasattr(resources, "files"):
+            resource = resources.files(package).joinpath(name)
+            return io.BytesIO(resource.read_bytes()) if resource.is_file() else None
+        return io.BytesIO(resources.read_binary(package, name))  # Python 3.8
+    except (ImportError, FileNotFoundError, OSError):
+        return None
+
+
+__all__ = ['BUNDLE_SUFFIX', 'CatalogBundleError', 'open_packaged_bundle', 'read_catalog_bundle',
+           'read_manifest', 'write_catalog_bundle']
@@ -0,0 +1,130 @@
+"""
+Вторичные индексы каталога маркеров и API выборок.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+from collections import defaultdict
+from itertools import islice
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+STATUS_COMPLETED = "completed"
+STATUS_REMAINING = "remaining"
+STATUS_IN_PROGRESS = "in_progress"
+STATUSES = (STATUS_COMPLETED, STATUS_REMAINING, STATUS_IN_PROGRESS)
+
+
+class CatalogEntry(NamedTuple):
+    skill_name: str
+    level: str
+    marker: Any
+
+
+class _Postings:
+    """Позиции маркеров в порядке каталога: кортеж для обхода и множество для проверки вхождения."""
+    __slots__ = ("ordered", "members")
+
+    def __init__(self, positions: Iterable[int]):
+        self.ordered: Tuple[int, ...] = tuple(sorted(positions))
+        self.members: FrozenSet[int] = frozenset(self.ordered)
+
+    def __len__(self) -> int:
+        return len(self.ordered)
+
+
+class CatalogIndex:
+    """Предвычисленные индексы по навыку, уровню и приоритету; порядок результатов — порядок каталога."""
+
+    def __init__(self, markers: Dict[str, Any]):
+        self._entries: List[CatalogEntry] = []
+        self._by_id: Dict[str, int] = {}
+        by_skill, by_level, by_priority = defaultdict(list), defaultdict(list), defaultdict(list)
+
+        for skill_name, skill_data in markers.items():
+            for level_key, level_markers in skill_data.levels.items():
+                for marker in level_markers:
+                    position = len(self._entries)
+                    self._entries.append(CatalogEntry(skill_name, level_key, marker))
+                    self._by_id.setdefault(marker.id, position)
+                    by_skill[skill_name].append(position)
+                    by_level[level_key].append(position)
+                    by_priority[marker.priority].append(position)
+
+        self._by_skill = {key: _Postings(v) for key, v in by_skill.items()}
+        self._by_level = {key: _Postings(v) for key, v in by_level.items()}
+        self._by_priority = {key: _Postings(v) for key, v in by_priority.items()}
+        self._all = _Postings(range(len(self._entries)))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, marker_id: str) -> bool:
+        return marker_id in self._by_id
+
+    def get(self, marker_id: str) -> Optional[CatalogEntry]:
+        position = self._by_id.get(marker_id)
+        return None if position is None else self._entries[position]
+
+    def skills(self) -> List[str]:
+        return list(self._by_skill)
+
+    def _positions(self, marker_ids: Iterable[str]) -> _Postings:
+        by_id = self._by_id
+        return _Postings(by_id[m] for m in marker_ids if m in by_id)
+
+    def _plan(self, skill: Optional[str], level: Optional[str], priority: Optional[str], status: Optional[str],
+              completed: Iterable[str], in_progress: Iterable[str]) -> Tuple[Optional[_Postings], List[FrozenSet[int]], FrozenSet[int]]:
+        if status is not None and status not in STATUSES:
+            raise ValueError(f"Неизвестный статус: {status} (допустимо: {', '.join(STATUSES)})")
+
+        include: List[_Postings] = []
+        for value, postings in ((skill, self._by_skill), (level, self._by_level), (priority, self._by_priority)):
+            if value is not None:
+                found = postings.get(value)
+                if found is None:
+                    return None, [], frozenset()
+                include.append(found)
+
+        exclude: FrozenSet[int] = frozenset()
+        if status == STATUS_COMPLETED:
+            include.append(self._positions(completed))
+        elif status == STATUS_IN_PROGRESS:
+            include.append(self._positions(set(in_progress) - set(completed)))
+        elif status == STATUS_REMAINING:
+            exclude = self._positions(completed).members
+
+        if not include:
+            return self._all, [], exclude
+
+        # Обходим самое маленькое множество кандидатов, остальные — проверки вхождения
+        include.sort(key=len)
+        return include[0], [p.members for p in include[1:]], exclude
+
+    def query(self, skill: Optional[str] = None, level: Optional[str] = None, priority: Optional[str] = None,
+              status: Optional[str] = None, completed: Iterable[str] = (), in_progress: Iterable[str] = (),
+              limit: Optional[int] = None, offset: int = 0) -> Iterator[CatalogEntry]:
+        """Ленивый итератор по маркерам, удовлетворяющим всем фильтрам, со стабильной пагинацией."""
+        driver, others, exclude = self._plan(skill, level, priority, status, completed, in_progress)
+        if driver is None:
+            return iter(())
+
+        entries = self._entries
+        matches = (
+            entries[position] for position in driver.ordered
+            if position not in exclude and all(position in members for members in others)
+        )
+        stop = None if limit is None else offset + limit
+        return islice(matches, offset, stop)
+
+    def count(self, **filters) -> int:
+        filters.pop("limit", None)
+        filters.pop("offset", None)
+        return sum(1 for _ in self.query(**filters))
+
+
+def index_for(markers: Dict[str, Any]) -> CatalogIndex:
+    """Индекс каталога; общий каталог (.cmap) отдаёт один индекс на процесс для всех трекеров."""
+    shared = getattr(markers, "shared_index", None)
+    return shared() if callable(shared) else CatalogIndex(markers)
+
+
+__all__ = ['CatalogEntry', 'CatalogIndex', 'STATUSES', 'index_for']
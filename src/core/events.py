@@ -0,0 +1,217 @@
+"""
+Подписка на изменения прогресса: внутрипроцессная шина и межпроцессная через файл-журнал.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: ротация журнала без межпроцессной блокировки
+    fcntl = None
+
+from src.core.analytics import format_timestamp, utc_now
+
+logger = logging.getLogger(__name__)
+
+COMPLETED = "completed"
+UNCOMPLETED = "uncompleted"
+IN_PROGRESS_CHANGED = "in_progress_changed"
+CATALOG_RELOADED = "catalog_reloaded"
+EVENT_KINDS = (COMPLETED, UNCOMPLETED, IN_PROGRESS_CHANGED, CATALOG_RELOADED)
+
+DEFAULT_EVENTS_FILE = "src/data/events.jsonl"
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+
+
+@dataclass
+class ProgressChange:
+    kind: str
+    user_id: Optional[str] = None
+    marker_id: Optional[str] = None
+    in_progress: Optional[bool] = None
+    timestamp: str = field(default_factory=lambda: format_timestamp(utc_now()))
+    source: Optional[str] = None
+    # Метки синхронизации исходного события истории {"dev", "seq", "lc"}, если синхронизация включена
+    tag: Optional[Dict[str, Any]] = None
+
+
+Subscriber = Callable[[ProgressChange], None]
+
+
+class EventBus:
+    """Внутрипроцессная шина событий прогресса."""
+
+    def __init__(self):
+        self.source = uuid.uuid4().hex
+        self._subscribers: Dict[int, tuple] = {}
+        self._next_token = 0
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: Subscriber, kinds: Optional[Iterable[str]] = None,
+                  user_id: Optional[str] = None) -> Callable[[], None]:
+        """Подписывает callback на события (опционально — только нужных типов и пользователя); возвращает отписку."""
+        kinds = frozenset(kinds) if kinds is not None else None
+        with self._lock:
+            token = self._next_token
+            self._next_token += 1
+            self._subscribers[token] = (callback, kinds, user_id)
+
+        def unsubscribe() -> None:
+            with self._lock:
+                self._subscribers.pop(token, None)
+
+        return unsubscribe
+
+    def publish(self, change: ProgressChange) -> None:
+        if change.source is None:
+            change.source = self.source
+        self._dispatch(change)
+
+    def _dispatch(self, change: ProgressChange) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.values())
+        for callback, kinds, user_id in subscribers:
+            if kinds is not None and change.kind not in kinds:
+                continue
+            if user_id is not None and change.user_id not in (user_id, None):
+                continue
+            try:
+                callback(change)
+            except Exception as e:
+                logger.error(f"Ошибка в подписчике на событие {change.kind}: {e}")
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _read_lines(path: Path, offset: int, size: int) -> Tuple[bytes, int]:
+    """Целые строки журнала с позиции offset: (данные, сколько байт прочитано)."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(size - offset)
+    complete = data.rfind(b"\n") + 1
+    return data[:complete], complete
+
+
+class FileEventBus(EventBus):
+    """
+    Межпроцессная шина: события дописываются в общий журнал JSON Lines, другие процессы читают хвост журнала.
+
+    Журнал ограничен по размеру: когда он превышает max_bytes, публикующий процесс переименовывает его
+    в <журнал>.1 (предыдущий .1 удаляется) и начинает новый. Читатель, заметив ротацию, дочитывает хвост .1,
+    поэтому теряет события, только если отстал больше чем на два журнала (не опрашивал шину всё это время).
+    """
+
+    def __init__(self, events_file: str = DEFAULT_EVENTS_FILE, from_start: bool = False,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        super().__init__()
+        self.events_file = Path(events_file)
+        self.rotated_file = self.events_file.with_name(self.events_file.name + ".1")
+        self.max_bytes = max_bytes
+        stat = _stat(self.events_file)
+        self._inode = stat.st_ino if stat is not None else None
+        self._offset = 0 if from_start or stat is None else stat.st_size
+        self._read_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def publish(self, change: ProgressChange) -> None:
+        if change.source is None:
+            change.source = self.source
+        line = (json.dumps(asdict(change), ensure_ascii=False) + "\n").encode("utf-8")
+        try:
+            self.events_file.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.events_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                stat = os.fstat(fd)
+            finally:
+                os.close(fd)
+            if self.max_bytes is not None and stat.st_size >= self.max_bytes:
+                self._rotate(stat.st_ino)
+        except OSError as e:
+            logger.error(f"Ошибка записи события в {self.events_file}: {e}")
+        self._dispatch(change)
+
+    def _rotate(self, inode: int) -> None:
+        lock_path = self.events_file.with_name(self.events_file.name + ".lock")
+        with open(lock_path, 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                stat = _stat(self.events_file)
+                # Другой процесс мог ротировать журнал раньше: второй раз переименовывать нельзя
+                if stat is not None and stat.st_ino == inode:
+                    os.replace(self.events_file, self.rotated_file)
+                    logger.info(f"Журнал событий ротирован: {self.rotated_file} ({stat.st_size} байт)")
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def poll(self) -> List[ProgressChange]:
+        """Читает новые события других процессов с последней позиции и рассылает их подписчикам."""
+        with self._read_lock:
+            data = b""
+            stat = _stat(self.events_file)
+            if self._inode is not None and (stat is None or stat.st_ino != self._inode):
+                # Журнал ротирован: сначала хвост прежнего файла, затем новый файл с начала
+                rotated = _stat(self.rotated_file)
+                if rotated is not None and rotated.st_ino == self._inode:
+                    data, _ = _read_lines(self.rotated_file, self._offset, rotated.st_size)
+                self._inode, self._offset = None, 0
+            if stat is not None:
+                if self._inode is None:
+                    self._inode = stat.st_ino
+                elif stat.st_size < self._offset:
+                    self._offset = 0  # журнал был очищен
+                if stat.st_size > self._offset:
+                    tail, consumed = _read_lines(self.events_file, self._offset, stat.st_size)
+                    data += tail
+                    self._offset += consumed
+
+        changes = []
+        for raw in data.splitlines():
+            try:
+                change = ProgressChange(**json.loads(raw))
+            except (json.JSONDecodeError, TypeError) as e:
+                logger.warning(f"Пропущено некорректное событие в журнале: {e}")
+                continue
+            if change.source != self.source:
+                changes.append(change)
+                self._dispatch(change)
+        return changes
+
+    def start(self, interval: float = 1.0) -> None:
+        """Запускает фоновое наблюдение за журналом."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop.clear()
+
+        def watch() -> None:
+            while not self._stop.wait(interval):
+                self.poll()
+
+        self._watcher = threading.Thread(target=watch, name="progress-events-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+__all__ = ['EventBus', 'FileEventBus', 'ProgressChange', 'EVENT_KINDS',
+           'COMPLETED', 'UNCOMPLETED', 'IN_PROGRESS_CHANGED', 'CATALOG_RELOADED']
@@ -0,0 +1,157 @@
+"""
+Хранилище артефактов-доказательств выполнения маркеров с адресацией по содержимому (SHA-256).
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, Optional
+
+from src.core.analytics import format_timestamp, utc_now
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EVIDENCE_DIR = "src/data/evidence"
+CHUNK_SIZE = 1024 * 1024
+KIND_FILE = "file"
+KIND_LINK = "link"
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+_LINK_RE = re.compile(r"^https?://", re.IGNORECASE)
+
+
+@dataclass
+class Artifact:
+    kind: str
+    name: str
+    sha256: Optional[str] = None
+    size: int = 0
+    media_type: Optional[str] = None
+    url: Optional[str] = None
+    added_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Artifact":
+        fields = ("kind", "name", "sha256", "size", "media_type", "url", "added_at")
+        return cls(**{key: data[key] for key in fields if key in data})
+
+
+def is_link(value: str) -> bool:
+    return bool(_LINK_RE.match(value))
+
+
+class EvidenceStore:
+    """
+    Объекты лежат в objects/<2 символа хэша>/<хэш>: одинаковые файлы разных учащихся хранятся один раз.
+
+    Загрузка идёт потоково по CHUNK_SIZE байт: хэш считается на лету, данные пишутся во временный файл,
+    который затем атомарно переносится на место объекта (или удаляется, если такой объект уже есть).
+    """
+
+    def __init__(self, root: str = DEFAULT_EVIDENCE_DIR, chunk_size: int = CHUNK_SIZE):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+
+    def object_path(self, sha256: str) -> Path:
+        if not _SHA256_RE.match(sha256):
+            raise ValueError(f"Некорректный хэш артефакта: {sha256!r}")
+        return self.objects_dir / sha256[:2] / sha256
+
+    def __contains__(self, sha256: str) -> bool:
+        return _SHA256_RE.match(sha256) is not None and self.object_path(sha256).exists()
+
+    def put_stream(self, stream: BinaryIO, name: str, media_type: Optional[str] = None) -> Artifact:
+        """Сохраняет содержимое файлового объекта, не читая его целиком в память."""
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            target = self.object_path(sha256)
+            if target.exists():
+                logger.info(f"Артефакт {name} уже есть в хранилище: {sha256[:12]}")
+            else:
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(temp_path, target)
+                temp_path = None
+                logger.info(f"Артефакт сохранён: {name} ({size} байт, {sha256[:12]})")
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+
+        return Artifact(
+            kind=KIND_FILE, name=name, sha256=sha256, size=size,
+            media_type=media_type or mimetypes.guess_type(name)[0], added_at=format_timestamp(utc_now())
+        )
+
+    def put_file(self, path: str, name: Optional[str] = None) -> Artifact:
+        with open(path, 'rb') as f:
+            return self.put_stream(f, name or Path(path).name)
+
+    def add_link(self, url: str, name: Optional[str] = None) -> Artifact:
+        """Ссылка (деплой, репозиторий) не хранится как объект, а записывается как есть."""
+        if not is_link(url):
+            raise ValueError(f"Ссылка должна начинаться с http:// или https://: {url}")
+        return Artifact(kind=KIND_LINK, name=name or url, url=url, added_at=format_timestamp(utc_now()))
+
+    def add(self, source: str) -> Artifact:
+        """Добавляет ссылку или локальный файл — в зависимости от вида источника."""
+        return self.add_link(source) if is_link(source) else self.put_file(source)
+
+    def iter_chunks(self, sha256: str) -> Iterator[bytes]:
+        with open(self.object_path(sha256), 'rb') as f:
+            while True:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def verify(self, sha256: str) -> bool:
+        digest = hashlib.sha256()
+        try:
+            for chunk in self.iter_chunks(sha256):
+                digest.update(chunk)
+        except OSError:
+            return False
+        return digest.hexdigest() == sha256
+
+    def iter_objects(self) -> Iterator[str]:
+        if not self.objects_dir.exists():
+            return
+        for path in self.objects_dir.glob("??/*"):
+            if _SHA256_RE.match(path.name):
+                yield path.name
+
+    def collect_garbage(self, referenced: Iterable[str]) -> int:
+        """Удаляет объекты, на которые больше не ссылается ни один прогресс."""
+        keep = set(referenced)
+        removed = 0
+        for sha256 in list(self.iter_objects()):
+            if sha256 not in keep:
+                self.object_path(sha256).unlink()
+                removed += 1
+        return removed
+
+
+__all__ = ['Artifact', 'EvidenceStore', 'is_link', 'KIND_FILE', 'KIND_LINK']
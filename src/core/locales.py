@@ -0,0 +1,110 @@
+"""
+Локализация каталога маркеров: переводы поверх базового (русского) каталога по ID маркеров.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Файлы переводов: <locales_dir>/<язык>/<навык>.json
+    {"skills": {базовое имя навыка: {"skill_name": ..., "description": ...}},
+     "markers": {ID маркера: {"marker": ..., "validation": ..., "smart_criteria": {...}}}}
+
+Структура каталога загружается один раз; тексты языка читаются при первом запросе этого языка
+и кэшируются на процесс, поэтому каждый дополнительный язык стоит только своих строк.
+"""
+import json
+import logging
+import re
+import threading
+from dataclasses import is_dataclass, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_LOCALE = "ru"
+DEFAULT_LOCALES_DIR = "src/data/locales"
+LOCALE_RE = re.compile(r"^[A-Za-z]{2,3}(?:[_-][A-Za-z0-9]{2,8})?$")
+MARKER_TEXT_FIELDS = ("marker", "validation")
+
+_overlays: Dict[Tuple[str, str], "LocaleOverlay"] = {}
+_overlays_lock = threading.Lock()
+
+
+class LocaleOverlay:
+    """Переводы одного языка; недостающие строки берутся из базового каталога."""
+
+    def __init__(self, locale: str, skills: Optional[Dict[str, Dict[str, str]]] = None,
+                 markers: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.locale = locale
+        self.skills = skills or {}
+        self.markers = markers or {}
+
+    @classmethod
+    def load(cls, locale: str, locales_dir: str = DEFAULT_LOCALES_DIR) -> "LocaleOverlay":
+        overlay = cls(locale)
+        locale_dir = Path(locales_dir) / locale
+        for file_path in sorted(locale_dir.glob("*.json")):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                overlay.skills.update(data.get("skills", {}))
+                overlay.markers.update(data.get("markers", {}))
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"Ошибка загрузки перевода {file_path}: {e}")
+        logger.info(f"Загружен язык {locale}: {len(overlay.markers)} маркеров")
+        return overlay
+
+    def localize(self, marker):
+        """Копия маркера с переведёнными текстами (сам маркер каталога не меняется)."""
+        text = self.markers.get(marker.id)
+        if not text:
+            return marker
+        changes = {field: text[field] for field in MARKER_TEXT_FIELDS if text.get(field)}
+        if text.get("smart_criteria"):
+            changes["smart_criteria"] = {**marker.smart_criteria, **text["smart_criteria"]}
+        if not changes:
+            return marker
+        # Представления маркеров .cmap не dataclass: перевод накладывается на материализованный Marker
+        return replace(marker if is_dataclass(marker) else marker.to_marker(), **changes)
+
+    def skill_name(self, skill_name: str) -> str:
+        return self.skills.get(skill_name, {}).get("skill_name") or skill_name
+
+    def skill_description(self, skill_name: str, description: str) -> str:
+        return self.skills.get(skill_name, {}).get("description") or description
+
+
+def available_locales(locales_dir: str = DEFAULT_LOCALES_DIR) -> List[str]:
+    root = Path(locales_dir)
+    found = sorted(p.name for p in root.iterdir() if p.is_dir() and LOCALE_RE.match(p.name)) if root.is_dir() else []
+    return [BASE_LOCALE] + [locale for locale in found if locale != BASE_LOCALE]
+
+
+def get_locale(locale: Optional[str], locales_dir: str = DEFAULT_LOCALES_DIR) -> Optional[LocaleOverlay]:
+    """Переводы языка из кэша процесса (None — базовый язык каталога)."""
+    if not locale or locale == BASE_LOCALE:
+        return None
+    if not LOCALE_RE.match(locale):
+        raise ValueError(f"Недопустимый код языка: {locale!r}")
+
+    key = (str(Path(locales_dir).resolve()), locale)
+    overlay = _overlays.get(key)
+    if overlay is None:
+        with _overlays_lock:
+            overlay = _overlays.get(key)
+            if overlay is None:
+                if not (Path(locales_dir) / locale).is_dir():
+                    logger.warning(f"Перевод на язык {locale} не найден, используется {BASE_LOCALE}")
+                overlay = _overlays[key] = LocaleOverlay.load(locale, locales_dir)
+    return overlay
+
+
+def loaded_locales() -> List[str]:
+    return sorted({locale for _, locale in _overlays})
+
+
+def clear_locale_cache() -> None:
+    with _overlays_lock:
+        _overlays.clear()
+
+
+__all__ = ['BASE_LOCALE', 'LocaleOverlay', 'available_locales', 'clear_locale_cache', 'get_locale', 'loaded_locales']
@@ -0,0 +1,425 @@
+"""
+Общий каталог маркеров в плоском файле, открываемый через mmap.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Формат файла (little-endian):
+    заголовок | навыки | уровни | маркеры | ресурсы | индекс id | таблица строк
+
+Все строки хранятся один раз в общей таблице и адресуются парой
+(смещение, длина); записи навыков, уровней и маркеров имеют фиксированную
+ширину. Файл записывается один раз, а все процессы-воркеры открывают его
+через mmap и разделяют одни и те же страницы памяти.
+
+Компромисс: страницы файла общие, а декодированные строки — нет. Каталог открывается
+один раз на процесс (open_shared_catalog), поле маркера декодируется при первом обращении
+и кэшируется в объекте маркера, а индекс каталога строится один раз и общий для всех
+трекеров процесса. Частные копии появляются только у реально прочитанных полей.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.catalog_index import CatalogIndex
+from src.core.tracker import Marker, SkillData
+
+MAGIC = b"ITCMAP02"
+NO_STRING = 0xFFFFFFFF
+
+# magic, число навыков, уровней, маркеров, ресурсов, смещение таблицы строк
+HEADER = struct.Struct("<8sIIIII")
+# имя, описание, первый уровень, число уровней
+SKILL_RECORD = struct.Struct("<IIIIII")
+# ключ уровня, первый маркер, число маркеров
+LEVEL_RECORD = struct.Struct("<IIII")
+# id, marker, validation, priority, smart_criteria (JSON), skill_name,
+# methodology_author, methodology_license, verification (JSON), первый ресурс, число ресурсов, навык
+MARKER_RECORD = struct.Struct("<" + "II" * 9 + "III")
+RESOURCE_RECORD = struct.Struct("<II")
+INDEX_RECORD = struct.Struct("<I")
+
+_UNSET = object()
+_shared_catalogs: Dict[Tuple[str, int], "MappedCatalog"] = {}
+_shared_lock = threading.Lock()
+
+
+class _StringTable:
+    def __init__(self):
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._chunks: List[bytes] = []
+        self._size = 0
+
+    def add(self, value: Optional[str]) -> Tuple[int, int]:
+        if value is None:
+            return NO_STRING, 0
+        ref = self._offsets.get(value)
+        if ref is None:
+            encoded = value.encode("utf-8")
+            ref = (self._size, len(encoded))
+            self._offsets[value] = ref
+            self._chunks.append(encoded)
+            self._size += len(encoded)
+        return ref
+
+    def to_bytes(self) -> bytes:
+        return b"".join(self._chunks)
+
+
+def write_mapped_catalog(markers: Dict[str, SkillData], path: str) -> Path:
+    """Сериализует загруженный каталог в файл для MappedCatalog."""
+    strings = _StringTable()
+    skill_records, level_records, marker_records, resource_records = [], [], [], []
+    marker_ids: List[Tuple[bytes, int]] = []
+
+    for skill_index, (skill_name, skill_data) in enumerate(markers.items()):
+        skill_records.append(SKILL_RECORD.pack(
+            *strings.add(skill_name), *strings.add(skill_data.description),
+            len(level_records), len(skill_data.levels)
+        ))
+        for level_key, level_markers in skill_data.levels.items():
+            level_records.append(LEVEL_RECORD.pack(*strings.add(level_key), len(marker_records), len(level_markers)))
+            for marker in level_markers:
+                marker_ids.append((marker.id.encode("utf-8"), len(marker_records)))
+                marker_records.append(MARKER_RECORD.pack(
+                    *strings.add(marker.id),
+                    *strings.add(marker.marker),
+                    *strings.add(marker.validation),
+                    *strings.add(marker.priority),
+                    *strings.add(json.dumps(marker.smart_criteria, ensure_ascii=False)),
+                    *strings.add(marker.skill_name),
+                    *strings.add(marker.methodology_author),
+                    *strings.add(marker.methodology_license),
+                    *strings.add(None if marker.verification is None else json.dumps(marker.verification, ensure_ascii=False)),
+                    len(resource_records), len(marker.resources), skill_index
+                ))
+                resource_records.extend(RESOURCE_RECORD.pack(*strings.add(url)) for url in marker.resources)
+
+    marker_ids.sort()
+    index_records = [INDEX_RECORD.pack(marker_index) for _, marker_index in marker_ids]
+    body = b"".join(skill_records + level_records + marker_records + resource_records + index_records)
+
+    output = Path(path)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = output.with_suffix(output.suffix + ".tmp")
+    with open(tmp_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(skill_records), len(level_records), len(marker_records),
+                            len(resource_records), HEADER.size + len(body)))
+        f.write(body)
+        f.write(strings.to_bytes())
+    os.replace(tmp_file, output)
+    return output
+
+
+class MappedMarker:
+    """Представление маркера поверх mmap; поле декодируется при первом обращении и кэшируется."""
+    __slots__ = ("_catalog", "_index", "_decoded")
+
+    def __init__(self, catalog: "MappedCatalog", index: int):
+        self._catalog = catalog
+        self._index = index
+        self._decoded: List[Any] = [_UNSET] * 10
+
+    def _cached(self, slot: int, decode) -> Any:
+        value = self._decoded[slot]
+        if value is _UNSET:
+            value = self._decoded[slot] = decode()
+        return value
+
+    def _field(self, slot: int) -> Optional[str]:
+        def decode():
+            record = self._catalog._marker_record(self._index)
+            return self._catalog._string(record[slot * 2], record[slot * 2 + 1])
+        return self._cached(slot, decode)
+
+    @property
+    def id(self) -> str:
+        return self._field(0)
+
+    @property
+    def marker(self) -> str:
+        return self._field(1)
+
+    @property
+    def validation(self) -> str:
+        return self._field(2)
+
+    @property
+    def priority(self) -> str:
+        return self._field(3)
+
+    @property
+    def smart_criteria(self) -> Dict[str, str]:
+        return self._cached(4, lambda: json.loads(self._catalog._string(*self._catalog._marker_record(self._index)[8:10])))
+
+    @property
+    def skill_name(self) -> Optional[str]:
+        return self._field(5)
+
+    @property
+    def methodology_author(self) -> str:
+        return self._field(6)
+
+    @property
+    def methodology_license(self) -> str:
+        return self._field(7)
+
+    @property
+    def verification(self) -> Optional[List[Dict[str, Any]]]:
+        def decode():
+            value = self._catalog._string(*self._catalog._marker_record(self._index)[16:18])
+            return None if value is None else json.loads(value)
+        return self._cached(8, decode)
+
+    @property
+    def resources(self) -> List[str]:
+        def decode():
+            record = self._catalog._marker_record(self._index)
+            return [self._catalog._resource(i) for i in range(record[18], record[18] + record[19])]
+        return self._cached(9, decode)
+
+    def to_marker(self) -> Marker:
+        return Marker(
+            id=self.id,
+            marker=self.marker,
+            validation=self.validation,
+            priority=self.priority,
+            resources=self.resources,
+            smart_criteria=self.smart_criteria,
+            skill_name=self.skill_name,
+            methodology_author=self.methodology_author,
+            methodology_license=self.methodology_license,
+            verification=self.verification
+        )
+
+    def __repr__(self) -> str:
+        return f"MappedMarker(id={self.id!r})"
+
+
+class _MappedLevelMarkers(Sequence):
+    __slots__ = ("_catalog", "_first", "_count")
+
+    def __init__(self, catalog: "MappedCatalog", first: int, count: int):
+        self._catalog = catalog
+        self._first = first
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self._catalog.marker_at(self._first + i)
+
+
+class _MappedLevels(Mapping):
+    __slots__ = ("_catalog", "_first", "_count")
+
+    def __init__(self, catalog: "MappedCatalog", first: int, count: int):
+        self._catalog = catalog
+        self._first = first
+        self._count = count
+
+    def _records(self) -> Iterator[Tuple[str, Tuple[int, ...]]]:
+        for i in range(self._first, self._first + self._count):
+            record = self._catalog._level_record(i)
+            yield self._catalog._string(record[0], record[1]), record
+
+    def __getitem__(self, level_key: str) -> _MappedLevelMarkers:
+        for key, record in self._records():
+            if key == level_key:
+                return _MappedLevelMarkers(self._catalog, record[2], record[3])
+        raise KeyError(level_key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key, _ in self._records())
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class MappedSkill:
+    """Совместимое с SkillData представление навыка поверх mmap."""
+    __slots__ = ("_catalog", "_index")
+
+    def __init__(self, catalog: "MappedCatalog", index: int):
+        self._catalog = catalog
+        self._index = index
+
+    @property
+    def skill_name(self) -> str:
+        record = self._catalog._skill_record(self._index)
+        return self._catalog._string(record[0], record[1])
+
+    @property
+    def description(self) -> str:
+        record = self._catalog._skill_record(self._index)
+        return self._catalog._string(record[2], record[3])
+
+    @property
+    def levels(self) -> _MappedLevels:
+        record = self._catalog._skill_record(self._index)
+        return _MappedLevels(self._catalog, record[4], record[5])
+
+
+class MappedSkills(dict):
+    """Навыки общего каталога; индекс каталога общий для всех трекеров процесса."""
+
+    def __init__(self, catalog: "MappedCatalog", skills: Dict[str, MappedSkill]):
+        super().__init__(skills)
+        self.catalog = catalog
+
+    def shared_index(self) -> CatalogIndex:
+        return self.catalog.index()
+
+
+class MappedCatalog:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._buffer = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Пустой файл каталога: {self.path}")
+
+        magic, self.skill_count, self.level_count, self.marker_count, self.resource_count, self._strings_offset = \
+            HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Неизвестный формат каталога: {self.path}")
+
+        self._skills_offset = HEADER.size
+        self._levels_offset = self._skills_offset + self.skill_count * SKILL_RECORD.size
+        self._markers_offset = self._levels_offset + self.level_count * LEVEL_RECORD.size
+        self._resources_offset = self._markers_offset + self.marker_count * MARKER_RECORD.size
+        self._index_offset = self._resources_offset + self.resource_count * RESOURCE_RECORD.size
+
+        self._markers: List[Optional[MappedMarker]] = [None] * self.marker_count
+        self._skills: Optional[MappedSkills] = None
+        self._index: Optional[CatalogIndex] = None
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self._buffer.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string(self, offset: int, length: int) -> Optional[str]:
+        if offset == NO_STRING:
+            return None
+        start = self._strings_offset + offset
+        return self._buffer[start:start + length].decode("utf-8")
+
+    def _string_bytes(self, offset: int, length: int) -> bytes:
+        start = self._strings_offset + offset
+        return self._buffer[start:start + length]
+
+    def _skill_record(self, i: int) -> Tuple[int, ...]:
+        return SKILL_RECORD.unpack_from(self._buffer, self._skills_offset + i * SKILL_RECORD.size)
+
+    def _level_record(self, i: int) -> Tuple[int, ...]:
+        return LEVEL_RECORD.unpack_from(self._buffer, self._levels_offset + i * LEVEL_RECORD.size)
+
+    def _marker_record(self, i: int) -> Tuple[int, ...]:
+        return MARKER_RECORD.unpack_from(self._buffer, self._markers_offset + i * MARKER_RECORD.size)
+
+    def _resource(self, i: int) -> str:
+        return self._string(*RESOURCE_RECORD.unpack_from(self._buffer, self._resources_offset + i * RESOURCE_RECORD.size))
+
+    def _indexed_marker(self, i: int) -> int:
+        return INDEX_RECORD.unpack_from(self._buffer, self._index_offset + i * INDEX_RECORD.size)[0]
+
+    def marker_at(self, i: int) -> MappedMarker:
+        """Один объект на маркер, чтобы декодированные поля не терялись между обращениями."""
+        marker = self._markers[i]
+        if marker is None:
+            marker = self._markers[i] = MappedMarker(self, i)
+        return marker
+
+    def get_marker(self, marker_id: str) -> Optional[MappedMarker]:
+        """Бинарный поиск по отсортированному индексу id без декодирования строк."""
+        target = marker_id.encode("utf-8")
+        low, high = 0, self.marker_count
+        while low < high:
+            middle = (low + high) // 2
+            marker_index = self._indexed_marker(middle)
+            record = self._marker_record(marker_index)
+            current = self._string_bytes(record[0], record[1])
+            if current == target:
+                return self.marker_at(marker_index)
+            if current < target:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def __contains__(self, marker_id: str) -> bool:
+        return self.get_marker(marker_id) is not None
+
+    def skill_name_of(self, marker_id: str) -> Optional[str]:
+        marker = self.get_marker(marker_id)
+        if marker is None:
+            return None
+        return MappedSkill(self, self._marker_record(marker._index)[20]).skill_name
+
+    def iter_markers(self) -> Iterator[MappedMarker]:
+        return (self.marker_at(i) for i in range(self.marker_count))
+
+    def skills(self) -> "MappedSkills":
+        """Словарь навыков, совместимый по интерфейсу с CareerTracker.markers (один на каталог)."""
+        if self._skills is None:
+            skills = {}
+            for i in range(self.skill_count):
+                skill = MappedSkill(self, i)
+                skills[skill.skill_name] = skill
+            self._skills = MappedSkills(self, skills)
+        return self._skills
+
+    def index(self) -> CatalogIndex:
+        with self._lock:
+            if self._index is None:
+                self._index = CatalogIndex(self.skills())
+        return self._index
+
+    def to_skill_data(self) -> Dict[str, SkillData]:
+        return {
+            name: SkillData(
+                skill_name=name,
+                description=skill.description,
+                levels={key: [m.to_marker() for m in level] for key, level in skill.levels.items()}
+            )
+            for name, skill in self.skills().items()
+        }
+
+
+def open_shared_catalog(path: str) -> MappedCatalog:
+    """Каталог, открытый один раз на процесс; перезаписанный файл открывается заново."""
+    resolved = Path(path).resolve()
+    key = (str(resolved), resolved.stat().st_mtime_ns)
+    with _shared_lock:
+        catalog = _shared_catalogs.get(key)
+        if catalog is None:
+            # Старый mmap не закрывается: его навыки могут ещё использоваться трекерами
+            for stale in [k for k in _shared_catalogs if k[0] == key[0]]:
+                del _shared_catalogs[stale]
+            catalog = _shared_catalogs[key] = MappedCatalog(str(resolved))
+    return catalog
+
+
+__all__ = ['MappedCatalog', 'MappedMarker', 'MappedSkill', 'MappedSkills', 'open_shared_catalog',
+           'write_mapped_catalog']
@@ -0,0 +1,238 @@
+"""
+Понедельный план обучения по smart_criteria.time_bound и недельному бюджету часов.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import logging
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from src.core.analytics import utc_now, week_key
+from src.core.time_bound import parse_time_bound
+
+logger = logging.getLogger(__name__)
+
+# "1 неделя" в time_bound — неделя обучения в обычном темпе; часы и минуты — чистое время работы
+NOMINAL_HOURS_PER_WEEK = 10.0
+DEFAULT_HOURS_PER_WEEK = 10.0
+PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+MAX_WEEKS = 520
+MIN_SPLIT_HOURS = 1.0  # не дробим маркеры на куски меньше часа
+
+
+def effort_hours(time_bound: Optional[str], nominal_hours_per_week: float = NOMINAL_HOURS_PER_WEEK) -> Optional[float]:
+    """Трудоёмкость маркера в часах или None, если time_bound не распознан."""
+    duration = parse_time_bound(time_bound)
+    if not duration:
+        return None
+    if duration < timedelta(days=1):
+        return duration.total_seconds() / 3600
+    return duration / timedelta(weeks=1) * nominal_hours_per_week
+
+
+def _level_rank(level: str) -> Tuple[int, str]:
+    return (int(level), level) if level.isdigit() else (10 ** 6, level)
+
+
+@dataclass
+class PlanItem:
+    marker_id: str
+    skill_name: str
+    level: str
+    priority: str
+    hours: float
+    continued: bool = False
+
+
+@dataclass
+class PlanWeek:
+    index: int
+    start: date
+    items: List[PlanItem] = field(default_factory=list)
+    hours: float = 0.0
+
+    @property
+    def week(self) -> str:
+        return week_key(self.start)
+
+
+class _Job:
+    __slots__ = ("marker_id", "skill_name", "level", "level_rank", "priority", "hours", "order")
+
+    def __init__(self, marker_id, skill_name, level, priority, hours, order):
+        self.marker_id = marker_id
+        self.skill_name = skill_name
+        self.level = level
+        self.level_rank = _level_rank(level)
+        self.priority = priority
+        self.hours = hours
+        self.order = order
+
+
+class LearningPlanner:
+    """
+    Жадная упаковка оставшихся маркеров по неделям.
+
+    Трудоёмкость и порядок маркеров вычисляются один раз на каталог и переиспользуются для всех учащихся:
+    уровень навыка по возрастанию, затем приоритет, затем порядок каталога. Маркер уровня N ставится
+    не раньше, чем запланированы все оставшиеся маркеры того же навыка более низких уровней.
+    """
+
+    def __init__(self, markers: Dict[str, Any], hours_per_week: float = DEFAULT_HOURS_PER_WEEK,
+                 nominal_hours_per_week: float = NOMINAL_HOURS_PER_WEEK, default_hours: Optional[float] = None):
+        if hours_per_week <= 0:
+            raise ValueError("Недельный бюджет часов должен быть положительным")
+        self.hours_per_week = hours_per_week
+        default_hours = default_hours if default_hours is not None else nominal_hours_per_week
+
+        jobs = []
+        self.unknown_time_bound: List[str] = []
+        for skill_name, skill_data in markers.items():
+            for level_key, level_markers in skill_data.levels.items():
+                for marker in level_markers:
+                    hours = effort_hours(marker.smart_criteria.get("time_bound"), nominal_hours_per_week)
+                    if hours is None:
+                        self.unknown_time_bound.append(marker.id)
+                        hours = default_hours
+                    jobs.append(_Job(marker.id, skill_name, level_key, marker.priority, hours, len(jobs)))
+
+        jobs.sort(key=lambda job: (job.level_rank, PRIORITY_RANK.get(job.priority, len(PRIORITY_RANK)), job.order))
+        self._jobs: List[_Job] = jobs
+        self._by_id = {job.marker_id: job for job in jobs}
+
+    def effort(self, marker_id: str) -> Optional[float]:
+        job = self._by_id.get(marker_id)
+        return None if job is None else job.hours
+
+    def plan(self, completed: Iterable[str] = (), start: Optional[date] = None) -> "LearnerPlan":
+        return LearnerPlan(self, completed, start)
+
+    def plan_many(self, learners: Iterable[Tuple[str, Iterable[str]]],
+                  start: Optional[date] = None) -> Iterator[Tuple[str, "LearnerPlan"]]:
+        """Пакетное планирование: общий предвычисленный каталог, ленивый обход учащихся."""
+        start = start or _monday(utc_now().date())
+        for user_id, completed in learners:
+            yield user_id, LearnerPlan(self, completed, start)
+
+    def _schedule(self, pending: List[_Job], start: date, first_index: int, carry: Optional[_Job] = None,
+                  carry_hours: float = 0.0) -> List[PlanWeek]:
+        budget = self.hours_per_week
+        # Для каждого навыка — число незапланированных маркеров по уровням
+        blocking: Dict[str, Dict[Tuple[int, str], int]] = {}
+        for job in pending:
+            levels = blocking.setdefault(job.skill_name, {})
+            levels[job.level_rank] = levels.get(job.level_rank, 0) + 1
+
+        def blocked(job: _Job) -> bool:
+            return any(rank < job.level_rank and count for rank, count in blocking[job.skill_name].items())
+
+        # Нижняя граница трудоёмкости оставшихся маркеров: дальше неё неделю не сканируем
+        min_hours = min((job.hours for job in pending), default=0.0)
+        weeks: List[PlanWeek] = []
+        index = first_index
+        while (pending or carry_hours > 0) and index - first_index < MAX_WEEKS:
+            week = PlanWeek(index=index, start=start + timedelta(weeks=index))
+            free = budget
+            if carry_hours > 0:
+                part = min(carry_hours, budget)
+                week.items.append(PlanItem(carry.marker_id, carry.skill_name, carry.level, carry.priority,
+                                           round(part, 2), continued=True))
+                carry_hours -= part
+                free -= part
+
+            remaining: List[_Job] = []
+            for i, job in enumerate(pending):
+                if free <= 0 or free < min_hours:
+                    remaining.extend(pending[i:])
+                    break
+                if job.hours > free or blocked(job):
+                    remaining.append(job)
+                    continue
+                week.items.append(PlanItem(job.marker_id, job.skill_name, job.level, job.priority, round(job.hours, 2)))
+                free -= job.hours
+                blocking[job.skill_name][job.level_rank] -= 1
+
+            # Целиком больше ничего не помещается: начинаем первый доступный крупный маркер в остаток недели
+            if carry_hours <= 0 and free >= min(MIN_SPLIT_HOURS, budget):
+                for i, job in enumerate(remaining):
+                    if not blocked(job):
+                        week.items.append(PlanItem(job.marker_id, job.skill_name, job.level, job.priority, round(free, 2)))
+                        carry, carry_hours = job, job.hours - free
+                        free = 0.0
+                        blocking[job.skill_name][job.level_rank] -= 1
+                        del remaining[i]
+                        break
+
+            week.hours = round(budget - free, 2)
+            weeks.append(week)
+            pending = remaining
+            index += 1
+
+        if pending:
+            logger.warning(f"План обрезан на {MAX_WEEKS} неделях, не запланировано маркеров: {len(pending)}")
+        return weeks
+
+
+def _monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class LearnerPlan:
+    """План одного учащегося; при выполнении маркера пересчитываются только недели начиная с его недели."""
+
+    def __init__(self, planner: LearningPlanner, completed: Iterable[str] = (), start: Optional[date] = None):
+        self.planner = planner
+        self.start = start or _monday(utc_now().date())
+        self.completed: Set[str] = set(completed)
+        pending = [job for job in planner._jobs if job.marker_id not in self.completed]
+        self.weeks: List[PlanWeek] = planner._schedule(pending, self.start, 0)
+
+    def week_of(self, marker_id: str) -> Optional[int]:
+        for position, week in enumerate(self.weeks):
+            if any(item.marker_id == marker_id for item in week.items):
+                return position
+        return None
+
+    def complete(self, marker_id: str) -> bool:
+        """Учитывает выполненный маркер: недели до его недели остаются как были, хвост плана пересобирается."""
+        if marker_id in self.completed:
+            return False
+        self.completed.add(marker_id)
+        position = self.week_of(marker_id)
+        if position is None:
+            return False
+
+        # Крупный маркер, начатый в сохраняемых неделях, продолжается в пересобранном хвосте
+        spent: Dict[str, float] = {}
+        for week in self.weeks[:position]:
+            for item in week.items:
+                spent[item.marker_id] = spent.get(item.marker_id, 0.0) + item.hours
+        carry, carry_hours = None, 0.0
+        for planned_id, hours in spent.items():
+            job = self.planner._by_id[planned_id]
+            if planned_id not in self.completed and job.hours - hours > 1e-9:
+                carry, carry_hours = job, job.hours - hours
+
+        pending = [job for job in self.planner._jobs if job.marker_id not in self.completed and job.marker_id not in spent]
+        self.weeks = self.weeks[:position] + self.planner._schedule(pending, self.start, position, carry, carry_hours)
+        return True
+
+    @property
+    def total_hours(self) -> float:
+        return round(sum(week.hours for week in self.weeks), 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "start": self.start.isoformat(),
+            "hours_per_week": self.planner.hours_per_week,
+            "total_hours": self.total_hours,
+            "weeks": [
+                {"index": week.index, "week": week.week, "start": week.start.isoformat(), "hours": week.hours,
+                 "items": [asdict(item) for item in week.items]}
+                for week in self.weeks
+            ],
+        }
+
+
+__all__ = ['LearningPlanner', 'LearnerPlan', 'PlanItem', 'PlanWeek', 'effort_hours']
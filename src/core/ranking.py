@@ -0,0 +1,261 @@
+"""
+Рейтинг в когорте: доля учащихся, которых пользователь опережает, по каждому навыку и в целом.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Для навыка хранится дерево Фенвика над числом выполненных маркеров: ячейка c — сколько учащихся
+выполнили ровно c маркеров. Выполнение маркера переносит учащегося из ячейки c в c + 1 за O(log n),
+а «сколько учащихся выполнили меньше» — префиксная сумма, тоже O(log n).
+"""
+import json
+import logging
+import os
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERALL = ""  # ключ общего рейтинга по всем навыкам
+DEFAULT_RANKING_DIR = ".cache/ranking"
+
+
+class FenwickTree:
+    """Префиксные суммы с обновлением за O(log n); индексы 0..size-1."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = array("q", [0] * (size + 1))
+
+    def add(self, index: int, delta: int) -> None:
+        i = index + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index: int) -> int:
+        """Сумма ячеек 0..index (0 при index < 0)."""
+        i = min(index, self.size - 1) + 1
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    @classmethod
+    def from_counts(cls, counts: List[int]) -> "FenwickTree":
+        """Построение за O(n) по значениям ячеек."""
+        tree = cls(len(counts))
+        data = tree._tree
+        for i, value in enumerate(counts, 1):
+            data[i] += value
+            parent = i + (i & -i)
+            if parent <= tree.size:
+                data[parent] += data[i]
+        return tree
+
+
+class CohortRanking:
+    """Деревья Фенвика по навыкам и общее; число выполненных маркеров учащихся хранится компактно по слотам."""
+
+    def __init__(self, markers: Dict[str, Any]):
+        self._marker_skill: Dict[str, str] = {}
+        self.totals: Dict[str, int] = {}
+        for skill_name, skill_data in markers.items():
+            count = 0
+            for level_markers in skill_data.levels.values():
+                for marker in level_markers:
+                    self._marker_skill[marker.id] = skill_name
+                    count += 1
+            self.totals[skill_name] = count
+        self.totals[OVERALL] = len(self._marker_skill)
+
+        self._slots: Dict[str, int] = {}
+        self._counts: Dict[str, array] = {key: array("I") for key in self.totals}
+        self._trees: Dict[str, FenwickTree] = {key: FenwickTree(total + 1) for key, total in self.totals.items()}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._slots
+
+    def _slot(self, user_id: str) -> int:
+        slot = self._slots.get(user_id)
+        if slot is None:
+            slot = self._slots[user_id] = len(self._slots)
+            for key, counts in self._counts.items():
+                counts.append(0)
+                self._trees[key].add(0, 1)
+        return slot
+
+    def _move(self, key: str, slot: int, count: int) -> None:
+        counts = self._counts[key]
+        count = max(0, min(count, self.totals[key]))
+        if counts[slot] != count:
+            tree = self._trees[key]
+            tree.add(counts[slot], -1)
+            tree.add(count, 1)
+            counts[slot] = count
+
+    def insert(self, user_id: str, completed: Iterable[str]) -> None:
+        """Устанавливает набор выполненных маркеров учащегося целиком (новый учащийся или пересборка)."""
+        per_skill: Dict[str, int] = dict.fromkeys(self.totals, 0)
+        for marker_id in set(completed):
+            skill_name = self._marker_skill.get(marker_id)
+            if skill_name is not None:
+                per_skill[skill_name] += 1
+                per_skill[OVERALL] += 1
+        with self._lock:
+            slot = self._slot(user_id)
+            for key, count in per_skill.items():
+                self._move(key, slot, count)
+
+    def add_marker(self, user_id: str, marker_id: str, delta: int = 1) -> None:
+        """Инкрементальное обновление при выполнении (delta=1) или отмене (delta=-1) маркера: O(log n)."""
+        skill_name = self._marker_skill.get(marker_id)
+        if skill_name is None:
+            return
+        with self._lock:
+            slot = self._slot(user_id)
+            for key in (skill_name, OVERALL):
+                self._move(key, slot, self._counts[key][slot] + delta)
+
+    def remove(self, user_id: str) -> None:
+        """Исключает учащегося из рейтинга (слот остаётся, но не учитывается)."""
+        with self._lock:
+            slot = self._slots.pop(user_id, None)
+            if slot is None:
+                return
+            for key, counts in self._counts.items():
+                self._trees[key].add(counts[slot], -1)
+            self._free_slot(slot)
+
+    def _free_slot(self, slot: int) -> None:
+        # Последний слот переезжает на место удалённого, чтобы массивы оставались плотными
+        last = len(self._slots)
+        if slot != last:
+            moved = next(user_id for user_id, s in self._slots.items() if s == last)
+            self._slots[moved] = slot
+            for counts in self._counts.values():
+                counts[slot] = counts[last]
+        for counts in self._counts.values():
+            counts.pop()
+
+    def completed_count(self, user_id: str, skill: Optional[str] = None) -> Optional[int]:
+        slot = self._slots.get(user_id)
+        key = OVERALL if skill is None else skill
+        if slot is None or key not in self._counts:
+            return None
+        return self._counts[key][slot]
+
+    def rank(self, user_id: str, skill: Optional[str] = None) -> Optional[Dict[str, int]]:
+        """{"ahead_of": опережает, "behind": отстаёт от, "tied": столько же, "cohort": всего учащихся}."""
+        key = OVERALL if skill is None else skill
+        with self._lock:
+            count = self.completed_count(user_id, skill)
+            if count is None:
+                return None
+            tree = self._trees[key]
+            below = tree.prefix(count - 1)
+            at_most = tree.prefix(count)
+            cohort = len(self._slots)
+        return {"ahead_of": below, "behind": cohort - at_most, "tied": at_most - below - 1, "cohort": cohort}
+
+    def percentile(self, user_id: str, skill: Optional[str] = None) -> Optional[float]:
+        """Процент остальных учащихся когорты, выполнивших меньше маркеров (None — учащийся неизвестен)."""
+        rank = self.rank(user_id, skill)
+        if rank is None:
+            return None
+        others = rank["cohort"] - 1
+        return 100.0 * rank["ahead_of"] / others if others else 0.0
+
+    def save(self, ranking_dir: str) -> Path:
+        """Сохраняет слоты учащихся в index.json, счётчики — в компактный counts.bin."""
+        path = Path(ranking_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            keys = sorted(self._counts)
+            users = sorted(self._slots, key=self._slots.get)
+            counts = array("I")
+            for key in keys:
+                counts.extend(self._counts[key])
+            meta = {"totals": self.totals, "keys": keys, "users": users}
+
+        for name, write in (("counts.bin", lambda f: counts.tofile(f)),
+                            ("index.json", lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")))):
+            tmp_file = path / (name + ".tmp")
+            with open(tmp_file, 'wb') as f:
+                write(f)
+            os.replace(tmp_file, path / name)
+        logger.info(f"Рейтинг когорты сохранён: {path} ({len(users)} учащихся)")
+        return path
+
+    @classmethod
+    def load(cls, ranking_dir: str, markers: Dict[str, Any]) -> "CohortRanking":
+        """Загружает сохранённый рейтинг; ValueError, если он построен для другого каталога."""
+        path = Path(ranking_dir)
+        with open(path / "index.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        ranking = cls(markers)
+        if meta["totals"] != ranking.totals:
+            raise ValueError("Рейтинг построен для другой версии каталога")
+
+        counts = array("I")
+        with open(path / "counts.bin", 'rb') as f:
+            counts.frombytes(f.read())
+        users = meta["users"]
+        ranking._slots = {user_id: slot for slot, user_id in enumerate(users)}
+        for position, key in enumerate(meta["keys"]):
+            column = counts[position * len(users):(position + 1) * len(users)]
+            histogram = [0] * (ranking.totals[key] + 1)
+            for count in column:
+                histogram[count] += 1
+            ranking._counts[key] = column
+            ranking._trees[key] = FenwickTree.from_counts(histogram)
+        return ranking
+
+
+def build_ranking_from_progress(source: str, markers: Dict[str, Any],
+                                ranking: Optional[CohortRanking] = None) -> CohortRanking:
+    """Строит рейтинг по директории (или glob-шаблону) файлов прогресса; id учащегося — имя файла."""
+    from src.utils.cohort import iter_progress_files
+
+    ranking = ranking or CohortRanking(markers)
+    for path in iter_progress_files(source):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                completed = json.load(f).get("completed_markers", [])
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Пропущен файл прогресса {path}: {e}")
+            continue
+        if isinstance(completed, list):
+            ranking.insert(Path(path).stem, [x for x in completed if isinstance(x, str)])
+    return ranking
+
+
+def load_or_build_ranking(markers: Dict[str, Any], progress_dir: str,
+                          ranking_dir: str = DEFAULT_RANKING_DIR) -> CohortRanking:
+    """Сохранённый рейтинг, если он новее всех файлов прогресса; иначе пересборка и сохранение."""
+    from src.utils.cohort import iter_progress_files
+
+    index_file = Path(ranking_dir) / "index.json"
+    if index_file.exists() and os.path.isdir(progress_dir):
+        saved_at = index_file.stat().st_mtime
+        if all(os.path.getmtime(path) <= saved_at for path in iter_progress_files(progress_dir)):
+            try:
+                return CohortRanking.load(ranking_dir, markers)
+            except (OSError, ValueError, KeyError, json.JSONDecodeError) as e:
+                logger.warning(f"Сохранённый рейтинг не подходит, пересобираем: {e}")
+
+    ranking = build_ranking_from_progress(progress_dir, markers) if os.path.isdir(progress_dir) else CohortRanking(markers)
+    try:
+        ranking.save(ranking_dir)
+    except OSError as e:
+        logger.warning(f"Не удалось сохранить рейтинг когорты: {e}")
+    return ranking
+
+
+__all__ = ['CohortRanking', 'FenwickTree', 'build_ranking_from_progress', 'load_or_build_ranking']
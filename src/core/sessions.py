@@ -0,0 +1,198 @@
+"""
+Менеджер пользовательских сессий трекера поверх общего каталога.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import logging
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from src.core.catalog_index import index_for
+from src.core.events import CATALOG_RELOADED, COMPLETED, UNCOMPLETED, EventBus, ProgressChange
+from src.core.ranking import CohortRanking, build_ranking_from_progress
+from src.core.tracker import CareerTracker, load_catalog
+
+logger = logging.getLogger(__name__)
+
+USER_ID_RE = re.compile(r"^[A-Za-z0-9_.@-]{1,128}$")
+DEFAULT_PROGRESS_DIR = "src/data/users"
+
+# Грубая оценка памяти на одну запись прогресса (строка id + служебные объекты)
+BYTES_PER_MARKER_ID = 120
+BYTES_PER_HISTORY_EVENT = 400
+BYTES_PER_SESSION = 4096
+
+
+def user_progress_path(user_id: str, progress_dir: str = DEFAULT_PROGRESS_DIR) -> Path:
+    if not USER_ID_RE.match(user_id) or user_id.startswith("."):
+        raise ValueError(f"Недопустимый ID пользователя: {user_id!r}")
+    return Path(progress_dir) / f"{user_id}.json"
+
+
+def estimate_session_bytes(tracker: CareerTracker) -> int:
+    progress = tracker.progress
+    ids = len(progress["completed_markers"]) + len(progress["in_progress_markers"])
+    return BYTES_PER_SESSION + ids * BYTES_PER_MARKER_ID + len(progress["history"]) * BYTES_PER_HISTORY_EVENT
+
+
+class SessionManager:
+    """LRU-кэш трекеров недавно активных пользователей с отложенной записью прогресса при вытеснении."""
+
+    def __init__(self, markers_dir: str = "src/data/markers", progress_dir: str = DEFAULT_PROGRESS_DIR,
+                 max_sessions: int = 1024, max_bytes: Optional[int] = 64 * 1024 * 1024, write_back: bool = True,
+                 event_bus: Optional[EventBus] = None, ranking: Optional[CohortRanking] = None):
+        self.markers_dir = markers_dir
+        self.progress_dir = Path(progress_dir)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.write_back = write_back
+        self.markers = load_catalog(markers_dir)
+        self.index = index_for(self.markers)
+        self.ranking = ranking
+
+        self._sessions: "OrderedDict[str, CareerTracker]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_backs = 0
+
+        self.event_bus = event_bus
+        if event_bus is not None:
+            event_bus.subscribe(self._on_change)
+
+    def progress_path(self, user_id: str) -> Path:
+        return user_progress_path(user_id, str(self.progress_dir))
+
+    def get(self, user_id: str) -> CareerTracker:
+        """
+        Возвращает трекер пользователя, загружая прогресс только при промахе кэша.
+
+        Трекер общий для всех вкладок и устройств пользователя, поэтому язык отображения в нём не хранится:
+        вкладка передаёт свой язык явно (get_locale, PortfolioJobQueue.submit).
+        """
+        path = self.progress_path(user_id)
+        with self._lock:
+            tracker = self._sessions.get(user_id)
+            if tracker is not None:
+                self.hits += 1
+                self._sessions.move_to_end(user_id)
+            else:
+                self.misses += 1
+                tracker = CareerTracker(
+                    markers_dir=self.markers_dir, progress_file=str(path), user_id=user_id,
+                    markers=self.markers, index=self.index, autosave=not self.write_back,
+                    event_bus=self.event_bus, ranking=self.ranking
+                )
+                self._sessions[user_id] = tracker
+            self._resize(user_id, tracker)
+            self._evict()
+            return tracker
+
+    def _on_change(self, change: ProgressChange) -> None:
+        """Инкрементально обновляет закэшированные сессии по событиям вместо перечитывания файлов."""
+        with self._lock:
+            if change.kind == CATALOG_RELOADED:
+                self.markers = load_catalog(self.markers_dir)
+                self.index = index_for(self.markers)
+                if self.ranking is not None:
+                    # Число маркеров в навыках могло измениться — рейтинг пересобирается по файлам прогресса
+                    self.flush_all()
+                    self.ranking = build_ranking_from_progress(str(self.progress_dir), self.markers)
+                for tracker in self._sessions.values():
+                    tracker.set_catalog(self.markers, self.index)
+                    tracker.ranking = self.ranking
+                return
+
+            tracker = self._sessions.get(change.user_id)
+            if tracker is not None:
+                if tracker.apply_change(change):
+                    self._resize(change.user_id, tracker)
+            elif self.ranking is not None and change.user_id in self.ranking and change.marker_id:
+                # Сессии нет в кэше: рейтинг всё равно обновляем по событию, без чтения файла
+                if change.kind == COMPLETED:
+                    self.ranking.add_marker(change.user_id, change.marker_id)
+                elif change.kind == UNCOMPLETED:
+                    self.ranking.add_marker(change.user_id, change.marker_id, -1)
+
+    def touch(self, user_id: str) -> None:
+        """Пересчитывает занимаемую сессией память после изменения прогресса."""
+        with self._lock:
+            tracker = self._sessions.get(user_id)
+            if tracker is not None:
+                self._resize(user_id, tracker)
+                self._evict()
+
+    def _resize(self, user_id: str, tracker: CareerTracker) -> None:
+        size = estimate_session_bytes(tracker)
+        self._total_bytes += size - self._sizes.get(user_id, 0)
+        self._sizes[user_id] = size
+
+    def _evict(self) -> None:
+        while len(self._sessions) > 1 and (
+            len(self._sessions) > self.max_sessions
+            or (self.max_bytes is not None and self._total_bytes > self.max_bytes)
+        ):
+            user_id, tracker = self._sessions.popitem(last=False)
+            self._total_bytes -= self._sizes.pop(user_id, 0)
+            self.evictions += 1
+            self._release(tracker)
+
+    def _write_back(self, tracker: CareerTracker) -> bool:
+        if not tracker.dirty:
+            return True
+        self.write_backs += 1
+        if not tracker.flush():
+            logger.error(f"Не удалось сохранить отложенный прогресс пользователя {tracker.user_id}")
+            return False
+        return True
+
+    def _release(self, tracker: CareerTracker) -> bool:
+        """Сессия покидает кэш: изменения записываются, а ссылки на трекер в текущих запросах дальше пишут сразу на диск."""
+        if tracker.dirty:
+            self.write_backs += 1
+        if not tracker.detach():
+            logger.error(f"Не удалось сохранить прогресс пользователя {tracker.user_id} при вытеснении")
+            return False
+        return True
+
+    def invalidate(self, user_id: str) -> None:
+        """Сбрасывает сессию (с записью изменений), чтобы следующий get() перечитал прогресс с диска."""
+        with self._lock:
+            tracker = self._sessions.pop(user_id, None)
+            if tracker is not None:
+                self._total_bytes -= self._sizes.pop(user_id, 0)
+                self._release(tracker)
+
+    def flush_all(self) -> int:
+        with self._lock:
+            return sum(1 for tracker in list(self._sessions.values()) if tracker.dirty and self._write_back(tracker))
+
+    def close(self) -> None:
+        with self._lock:
+            for tracker in self._sessions.values():
+                self._release(tracker)
+            self._sessions.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "sessions": len(self._sessions),
+                "approx_bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "evictions": self.evictions,
+                "write_backs": self.write_backs,
+            }
+
+
+__all__ = ['SessionManager', 'user_progress_path']
@@ -0,0 +1,229 @@
+"""
+Поиск похожих учащихся: MinHash-сигнатуры наборов выполненных маркеров и LSH-бакеты.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = 0xFFFFFFFF
+
+
+@lru_cache(maxsize=65536)
+def _base_hash(marker_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(marker_id.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SimilarityIndex:
+    """MinHash + LSH по наборам completed_markers с инкрементальной вставкой и сохранением на диск."""
+
+    def __init__(self, num_perm: int = 128, bands: int = 32, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm должно делиться на bands без остатка")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.seed = seed
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+                              for _ in range(num_perm)]
+        self._marker_hashes: Dict[str, Tuple[int, ...]] = {}
+        self._signatures: Dict[str, List[int]] = {}
+        self._completed: Dict[str, Set[str]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], Set[str]]] = [defaultdict(set) for _ in range(bands)]
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._signatures
+
+    def _marker_hash(self, marker_id: str) -> Tuple[int, ...]:
+        hashes = self._marker_hashes.get(marker_id)
+        if hashes is None:
+            x = _base_hash(marker_id)
+            hashes = tuple(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for a, b in self._coefficients)
+            self._marker_hashes[marker_id] = hashes
+        return hashes
+
+    def signature(self, completed: Iterable[str]) -> List[int]:
+        signature = [MAX_HASH] * self.num_perm
+        for marker_id in set(completed):
+            signature = list(map(min, signature, self._marker_hash(marker_id)))
+        return signature
+
+    def _band(self, signature: List[int], band: int) -> Tuple[int, ...]:
+        start = band * self.rows
+        return tuple(signature[start:start + self.rows])
+
+    def _index(self, user_id: str, signature: List[int], previous: Optional[List[int]] = None) -> None:
+        for band in range(self.bands):
+            key = self._band(signature, band)
+            if previous is not None:
+                old_key = self._band(previous, band)
+                if old_key == key:
+                    continue
+                members = self._buckets[band].get(old_key)
+                if members is not None:
+                    members.discard(user_id)
+                    if not members:
+                        del self._buckets[band][old_key]
+            self._buckets[band][key].add(user_id)
+
+    def insert(self, user_id: str, completed: Iterable[str]) -> None:
+        """Добавляет или полностью заменяет набор выполненных маркеров пользователя."""
+        completed = set(completed)
+        with self._lock:
+            self.remove(user_id)
+            if not completed:
+                self._completed[user_id] = set()
+                return
+            signature = self.signature(completed)
+            self._signatures[user_id] = signature
+            self._completed[user_id] = completed
+            self._index(user_id, signature)
+
+    def add_marker(self, user_id: str, marker_id: str) -> None:
+        """Инкрементально обновляет сигнатуру после mark_completed: перестраиваются только изменившиеся бакеты."""
+        with self._lock:
+            completed = self._completed.setdefault(user_id, set())
+            if marker_id in completed:
+                return
+            completed.add(marker_id)
+            previous = self._signatures.get(user_id)
+            signature = list(map(min, previous or [MAX_HASH] * self.num_perm, self._marker_hash(marker_id)))
+            self._signatures[user_id] = signature
+            self._index(user_id, signature, previous)
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            signature = self._signatures.pop(user_id, None)
+            self._completed.pop(user_id, None)
+            if signature is None:
+                return
+            for band in range(self.bands):
+                key = self._band(signature, band)
+                members = self._buckets[band].get(key)
+                if members is not None:
+                    members.discard(user_id)
+                    if not members:
+                        del self._buckets[band][key]
+
+    def candidates(self, signature: List[int]) -> Set[str]:
+        found: Set[str] = set()
+        for band in range(self.bands):
+            members = self._buckets[band].get(self._band(signature, band))
+            if members:
+                found.update(members)
+        return found
+
+    def similar(self, user_id: Optional[str] = None, completed: Optional[Iterable[str]] = None,
+                k: int = 10, min_similarity: float = 0.0) -> List[Tuple[str, float]]:
+        """Ближайшие учащиеся по Жаккару; кандидаты берутся только из общих LSH-бакетов."""
+        with self._lock:
+            if completed is None:
+                completed = self._completed.get(user_id, set())
+                signature = self._signatures.get(user_id)
+            else:
+                completed = set(completed)
+                signature = self.signature(completed) if completed else None
+            if signature is None:
+                return []
+
+            scored = []
+            for other in self.candidates(signature):
+                if other == user_id:
+                    continue
+                other_completed = self._completed[other]
+                similarity = len(completed & other_completed) / len(completed | other_completed)
+                if similarity >= min_similarity:
+                    scored.append((other, similarity))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:k]
+
+    def recommend(self, user_id: str, k: int = 5, neighbours: int = 20) -> List[Tuple[str, float]]:
+        """«Учащиеся, похожие на вас, также выполнили…» — маркеры соседей, взвешенные по сходству."""
+        with self._lock:
+            own = self._completed.get(user_id, set())
+            scores = Counter()
+            for other, similarity in self.similar(user_id, k=neighbours):
+                for marker_id in self._completed[other] - own:
+                    scores[marker_id] += similarity
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def save(self, index_dir: str) -> Path:
+        """Сохраняет параметры и наборы в index.json, сигнатуры — в компактный signatures.bin."""
+        path = Path(index_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            users = list(self._signatures)
+            signatures = array("I")
+            for user_id in users:
+                signatures.extend(self._signatures[user_id])
+            meta = {
+                "num_perm": self.num_perm,
+                "bands": self.bands,
+                "seed": self.seed,
+                "users": users,
+                "completed": {user_id: sorted(markers) for user_id, markers in self._completed.items()},
+            }
+
+        for name, write in (("signatures.bin", lambda f: signatures.tofile(f)),
+                            ("index.json", lambda f: f.write(json.dumps(meta, ensure_ascii=False).encode("utf-8")))):
+            tmp_file = path / (name + ".tmp")
+            with open(tmp_file, 'wb') as f:
+                write(f)
+            os.replace(tmp_file, path / name)
+        logger.info(f"Индекс похожих учащихся сохранён: {path} ({len(users)} пользователей)")
+        return path
+
+    @classmethod
+    def load(cls, index_dir: str) -> "SimilarityIndex":
+        path = Path(index_dir)
+        with open(path / "index.json", 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        index = cls(num_perm=meta["num_perm"], bands=meta["bands"], seed=meta["seed"])
+
+        signatures = array("I")
+        with open(path / "signatures.bin", 'rb') as f:
+            signatures.frombytes(f.read())
+        for position, user_id in enumerate(meta["users"]):
+            signature = signatures[position * index.num_perm:(position + 1) * index.num_perm].tolist()
+            index._signatures[user_id] = signature
+            index._index(user_id, signature)
+        index._completed = {user_id: set(markers) for user_id, markers in meta["completed"].items()}
+        return index
+
+
+def build_index_from_progress(source: str, index: Optional[SimilarityIndex] = None) -> SimilarityIndex:
+    """Строит индекс по директории (или glob-шаблону) файлов прогресса; id пользователя — имя файла."""
+    from src.utils.cohort import iter_progress_files
+
+    index = index or SimilarityIndex()
+    for path in iter_progress_files(source):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            completed = data.get("completed_markers", [])
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Пропущен файл прогресса {path}: {e}")
+            continue
+        if isinstance(completed, list):
+            index.insert(Path(path).stem, [x for x in completed if isinstance(x, str)])
+    return index
+
+
+__all__ = ['SimilarityIndex', 'build_index_from_progress']
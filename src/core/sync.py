@@ -0,0 +1,298 @@
+"""
+Синхронизация прогресса между устройствами обменом дельтами событий истории.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Каждый файл прогресса — реплика со своим ID устройства. Событие истории помечается устройством,
+порядковым номером на нём (seq) и часами Лэмпорта (lc). Вектор версий {устройство: последний seq}
+говорит, какие события реплика уже видела, поэтому при обмене передаются только недостающие.
+
+Конфликты разрешаются детерминированно: состояние маркера задаёт его последнее событие по (lc, устройство, seq),
+то есть изменение, сделанное после получения чужого, всегда побеждает, а одновременные упорядочиваются по ID
+устройства — результат не зависит от порядка синхронизаций.
+"""
+import json
+import logging
+import urllib.error
+import urllib.request
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.analytics import (
+    EVENT_COMPLETED, EVENT_IN_PROGRESS, EVENT_UNCOMPLETED, format_timestamp, parse_timestamp
+)
+
+logger = logging.getLogger(__name__)
+
+SYNC_FORMAT = 1
+EVENT_CODES = {EVENT_COMPLETED: "c", EVENT_IN_PROGRESS: "p", EVENT_UNCOMPLETED: "u"}
+CODE_EVENTS = {code: event for event, code in EVENT_CODES.items()}
+HTTP_TIMEOUT = 30
+
+Entry = Dict[str, Any]
+Vector = Dict[str, int]
+
+
+class SyncError(ValueError):
+    """Некорректное сообщение синхронизации или ошибка связи с сервером."""
+
+
+def new_device_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def _head_key(entry: Entry) -> Tuple[int, str, int]:
+    return entry["lc"], entry["dev"], entry["seq"]
+
+
+def _update_head(state: Dict[str, Any], entry: Entry) -> bool:
+    """Запоминает событие как последнее для маркера, если оно новее; True — состояние маркера изменилось."""
+    head = state["heads"].get(entry["marker_id"])
+    if head is not None and tuple(head[:3]) >= _head_key(entry):
+        return False
+    state["heads"][entry["marker_id"]] = [entry["lc"], entry["dev"], entry["seq"], entry["event"]]
+    return True
+
+
+def ensure_sync_state(progress: Dict[str, Any], device_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Включает синхронизацию для прогресса: при первом вызове все события истории
+    помечаются как события этого устройства.
+    """
+    state = progress.get("sync")
+    if isinstance(state, dict):
+        return state
+
+    state = {"device": device_id or new_device_id(), "clock": 0, "vector": {}, "peers": {}, "heads": {}}
+    progress["sync"] = state
+    for entry in progress["history"]:
+        if isinstance(entry, dict) and "dev" not in entry and _valid_event(entry):
+            tag_entry(progress, entry)
+    return state
+
+
+def _valid_event(entry: Entry) -> bool:
+    try:
+        parse_timestamp(entry["timestamp"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    return entry.get("event") in EVENT_CODES and isinstance(entry.get("marker_id"), str)
+
+
+def tag_entry(progress: Dict[str, Any], entry: Entry) -> None:
+    """Помечает новое локальное событие (если синхронизация включена)."""
+    state = progress.get("sync")
+    if not isinstance(state, dict):
+        return
+    device = state["device"]
+    state["clock"] += 1
+    state["vector"][device] = state["vector"].get(device, 0) + 1
+    entry.update(dev=device, seq=state["vector"][device], lc=state["clock"])
+    if entry.get("event") in EVENT_CODES:
+        _update_head(state, entry)
+
+
+def observe_entry(progress: Dict[str, Any], entry: Entry) -> None:
+    """Учитывает уже помеченное событие этой же реплики, записанное другим процессом (копия из шины событий)."""
+    state = progress.get("sync")
+    if not isinstance(state, dict) or "dev" not in entry:
+        return
+    state["clock"] = max(state["clock"], entry["lc"])
+    state["vector"][entry["dev"]] = max(state["vector"].get(entry["dev"], 0), entry["seq"])
+    if entry.get("event") in EVENT_CODES:
+        _update_head(state, entry)
+
+
+def changes_since(progress: Dict[str, Any], vector: Vector) -> List[Entry]:
+    """
+    События, которых нет у реплики с вектором vector.
+
+    События каждого устройства лежат в истории по возрастанию seq, поэтому история читается с конца
+    до первого уже известного события каждого устройства: стоимость пропорциональна числу изменений.
+    """
+    state = progress["sync"]
+    pending = {device for device, seq in state["vector"].items() if seq > vector.get(device, 0)}
+    found: List[Entry] = []
+    for entry in reversed(progress["history"]):
+        if not pending:
+            break
+        device = entry.get("dev") if isinstance(entry, dict) else None
+        if device not in pending:
+            continue
+        if entry["seq"] <= vector.get(device, 0):
+            pending.discard(device)
+            continue
+        found.append(entry)
+    found.reverse()
+    return found
+
+
+def merge_entries(progress: Dict[str, Any], entries: List[Entry]) -> Tuple[List[Entry], Dict[str, str]]:
+    """
+    Добавляет в историю ещё не виденные события и пересчитывает затронутые маркеры.
+
+    Возвращает (новые события, {ID маркера: новое событие-состояние}) для маркеров, чьё состояние изменилось.
+    """
+    state = progress["sync"]
+    vector = state["vector"]
+    completed = progress["completed_markers"]
+    in_progress = progress["in_progress_markers"]
+    added: List[Entry] = []
+    touched = set()
+
+    for entry in sorted(entries, key=lambda e: (e["dev"], e["seq"])):
+        if entry["seq"] <= vector.get(entry["dev"], 0):
+            continue
+        progress["history"].append(entry)
+        vector[entry["dev"]] = entry["seq"]
+        state["clock"] = max(state["clock"], entry["lc"])
+        added.append(entry)
+        if _update_head(state, entry):
+            touched.add(entry["marker_id"])
+
+    changes: Dict[str, str] = {}
+    for marker_id in sorted(touched):
+        event = state["heads"][marker_id][3]
+        now_completed = event == EVENT_COMPLETED
+        now_in_progress = event == EVENT_IN_PROGRESS
+        if (marker_id in completed) == now_completed and (marker_id in in_progress) == now_in_progress:
+            continue
+        if now_completed and marker_id not in completed:
+            completed.append(marker_id)
+        elif not now_completed and marker_id in completed:
+            completed.remove(marker_id)
+        if now_in_progress and marker_id not in in_progress:
+            in_progress.append(marker_id)
+        elif not now_in_progress and marker_id in in_progress:
+            in_progress.remove(marker_id)
+        changes[marker_id] = event
+    return added, changes
+
+
+def build_message(progress: Dict[str, Any], user_id: Optional[str], entries: List[Entry]) -> Dict[str, Any]:
+    state = progress["sync"]
+    return {"user_id": user_id, "device": state["device"], "vector": dict(state["vector"]), "entries": entries}
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    Компактный формат: устройства вынесены в таблицу, событие — массив
+    [№ устройства, seq, lc, код события, ID маркера, время в секундах UTC]; всё сжато zlib.
+    """
+    devices: Dict[str, int] = {}
+    rows = []
+    for entry in message["entries"]:
+        device_index = devices.setdefault(entry["dev"], len(devices))
+        moment = int(parse_timestamp(entry["timestamp"]).timestamp())
+        rows.append([device_index, entry["seq"], entry["lc"], EVENT_CODES[entry["event"]], entry["marker_id"], moment])
+    payload = {"v": SYNC_FORMAT, "u": message["user_id"], "d": message["device"], "vv": message["vector"],
+               "devs": list(devices), "e": rows}
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_message(data: bytes) -> Dict[str, Any]:
+    try:
+        payload = json.loads(zlib.decompress(data).decode("utf-8"))
+        if payload.get("v") != SYNC_FORMAT:
+            raise SyncError(f"Неподдерживаемая версия протокола синхронизации: {payload.get('v')!r}")
+        devices = payload["devs"]
+        vector = {str(device): int(seq) for device, seq in payload["vv"].items()}
+        entries = []
+        for device_index, seq, lc, code, marker_id, moment in payload["e"]:
+            entries.append({
+                "marker_id": str(marker_id),
+                "event": CODE_EVENTS[code],
+                "timestamp": format_timestamp(datetime.fromtimestamp(moment, timezone.utc)),
+                "dev": str(devices[device_index]), "seq": int(seq), "lc": int(lc),
+            })
+    except SyncError:
+        raise
+    except (zlib.error, UnicodeDecodeError, json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError,
+            AttributeError, OverflowError) as e:
+        raise SyncError(f"Некорректное сообщение синхронизации: {e}")
+    return {"user_id": payload.get("u"), "device": str(payload["d"]), "vector": vector, "entries": entries}
+
+
+class LocalSyncEndpoint:
+    """Сервер синхронизации на локальной директории: для тестов, одной машины или общего сетевого диска."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.name = f"local:{root}"
+
+    def exchange(self, data: bytes) -> bytes:
+        from src.core.sessions import user_progress_path
+        from src.core.tracker import CareerTracker
+
+        request = decode_message(data)
+        user_id = request["user_id"] or "default"
+        try:
+            progress_file = user_progress_path(user_id, self.root)
+        except ValueError as e:
+            raise SyncError(str(e))
+        # Серверу каталог не нужен: он хранит и пересылает события
+        tracker = CareerTracker(progress_file=str(progress_file), user_id=user_id, markers={})
+        return encode_message(tracker.handle_sync(request))
+
+
+class HttpSyncEndpoint:
+    """Клиент удалённого сервера синхронизации: сообщение отправляется POST-запросом как есть."""
+
+    def __init__(self, url: str, timeout: float = HTTP_TIMEOUT):
+        self.url = url
+        self.name = url
+        self.timeout = timeout
+
+    def exchange(self, data: bytes) -> bytes:
+        request = urllib.request.Request(self.url, data=data, method="POST",
+                                         headers={"Content-Type": "application/octet-stream"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except (urllib.error.URLError, OSError) as e:
+            raise SyncError(f"Сервер синхронизации недоступен: {e}")
+
+
+def make_endpoint(target: str):
+    return HttpSyncEndpoint(target) if target.startswith(("http://", "https://")) else LocalSyncEndpoint(target)
+
+
+def serve(root: str, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Простой HTTP-сервер синхронизации поверх LocalSyncEndpoint."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    endpoint = LocalSyncEndpoint(root)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            try:
+                body = endpoint.exchange(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                status = 200
+            except SyncError as e:
+                body, status = str(e).encode("utf-8"), 400
+            except Exception as e:
+                # Клиент получает ответ, а не оборванное соединение (например, OSError при сохранении)
+                logger.error(f"Ошибка обработки запроса синхронизации: {e}")
+                body, status = "Внутренняя ошибка сервера синхронизации".encode("utf-8"), 500
+            self.send_response(status)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.info(f"sync {self.address_string()}: {format % args}")
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    logger.info(f"Сервер синхронизации: http://{host}:{port} ({root})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+__all__ = ['HttpSyncEndpoint', 'LocalSyncEndpoint', 'SyncError', 'changes_since', 'decode_message',
+           'encode_message', 'ensure_sync_state', 'make_endpoint', 'merge_entries', 'observe_entry', 'serve',
+           'tag_entry']
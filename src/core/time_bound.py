@@ -0,0 +1,52 @@
+"""
+Разбор поля smart_criteria.time_bound ("2-3 часа", "1 неделя") в длительность.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import re
+from datetime import timedelta
+from functools import lru_cache
+from typing import Optional
+
+_UNITS = (
+    (("мин", "minute"), timedelta(minutes=1)),
+    (("час", "hour"), timedelta(hours=1)),
+    (("дн", "ден", "день", "day"), timedelta(days=1)),
+    (("недел", "week"), timedelta(weeks=1)),
+    (("месяц", "month"), timedelta(days=30)),
+)
+
+_TIME_BOUND_RE = re.compile(r"(\d+(?:[.,]\d+)?)(?:\s*[-–—]\s*(\d+(?:[.,]\d+)?))?\s*([^\W\d_]+)")
+_BARE_UNIT_RE = re.compile(r"^\s*([^\W\d_]+)\s*$")
+
+
+def _unit_duration(word: str) -> Optional[timedelta]:
+    word = word.lower()
+    for prefixes, duration in _UNITS:
+        if word.startswith(prefixes):
+            return duration
+    return None
+
+
+@lru_cache(maxsize=1024)
+def parse_time_bound(text: Optional[str]) -> Optional[timedelta]:
+    """Возвращает длительность по верхней границе диапазона или None, если текст не распознан."""
+    if not text:
+        return None
+
+    match = _TIME_BOUND_RE.search(text)
+    if match:
+        low, high, unit = match.groups()
+        duration = _unit_duration(unit)
+        if duration is None:
+            return None
+        amount = float((high or low).replace(",", "."))
+        return duration * amount
+
+    bare = _BARE_UNIT_RE.match(text)
+    if bare:
+        return _unit_duration(bare.group(1))
+    return None
+
+
+__all__ = ['parse_time_bound']
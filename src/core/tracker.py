@@ -5,13 +5,36 @@
 """
 import json
 import logging
+import os
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from dataclasses import dataclass
 
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессная блокировка файла прогресса недоступна
+    fcntl = None
+
+from src.core.catalog_index import CatalogIndex, CatalogEntry, index_for
+from src.core.analytics import (
+    ProgressAnalytics, EVENT_COMPLETED, EVENT_IN_PROGRESS, EVENT_UNCOMPLETED, format_timestamp, utc_now
+)
+from src.core import events, sync
+from src.core.catalog_bundle import BUNDLE_SUFFIX, CatalogBundleError, open_packaged_bundle, read_catalog_bundle
+from src.core.evidence import Artifact
+from src.core.locales import get_locale
+from src.core.planner import DEFAULT_HOURS_PER_WEEK, LearningPlanner, LearnerPlan, effort_hours
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAPPED_CATALOG_SUFFIX = ".cmap"
+DEFAULT_MARKERS_DIR = "src/data/markers"
+
 @dataclass
 class Marker:
     id: str
@@ -23,6 +46,7 @@ class Marker:
     skill_name: Optional[str] = None
     methodology_author: str = "Ekaterina Kudelya"
     methodology_license: str = "CC BY-ND 4.0"
+    verification: Optional[List[Dict[str, Any]]] = None
 
 @dataclass
 class SkillData:
@@ -30,74 +54,175 @@ class SkillData:
     description: str
     levels: Dict[str, List[Marker]]
 
+def load_catalog(markers_dir: str = DEFAULT_MARKERS_DIR) -> Dict[str, SkillData]:
+    """Загружает каталог маркеров (директорию JSON, архив .zip или файл .cmap) без файла прогресса."""
+    markers_dir = Path(markers_dir)
+    if not markers_dir.exists():
+        if str(markers_dir) == DEFAULT_MARKERS_DIR:
+            # Установленный пакет запущен не из корня репозитория: берём каталог из ресурсов пакета
+            packaged = _load_packaged_catalog()
+            if packaged:
+                return packaged
+        logger.warning(f"Директория маркеров не найдена: {markers_dir}")
+        return {}
+
+    if markers_dir.is_file() and markers_dir.suffix == MAPPED_CATALOG_SUFFIX:
+        return _load_mapped_catalog(markers_dir)
+    if markers_dir.is_file() and markers_dir.suffix == BUNDLE_SUFFIX:
+        return _load_bundle(markers_dir)
+
+    markers = {}
+    try:
+        for file_path in markers_dir.glob("*.json"):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    skill_data_raw = json.load(f)
+                
+                skill_data = _parse_skill(skill_data_raw, file_path.stem)
+                markers[skill_data.skill_name] = skill_data
+                logger.info(f"Загружен навык: {skill_data.skill_name}")
+                
+            except json.JSONDecodeError as e:
+                logger.error(f"Ошибка парсинга JSON в файле {file_path}: {e}")
+            except Exception as e:
+                logger.error(f"Неожиданная ошибка при загрузке {file_path}: {e}")
+                
+    except Exception as e:
+        logger.error(f"Критическая ошибка при загрузке маркеров: {e}")
+        
+    return markers
+
+def _parse_skill(skill_data_raw: Dict[str, Any], file_stem: str) -> SkillData:
+    skill_name = skill_data_raw.get("skill_name", file_stem.capitalize())
+    return SkillData(
+        skill_name=skill_name,
+        description=skill_data_raw.get("description", ""),
+        levels=parse_skill_levels(skill_data_raw.get("levels", {}))
+    )
+
+def _load_bundle(source) -> Dict[str, SkillData]:
+    try:
+        bundle = read_catalog_bundle(source)
+    except (OSError, zipfile.BadZipFile, CatalogBundleError) as e:
+        logger.error(f"Ошибка чтения архива каталога {source}: {e}")
+        return {}
+
+    markers = {}
+    for file_name, skill_data_raw in bundle["skills"].items():
+        skill_data = _parse_skill(skill_data_raw, Path(file_name).stem)
+        markers[skill_data.skill_name] = skill_data
+    logger.info(f"Загружен архив каталога версии {bundle['version']}: {len(markers)} навыков")
+    return markers
+
+def _load_packaged_catalog() -> Dict[str, SkillData]:
+    stream = open_packaged_bundle()
+    if stream is not None:
+        return _load_bundle(stream)
+    packaged_dir = Path(__file__).resolve().parent.parent / "data" / "markers"
+    return load_catalog(str(packaged_dir)) if packaged_dir.is_dir() else {}
+
+def _load_mapped_catalog(path: Path) -> Dict[str, SkillData]:
+    from src.core.mapped_catalog import open_shared_catalog
+
+    try:
+        catalog = open_shared_catalog(str(path))
+    except (OSError, ValueError) as e:
+        logger.error(f"Ошибка открытия каталога {path}: {e}")
+        return {}
+
+    logger.info(f"Открыт общий каталог: {path} ({catalog.marker_count} маркеров)")
+    return catalog.skills()
+
+def parse_skill_levels(levels_data: Dict[str, Any]) -> Dict[str, List[Marker]]:
+    levels = {}
+    for level_key, markers_list in levels_data.items():
+        levels[level_key] = []
+        for marker_data in markers_list:
+            try:
+                marker = Marker(
+                    id=marker_data["id"],
+                    marker=marker_data["marker"],
+                    validation=marker_data.get("validation", ""),
+                    priority=marker_data.get("priority", "medium"),
+                    resources=marker_data.get("resources", []),
+                    smart_criteria=marker_data.get("smart_criteria", {}),
+                    skill_name=marker_data.get("skill_name"),
+                    methodology_author=marker_data.get("methodology_author", "Ekaterina Kudelya"),
+                    methodology_license=marker_data.get("methodology_license", "CC BY-ND 4.0"),
+                    verification=marker_data.get("verification")
+                )
+                levels[level_key].append(marker)
+            except KeyError as e:
+                logger.warning(f"Отсутствует ключ {e} в маркере: {marker_data}")
+                continue
+    return levels
+
+@contextmanager
+def progress_file_lock(progress_file) -> Iterator[None]:
+    """Межпроцессная блокировка файла прогресса (.lock рядом с ним); без fcntl — пустая."""
+    if fcntl is None:
+        yield
+        return
+    progress_file = Path(progress_file)
+    lock_path = progress_file.with_name(progress_file.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
 class CareerTracker:
-    def __init__(self, markers_dir: str = "src/data/markers", progress_file: str = "src/data/user_progress.json"):
+    def __init__(self, markers_dir: str = DEFAULT_MARKERS_DIR, progress_file: str = "src/data/user_progress.json",
+                 user_id: Optional[str] = None, similarity_index=None,
+                 markers: Optional[Dict[str, SkillData]] = None, index: Optional[CatalogIndex] = None,
+                 autosave: bool = True, event_bus: Optional["events.EventBus"] = None, locale: Optional[str] = None,
+                 ranking=None):
         self.markers_dir = Path(markers_dir)
         self.progress_file = Path(progress_file)
+        self.user_id = user_id or self.progress_file.stem
+        self.similarity_index = similarity_index
+        self.ranking = ranking
+        self.autosave = autosave
+        self.event_bus = event_bus
+        self.locale = locale
+        self.dirty = False
+        self._generation = 0
+        # Локальные изменения, ещё не записанные на диск (при autosave=False)
+        self._pending: List[Dict[str, Any]] = []
+        self._pending_evidence: List[Tuple[str, Dict[str, Any]]] = []
+        self._lock = threading.RLock()
+        self._disk_stamp = None
+        self._plan: Optional[LearnerPlan] = None
         self._markers_cache: Optional[Dict[str, SkillData]] = None
         self._all_markers_cache: Optional[Dict[str, Marker]] = None
-        self.markers = self._load_all_markers()
+        self.markers = markers if markers is not None else self._load_all_markers()
+        self.index = index if index is not None else index_for(self.markers)
+        self._disk_stamp = self._progress_stamp()
         self.progress = self._load_progress()
+        self.analytics = ProgressAnalytics(self.markers, self.progress["history"], self.index)
+        self._warn_unknown_markers()
+        
+        if self.similarity_index is not None and self.user_id not in self.similarity_index:
+            self.similarity_index.insert(self.user_id, self.progress["completed_markers"])
+        if self.ranking is not None and self.user_id not in self.ranking:
+            self.ranking.insert(self.user_id, self.progress["completed_markers"])
     
     def _load_all_markers(self) -> Dict[str, SkillData]:
-        if not self.markers_dir.exists():
-            logger.warning(f"Директория маркеров не найдена: {self.markers_dir}")
-            return {}
-        
-        markers = {}
-        try:
-            for file_path in self.markers_dir.glob("*.json"):
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        skill_data_raw = json.load(f)
-                    
-                    skill_name = skill_data_raw.get("skill_name", file_path.stem.capitalize())
-                    levels = self._parse_skill_levels(skill_data_raw.get("levels", {}))
-                    
-                    markers[skill_name] = SkillData(
-                        skill_name=skill_name,
-                        description=skill_data_raw.get("description", ""),
-                        levels=levels
-                    )
-                    logger.info(f"Загружен навык: {skill_name}")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Ошибка парсинга JSON в файле {file_path}: {e}")
-                except Exception as e:
-                    logger.error(f"Неожиданная ошибка при загрузке {file_path}: {e}")
-                    
-        except Exception as e:
-            logger.error(f"Критическая ошибка при загрузке маркеров: {e}")
-            
-        return markers
+        return load_catalog(self.markers_dir)
     
     def _parse_skill_levels(self, levels_data: Dict[str, Any]) -> Dict[str, List[Marker]]:
-        levels = {}
-        for level_key, markers_list in levels_data.items():
-            levels[level_key] = []
-            for marker_data in markers_list:
-                try:
-                    marker = Marker(
-                        id=marker_data["id"],
-                        marker=marker_data["marker"],
-                        validation=marker_data.get("validation", ""),
-                        priority=marker_data.get("priority", "medium"),
-                        resources=marker_data.get("resources", []),
-                        smart_criteria=marker_data.get("smart_criteria", {}),
-                        skill_name=marker_data.get("skill_name"),
-                        methodology_author=marker_data.get("methodology_author", "Ekaterina Kudelya"),
-                        methodology_license=marker_data.get("methodology_license", "CC BY-ND 4.0")
-                    )
-                    levels[level_key].append(marker)
-                except KeyError as e:
-                    logger.warning(f"Отсутствует ключ {e} в маркере: {marker_data}")
-                    continue
-        return levels
-    
-    def _load_progress(self) -> Dict[str, List[str]]:
+        return parse_skill_levels(levels_data)
+    
+    @staticmethod
+    def _empty_progress() -> Dict[str, List]:
+        return {"completed_markers": [], "in_progress_markers": [], "history": []}
+    
+    def _load_progress(self) -> Dict[str, List]:
         if not self.progress_file.exists():
             logger.info("Файл прогресса не найден, создаётся новый")
-            return {"completed_markers": [], "in_progress_markers": []}
+            return self._empty_progress()
         
         try:
             with open(self.progress_file, 'r', encoding='utf-8') as f:
@@ -105,7 +230,7 @@ class CareerTracker:
             
             if not isinstance(data, dict):
                 logger.warning("Некорректная структура файла прогресса")
-                return {"completed_markers": [], "in_progress_markers": []}
+                return self._empty_progress()
             
             completed = data.get("completed_markers", [])
             in_progress = data.get("in_progress_markers", [])
@@ -118,26 +243,173 @@ class CareerTracker:
                 logger.warning("Некорректные данные in_progress_markers")
                 in_progress = []
             
+            history = data.get("history", [])
+            if not isinstance(history, list) or not all(isinstance(x, dict) for x in history):
+                logger.warning("Некорректные данные history")
+                history = []
+            
             logger.info(f"Загружен прогресс: {len(completed)} выполнено, {len(in_progress)} в процессе")
-            return {"completed_markers": completed, "in_progress_markers": in_progress}
+            progress = {"completed_markers": completed, "in_progress_markers": in_progress, "history": history}
+            if isinstance(data.get("catalog_version"), str):
+                progress["catalog_version"] = data["catalog_version"]
+            sync_state = data.get("sync")
+            if isinstance(sync_state, dict) and all(key in sync_state for key in ("device", "clock", "vector", "heads")):
+                progress["sync"] = {"peers": {}, **sync_state}
+            elif sync_state is not None:
+                logger.warning("Некорректные данные sync, синхронизация начнётся заново")
+            evidence = data.get("evidence")
+            if isinstance(evidence, dict) and all(isinstance(v, list) for v in evidence.values()):
+                progress["evidence"] = evidence
+            elif evidence is not None:
+                logger.warning("Некорректные данные evidence")
+            return progress
             
         except json.JSONDecodeError as e:
             logger.error(f"Ошибка парсинга файла прогресса: {e}")
-            return {"completed_markers": [], "in_progress_markers": []}
+            return self._empty_progress()
         except Exception as e:
             logger.error(f"Неожиданная ошибка при загрузке прогресса: {e}")
-            return {"completed_markers": [], "in_progress_markers": []}
+            return self._empty_progress()
     
     def _save_progress(self) -> bool:
+        temp_path = None
         try:
             self.progress_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.progress_file, 'w', encoding='utf-8') as f:
+            # Запись во временный файл и атомарная замена: читатели никогда не видят недописанный JSON
+            fd, temp_path = tempfile.mkstemp(dir=self.progress_file.parent, prefix=f".{self.progress_file.name}.")
+            generation = self._generation
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 json.dump(self.progress, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.progress_file)
+            temp_path = None
+            self._disk_stamp = self._progress_stamp()
             logger.info("Прогресс успешно сохранён")
+            # Изменение, сделанное во время записи, в файл могло не попасть — оно остаётся отложенным
+            if self._generation == generation:
+                self.dirty = False
             return True
         except Exception as e:
             logger.error(f"Ошибка сохранения прогресса: {e}")
             return False
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
+    
+    def _progress_stamp(self):
+        try:
+            stat = self.progress_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+    
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Чтение-изменение-запись прогресса без потерянных обновлений.
+        
+        При autosave несколько процессов (CLI-скрипты, веб-воркеры) могут менять один файл: под блокировкой
+        файла перечитываем прогресс, если его изменил кто-то другой. Без autosave сессией владеет SessionManager.
+        """
+        with self._lock:
+            if not self.autosave or fcntl is None:
+                yield
+                return
+            
+            with self._file_lock():
+                self._refresh_progress()
+                yield
+    
+    def _file_lock(self):
+        return progress_file_lock(self.progress_file)
+    
+    def _refresh_progress(self) -> None:
+        stamp = self._progress_stamp()
+        if stamp is None or stamp == self._disk_stamp:
+            return
+        self._disk_stamp = stamp
+        self.progress = self._load_progress()
+        self.analytics = ProgressAnalytics(self.markers, self.progress["history"], self.index)
+        self._plan = None
+        self._reindex_completed()
+    
+    def _commit_progress(self) -> bool:
+        if self.autosave:
+            return self._save_progress()
+        self._generation += 1
+        self.dirty = True
+        return True
+    
+    def flush(self) -> bool:
+        """
+        Записывает отложенные изменения прогресса (при autosave=False).
+        
+        Под блокировкой файла локальные события накладываются на прогресс с диска, поэтому
+        изменения CLI и других процессов, записанные после загрузки сессии, не затираются.
+        """
+        with self._lock:
+            if not self.dirty:
+                return True
+            with self._file_lock():
+                self._merge_disk_progress()
+                if not self._save_progress():
+                    return False
+            self._pending.clear()
+            self._pending_evidence.clear()
+            return True
+    
+    def detach(self) -> bool:
+        """
+        Записывает отложенные изменения и переключает трекер на запись после каждого изменения.
+        
+        Вызывается при вытеснении сессии из SessionManager: запрос, ещё держащий ссылку на трекер,
+        продолжает сохранять отметки под блокировкой файла, а не в память, которую уже никто не запишет.
+        """
+        with self._lock:
+            if not self.flush():
+                return False
+            self.autosave = True
+            return True
+    
+    def _merge_disk_progress(self) -> None:
+        stamp = self._progress_stamp()
+        if stamp is None or stamp == self._disk_stamp:
+            return
+        self._disk_stamp = stamp
+        progress = self._load_progress()
+        for entry in self._pending:
+            self._replay_event(progress, entry)
+        for marker_id, item in self._pending_evidence:
+            attached = progress.setdefault("evidence", {}).setdefault(marker_id, [])
+            key = item.get("sha256") or item.get("url")
+            if all((known.get("sha256") or known.get("url")) != key for known in attached):
+                attached.append(item)
+        merged = len(progress["history"]) - len(self.progress["history"])
+        self.progress = progress
+        self.analytics = ProgressAnalytics(self.markers, self.progress["history"], self.index)
+        self._plan = None
+        self._reindex_completed()
+        logger.info(f"Прогресс {self.user_id} объединён с изменениями на диске (событий: {merged:+d})")
+    
+    @staticmethod
+    def _replay_event(progress: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        """Применяет отложенное локальное событие к прогрессу с диска; уже отражённые там пропускаются."""
+        marker_id, event = entry["marker_id"], entry["event"]
+        completed, in_progress = progress["completed_markers"], progress["in_progress_markers"]
+        if event == EVENT_COMPLETED and marker_id not in completed:
+            completed.append(marker_id)
+            if marker_id in in_progress:
+                in_progress.remove(marker_id)
+        elif event == EVENT_UNCOMPLETED and marker_id in completed:
+            completed.remove(marker_id)
+        elif event == EVENT_IN_PROGRESS and marker_id not in completed and marker_id not in in_progress:
+            in_progress.append(marker_id)
+        else:
+            return
+        # Номер события на устройстве назначается заново по состоянию синхронизации с диска
+        for key in ("dev", "seq", "lc"):
+            entry.pop(key, None)
+        sync.tag_entry(progress, entry)
+        progress["history"].append(entry)
     
     def show_progress(self) -> None:
         print("\n📊 ВАШ ПРОГРЕСС:")
@@ -150,15 +422,9 @@ class CareerTracker:
         total_completed = 0
         total_markers = 0
         
-        for skill_name, skill_data in self.markers.items():
-            completed_count = 0
-            skill_total = 0
-            
-            for level_markers in skill_data.levels.values():
-                skill_total += len(level_markers)
-                for marker in level_markers:
-                    if marker.id in self.progress["completed_markers"]:
-                        completed_count += 1
+        for skill_name in self.markers:
+            completed_count = self.count(skill=skill_name, status="completed")
+            skill_total = self.count(skill=skill_name)
             
             if skill_total == 0:
                 continue
@@ -168,7 +434,7 @@ class CareerTracker:
             
             percentage = (completed_count / skill_total) * 100
             progress_bar = self._create_progress_bar(percentage)
-            print(f"{skill_name:<20} {progress_bar} {percentage:5.1f}% ({completed_count}/{skill_total})")
+            print(f"{self.skill_title(skill_name):<20} {progress_bar} {percentage:5.1f}% ({completed_count}/{skill_total})")
         
         if total_markers > 0:
             overall_percentage = (total_completed / total_markers) * 100
@@ -179,8 +445,12 @@ class CareerTracker:
         filled_width = int((percentage / 100) * width)
         return "█" * filled_width + "░" * (width - filled_width)
     
-    def mark_completed(self, marker_id: str) -> bool:
-        marker_id = marker_id.strip()
+    def mark_completed(self, marker_id: str, evidence: Optional[List[Artifact]] = None) -> bool:
+        """Отмечает маркер выполненным; evidence — артефакты из EvidenceStore, подтверждающие выполнение."""
+        with self._transaction():
+            return self._mark_completed(marker_id.strip(), evidence)
+    
+    def _mark_completed(self, marker_id: str, evidence: Optional[List[Artifact]] = None) -> bool:
         
         if not marker_id:
             print("❌ ID маркера не может быть пустым")
@@ -188,6 +458,8 @@ class CareerTracker:
         
         if marker_id in self.progress["completed_markers"]:
             print(f"ℹ️ Маркер {marker_id} уже отмечен как выполненный")
+            if evidence and self._add_evidence(marker_id, evidence):
+                return self._commit_progress()
             return True
         
         if not self._marker_exists(marker_id):
@@ -195,35 +467,322 @@ class CareerTracker:
             return False
         
         self.progress["completed_markers"].append(marker_id)
+        if evidence:
+            self._add_evidence(marker_id, evidence)
         
         if marker_id in self.progress["in_progress_markers"]:
             self.progress["in_progress_markers"].remove(marker_id)
         
-        if self._save_progress():
+        entry = self._record_event(EVENT_COMPLETED, marker_id)
+        self._index_completion(marker_id)
+        
+        if self._commit_progress():
+            self._publish(events.COMPLETED, marker_id, entry=entry)
             print(f"✅ Маркер {marker_id} отмечен как выполненный! 🎉")
             return True
         else:
             print(f"❌ Ошибка при сохранении прогресса")
             return False
     
+    def mark_in_progress(self, marker_id: str) -> bool:
+        with self._transaction():
+            return self._mark_in_progress(marker_id.strip())
+    
+    def _mark_in_progress(self, marker_id: str) -> bool:
+        
+        if not marker_id:
+            print("❌ ID маркера не может быть пустым")
+            return False
+        
+        if marker_id in self.progress["completed_markers"]:
+            print(f"ℹ️ Маркер {marker_id} уже выполнен")
+            return False
+        
+        if marker_id in self.progress["in_progress_markers"]:
+            return True
+        
+        if not self._marker_exists(marker_id):
+            print(f"❌ Маркер {marker_id} не найден.")
+            return False
+        
+        self.progress["in_progress_markers"].append(marker_id)
+        entry = self._record_event(EVENT_IN_PROGRESS, marker_id)
+        
+        if self._commit_progress():
+            self._publish(events.IN_PROGRESS_CHANGED, marker_id, in_progress=True, entry=entry)
+            print(f"🔄 Маркер {marker_id} взят в работу")
+            return True
+        else:
+            print(f"❌ Ошибка при сохранении прогресса")
+            return False
+    
+    def mark_uncompleted(self, marker_id: str) -> bool:
+        with self._transaction():
+            return self._mark_uncompleted(marker_id.strip())
+    
+    def _mark_uncompleted(self, marker_id: str) -> bool:
+        
+        if marker_id not in self.progress["completed_markers"]:
+            print(f"ℹ️ Маркер {marker_id} не отмечен как выполненный")
+            return False
+        
+        self.progress["completed_markers"].remove(marker_id)
+        entry = self._record_event(EVENT_UNCOMPLETED, marker_id)
+        self._index_uncompletion(marker_id)
+        
+        if self._commit_progress():
+            self._publish(events.UNCOMPLETED, marker_id, entry=entry)
+            print(f"↩️ Отметка о выполнении маркера {marker_id} снята")
+            return True
+        else:
+            print(f"❌ Ошибка при сохранении прогресса")
+            return False
+    
+    def attach_evidence(self, marker_id: str, artifacts: List[Artifact]) -> bool:
+        """Прикрепляет артефакты к маркеру (повторно прикреплённые файлы и ссылки не дублируются)."""
+        with self._transaction():
+            marker_id = marker_id.strip()
+            if not self._marker_exists(marker_id):
+                print(f"❌ Маркер {marker_id} не найден.")
+                return False
+            if not self._add_evidence(marker_id, artifacts):
+                return True
+            if self._commit_progress():
+                print(f"📎 Артефактов прикреплено к {marker_id}: {len(artifacts)}")
+                return True
+            print(f"❌ Ошибка при сохранении прогресса")
+            return False
+    
+    def get_evidence(self, marker_id: str) -> List[Artifact]:
+        return [Artifact.from_dict(item) for item in self.progress.get("evidence", {}).get(marker_id, [])]
+    
+    def _add_evidence(self, marker_id: str, artifacts: List[Artifact]) -> bool:
+        attached = self.progress.setdefault("evidence", {}).setdefault(marker_id, [])
+        known = {item.get("sha256") or item.get("url") for item in attached}
+        added = False
+        for artifact in artifacts:
+            key = artifact.sha256 or artifact.url
+            if key not in known:
+                attached.append(artifact.to_dict())
+                if not self.autosave:
+                    self._pending_evidence.append((marker_id, attached[-1]))
+                known.add(key)
+                added = True
+        return added
+    
+    def set_catalog(self, markers: Dict[str, SkillData], index: Optional[CatalogIndex] = None) -> None:
+        self.markers = markers
+        self.index = index if index is not None else index_for(markers)
+        self.analytics = ProgressAnalytics(self.markers, self.progress["history"], self.index)
+        self._plan = None
+    
+    def reload_markers(self) -> None:
+        """Перечитывает каталог маркеров и уведомляет подписчиков."""
+        self.set_catalog(self._load_all_markers())
+        self._publish(events.CATALOG_RELOADED)
+    
+    def apply_change(self, change: "events.ProgressChange") -> bool:
+        """Применяет изменение из другого процесса к прогрессу в памяти без повторной записи на диск."""
+        with self._lock:
+            return self._apply_change(change)
+    
+    def _apply_change(self, change: "events.ProgressChange") -> bool:
+        if change.kind == events.CATALOG_RELOADED:
+            self.set_catalog(self._load_all_markers())
+            return True
+        
+        if change.user_id != self.user_id or not change.marker_id:
+            return False
+        
+        marker_id = change.marker_id
+        completed = self.progress["completed_markers"]
+        in_progress = self.progress["in_progress_markers"]
+        
+        if change.kind == events.COMPLETED and marker_id not in completed:
+            completed.append(marker_id)
+            if marker_id in in_progress:
+                in_progress.remove(marker_id)
+            self._record_event(EVENT_COMPLETED, marker_id, change.timestamp, mirror=change.tag or {})
+            self._index_completion(marker_id)
+        elif change.kind == events.UNCOMPLETED and marker_id in completed:
+            completed.remove(marker_id)
+            self._record_event(EVENT_UNCOMPLETED, marker_id, change.timestamp, mirror=change.tag or {})
+            self._index_uncompletion(marker_id)
+        elif change.kind == events.IN_PROGRESS_CHANGED and change.in_progress and marker_id not in in_progress:
+            in_progress.append(marker_id)
+            self._record_event(EVENT_IN_PROGRESS, marker_id, change.timestamp, mirror=change.tag or {})
+        else:
+            # Снятие «в работе» без выполнения не публикуется: для него нет события истории
+            return False
+        return True
+    
+    def _index_completion(self, marker_id: str) -> None:
+        if self.similarity_index is not None:
+            self.similarity_index.add_marker(self.user_id, marker_id)
+        if self.ranking is not None:
+            self.ranking.add_marker(self.user_id, marker_id)
+    
+    def _index_uncompletion(self, marker_id: str) -> None:
+        if self.similarity_index is not None:
+            self.similarity_index.insert(self.user_id, self.progress["completed_markers"])
+        if self.ranking is not None:
+            self.ranking.add_marker(self.user_id, marker_id, -1)
+    
+    def _reindex_completed(self) -> None:
+        if self.similarity_index is not None:
+            self.similarity_index.insert(self.user_id, self.progress["completed_markers"])
+        if self.ranking is not None:
+            self.ranking.insert(self.user_id, self.progress["completed_markers"])
+    
+    def cohort_percentile(self, skill: Optional[str] = None) -> Optional[float]:
+        """Процент учащихся когорты, выполнивших меньше маркеров (в навыке или всего); None без рейтинга."""
+        return self.ranking.percentile(self.user_id, skill) if self.ranking is not None else None
+    
+    def _publish(self, kind: str, marker_id: Optional[str] = None, in_progress: Optional[bool] = None,
+                 entry: Optional[Dict[str, Any]] = None) -> None:
+        if self.event_bus is not None:
+            tag = {key: entry[key] for key in ("dev", "seq", "lc")} if entry is not None and "dev" in entry else None
+            self.event_bus.publish(events.ProgressChange(
+                kind=kind, user_id=self.user_id, marker_id=marker_id, in_progress=in_progress, tag=tag
+            ))
+    
+    def _record_event(self, event: str, marker_id: str, timestamp: Optional[str] = None,
+                      mirror: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        # mirror — метки копии события, уже записанного другим процессом этой же реплики: в синхронизацию
+        # она не идёт, но счётчики устройства сдвигаются, чтобы следующее локальное событие не повторило seq
+        entry = {"marker_id": marker_id, "event": event, "timestamp": timestamp or format_timestamp(utc_now())}
+        if mirror is None:
+            sync.tag_entry(self.progress, entry)
+            if not self.autosave:
+                self._pending.append(entry)
+        else:
+            entry.update(mirror)
+            sync.observe_entry(self.progress, entry)
+        self.progress["history"].append(entry)
+        self.analytics.apply(entry)
+        if self._plan is not None:
+            if event == EVENT_COMPLETED:
+                self._plan.complete(marker_id)
+            elif event == EVENT_UNCOMPLETED:
+                self._plan = None
+        return entry
+    
+    def sync(self, endpoint, peer: Optional[str] = None) -> Dict[str, int]:
+        """
+        Обменивается с сервером синхронизации только событиями, которых нет у другой стороны.
+        
+        Возвращает {"sent": ..., "received": ..., "changed": ...}; SyncError при ошибке связи или протокола.
+        Блокировка файла прогресса не держится во время сетевого обмена: запрос собирается и ответ
+        применяется в отдельных транзакциях, события, записанные между ними, уйдут в следующий раз.
+        """
+        peer = peer or endpoint.name
+        with self._transaction():
+            enabled = isinstance(self.progress.get("sync"), dict)
+            state = sync.ensure_sync_state(self.progress)
+            if not enabled and not self._commit_progress():
+                # ID устройства и метки событий должны попасть на диск до отправки
+                raise sync.SyncError("Не удалось сохранить прогресс перед синхронизацией")
+            outgoing = sync.changes_since(self.progress, state["peers"].get(peer, {}))
+            payload = sync.encode_message(sync.build_message(self.progress, self.user_id, outgoing))
+        
+        response = sync.decode_message(endpoint.exchange(payload))
+        
+        with self._transaction():
+            state = sync.ensure_sync_state(self.progress)
+            added, changes = self._merge_sync_entries(response["entries"])
+            state["peers"][peer] = response["vector"]
+            if not self._commit_progress():
+                raise sync.SyncError("Не удалось сохранить прогресс после синхронизации")
+            self._publish_sync_changes(changes)
+            logger.info(f"Синхронизация с {peer}: отправлено {len(outgoing)}, получено {len(added)}, "
+                        f"изменено маркеров {len(changes)}")
+            return {"sent": len(outgoing), "received": len(added), "changed": len(changes)}
+    
+    def handle_sync(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Серверная сторона обмена: принимает события клиента и отвечает недостающими у него."""
+        with self._transaction():
+            sync.ensure_sync_state(self.progress)
+            _, changes = self._merge_sync_entries(request["entries"])
+            response = sync.build_message(self.progress, self.user_id, sync.changes_since(self.progress, request["vector"]))
+            if not self._commit_progress():
+                raise sync.SyncError("Не удалось сохранить прогресс сервера синхронизации")
+            self._publish_sync_changes(changes)
+            return response
+    
+    def _merge_sync_entries(self, entries: List[Dict[str, Any]]):
+        clock = self.progress["sync"]["clock"]
+        added, changes = sync.merge_entries(self.progress, entries)
+        if not added:
+            return added, changes
+        
+        if all(entry["lc"] > clock for entry in added):
+            for entry in sorted(added, key=lambda e: e["lc"]):
+                self.analytics.apply(entry)
+        else:
+            # Одновременные изменения: порядок событий в истории не совпадает с причинным, пересчитываем аналитику
+            self.analytics = ProgressAnalytics(self.markers, self.progress["history"], self.index)
+        if changes:
+            self._plan = None
+            self._reindex_completed()
+        return added, changes
+    
+    def _publish_sync_changes(self, changes: Dict[str, str]) -> None:
+        heads = self.progress["sync"]["heads"]
+        for marker_id, event in changes.items():
+            lc, device, seq = heads[marker_id][:3]
+            entry = {"dev": device, "seq": seq, "lc": lc}
+            if event == EVENT_COMPLETED:
+                self._publish(events.COMPLETED, marker_id, entry=entry)
+            elif event == EVENT_UNCOMPLETED:
+                self._publish(events.UNCOMPLETED, marker_id, entry=entry)
+            else:
+                self._publish(events.IN_PROGRESS_CHANGED, marker_id, in_progress=True, entry=entry)
+    
+    def learning_plan(self, hours_per_week: float = DEFAULT_HOURS_PER_WEEK) -> LearnerPlan:
+        """План оставшихся маркеров по неделям; при выполнении маркера пересчитывается только хвост плана."""
+        with self._lock:
+            if self._plan is None or self._plan.planner.hours_per_week != hours_per_week:
+                self._plan = LearningPlanner(self.markers, hours_per_week).plan(self.progress["completed_markers"])
+            return self._plan
+    
+    def localized(self, marker: Marker) -> Marker:
+        """Маркер с текстами на языке трекера (переводы загружаются при первом обращении к языку)."""
+        overlay = get_locale(self.locale)
+        return overlay.localize(marker) if overlay else marker
+    
+    def skill_title(self, skill_name: str) -> str:
+        overlay = get_locale(self.locale)
+        return overlay.skill_name(skill_name) if overlay else skill_name
+    
+    def _warn_unknown_markers(self) -> None:
+        if not self.markers:
+            return
+        unknown = [m for m in self.progress["completed_markers"] if m not in self.index]
+        if unknown:
+            logger.warning(f"В прогрессе {len(unknown)} ID, отсутствующих в каталоге (например, {unknown[0]}); "
+                           f"возможно, нужна миграция: python src/main.py catalog-diff / migrate-progress")
+    
     def _marker_exists(self, marker_id: str) -> bool:
-        for skill_data in self.markers.values():
-            for level_markers in skill_data.levels.values():
-                for marker in level_markers:
-                    if marker.id == marker_id:
-                        return True
-        return False
+        return marker_id in self.index
+    
+    def query(self, skill: Optional[str] = None, level: Optional[str] = None, priority: Optional[str] = None,
+              status: Optional[str] = None, limit: Optional[int] = None, offset: int = 0) -> Iterator[CatalogEntry]:
+        """Выборка маркеров по индексам каталога; status: completed | remaining | in_progress."""
+        return self.index.query(
+            skill=skill, level=level, priority=priority, status=status,
+            completed=self.progress["completed_markers"], in_progress=self.progress["in_progress_markers"],
+            limit=limit, offset=offset
+        )
+    
+    def count(self, skill: Optional[str] = None, level: Optional[str] = None, priority: Optional[str] = None,
+              status: Optional[str] = None) -> int:
+        return sum(1 for _ in self.query(skill=skill, level=level, priority=priority, status=status))
     
     def show_recommendations(self, limit: int = 5) -> None:
         print("\n🎯 РЕКОМЕНДАЦИИ (high priority):")
         print("-" * 50)
         
-        high_priority_markers = []
-        for skill_name, skill_data in self.markers.items():
-            for level_markers in skill_data.levels.values():
-                for marker in level_markers:
-                    if (marker.id not in self.progress["completed_markers"] and marker.priority == "high"):
-                        high_priority_markers.append((skill_name, marker))
+        high_priority_markers = [(entry.skill_name, entry.marker) for entry in self.query(priority="high", status="remaining")]
         
         if not high_priority_markers:
             print("🎉 Поздравляем! Все high-priority маркеры выполнены!")
@@ -231,7 +790,8 @@ class CareerTracker:
         
         shown_count = 0
         for skill_name, marker in high_priority_markers[:limit]:
-            print(f"• {skill_name}: {marker.marker}")
+            marker = self.localized(marker)
+            print(f"• {self.skill_title(skill_name)}: {marker.marker}")
             
             if marker.resources:
                 print(f" 📎 Ресурсы: {', '.join(marker.resources[:2])}")
@@ -241,7 +801,9 @@ class CareerTracker:
             if marker.smart_criteria:
                 time_bound = marker.smart_criteria.get("time_bound", "")
                 if time_bound:
-                    print(f" ⏰ Время выполнения: {time_bound}")
+                    hours = effort_hours(time_bound)
+                    estimate = f" (~{hours:.0f} ч)" if hours else ""
+                    print(f" ⏰ Время выполнения: {time_bound}{estimate}")
             print()
             
             shown_count += 1
@@ -257,18 +819,8 @@ class CareerTracker:
         if not skill_data:
             return None
         
-        completed = []
-        total = 0
-        
-        for level_key, level_markers in skill_data.levels.items():
-            level_total = len(level_markers)
-            level_completed = 0
-            
-            for marker in level_markers:
-                total += 1
-                if marker.id in self.progress["completed_markers"]:
-                    completed.append(marker)
-                    level_completed += 1
+        completed = [entry.marker for entry in self.query(skill=skill_name, status="completed")]
+        total = self.count(skill=skill_name)
         
         overall_percentage = (len(completed) / total * 100) if total > 0 else 0
         
@@ -281,4 +833,4 @@ class CareerTracker:
             "levels": skill_data.levels
         }
 
-__all__ = ['CareerTracker', 'Marker', 'SkillData']
+__all__ = ['CareerTracker', 'Marker', 'SkillData', 'load_catalog', 'parse_skill_levels', 'progress_file_lock']
@@ -0,0 +1,254 @@
+"""
+Валидация каталога маркеров IT Compass.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import json
+import logging
+import struct
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.core.catalog_bundle import BUNDLE_SUFFIX, CatalogBundleError, read_catalog_bundle
+from src.core.mapped_catalog import MappedCatalog
+from src.core.tracker import MAPPED_CATALOG_SUFFIX
+from src.core.verification import check_rule
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("high", "medium", "low")
+SMART_KEYS = ("specific", "measurable", "achievable", "relevant", "time_bound")
+
+# Описание полей маркера: имя -> (обязательное, правило)
+MARKER_SCHEMA: Dict[str, Tuple[bool, Any]] = {
+    "id": (True, str),
+    "marker": (True, str),
+    "validation": (False, str),
+    "priority": (False, ("enum", PRIORITIES)),
+    "resources": (False, ("list", str)),
+    "smart_criteria": (False, ("dict", SMART_KEYS)),
+    "skill_name": (False, str),
+    "methodology_author": (False, str),
+    "methodology_license": (False, str),
+    "verification": (False, ("rules", None)),
+}
+
+SKILL_SCHEMA: Dict[str, Tuple[bool, Any]] = {
+    "skill_name": (False, str),
+    "description": (False, str),
+    "levels": (True, dict),
+}
+
+Check = Callable[[Dict[str, Any]], Optional[str]]
+
+
+@dataclass
+class ValidationIssue:
+    file: str
+    message: str
+    level: Optional[str] = None
+    position: Optional[int] = None
+    marker_id: Optional[str] = None
+
+    def __str__(self) -> str:
+        location = self.file
+        if self.level is not None:
+            location += f" [уровень {self.level}"
+            if self.position is not None:
+                location += f", #{self.position + 1}"
+            location += "]"
+        if self.marker_id:
+            location += f" {self.marker_id}"
+        return f"{location}: {self.message}"
+
+
+def _type_name(value: Any) -> str:
+    return type(value).__name__
+
+
+def _compile_rule(name: str, required: bool, rule: Any) -> Check:
+    if isinstance(rule, type):
+        def check_value(value: Any) -> Optional[str]:
+            if not isinstance(value, rule):
+                return f"поле '{name}' должно быть {rule.__name__}, получено {_type_name(value)}"
+            return None
+    elif rule[0] == "enum":
+        allowed = frozenset(rule[1])
+        allowed_text = ", ".join(rule[1])
+
+        def check_value(value: Any) -> Optional[str]:
+            if value not in allowed:
+                return f"поле '{name}' имеет недопустимое значение {value!r} (допустимо: {allowed_text})"
+            return None
+    elif rule[0] == "list":
+        item_type = rule[1]
+
+        def check_value(value: Any) -> Optional[str]:
+            if not isinstance(value, list):
+                return f"поле '{name}' должно быть списком, получено {_type_name(value)}"
+            for i, item in enumerate(value):
+                if not isinstance(item, item_type):
+                    return f"элемент {i} поля '{name}' должен быть {item_type.__name__}, получено {_type_name(item)}"
+            return None
+    elif rule[0] == "dict":
+        known_keys = frozenset(rule[1])
+
+        def check_value(value: Any) -> Optional[str]:
+            if not isinstance(value, dict):
+                return f"поле '{name}' должно быть объектом, получено {_type_name(value)}"
+            unknown = sorted(set(value) - known_keys)
+            if unknown:
+                return f"поле '{name}' содержит неизвестные ключи: {', '.join(unknown)}"
+            for key, item in value.items():
+                if not isinstance(item, str):
+                    return f"'{name}.{key}' должно быть str, получено {_type_name(item)}"
+            return None
+    elif rule[0] == "rules":
+        def check_value(value: Any) -> Optional[str]:
+            if not isinstance(value, list):
+                return f"поле '{name}' должно быть списком правил, получено {_type_name(value)}"
+            for i, item in enumerate(value):
+                error = check_rule(item)
+                if error:
+                    return f"элемент {i} поля '{name}': {error}"
+            return None
+    else:
+        raise ValueError(f"Неизвестное правило схемы для поля {name}: {rule!r}")
+
+    def check(data: Dict[str, Any]) -> Optional[str]:
+        if name not in data:
+            return f"отсутствует обязательное поле '{name}'" if required else None
+        return check_value(data[name])
+
+    return check
+
+
+def compile_schema(schema: Dict[str, Tuple[bool, Any]]) -> List[Check]:
+    """Превращает описание схемы в список готовых проверок (один раз на процесс)."""
+    checks = [_compile_rule(name, required, rule) for name, (required, rule) in schema.items()]
+    known_fields = frozenset(schema)
+
+    def check_unknown_fields(data: Dict[str, Any]) -> Optional[str]:
+        unknown = data.keys() - known_fields
+        if unknown:
+            return f"неизвестные поля: {', '.join(sorted(unknown))}"
+        return None
+
+    checks.append(check_unknown_fields)
+    return checks
+
+
+def _read_mapped_skills(path: Path) -> Dict[str, Dict[str, Any]]:
+    """Навыки каталога .cmap в виде исходных JSON-объектов (пустые необязательные поля опускаются)."""
+    skills = {}
+    with MappedCatalog(str(path)) as catalog:
+        for skill_name, skill in catalog.skills().items():
+            levels = {
+                level_key: [{key: value for key, value in asdict(marker.to_marker()).items() if value is not None}
+                            for marker in level_markers]
+                for level_key, level_markers in skill.levels.items()
+            }
+            skills[skill_name] = {"skill_name": skill_name, "description": skill.description, "levels": levels}
+    return skills
+
+
+class CatalogValidator:
+    def __init__(self, markers_dir: str = "src/data/markers"):
+        self.markers_dir = Path(markers_dir)
+        self._marker_checks = compile_schema(MARKER_SCHEMA)
+        self._skill_checks = compile_schema(SKILL_SCHEMA)
+
+    def validate(self) -> List[ValidationIssue]:
+        """Проверяет все файлы каталога за один проход и возвращает все найденные ошибки."""
+        if not self.markers_dir.exists():
+            return [ValidationIssue(file=str(self.markers_dir), message="директория маркеров не найдена")]
+
+        issues: List[ValidationIssue] = []
+        id_index: Dict[str, ValidationIssue] = {}
+        if self.markers_dir.is_file():
+            if self.markers_dir.suffix == BUNDLE_SUFFIX:
+                try:
+                    skills = read_catalog_bundle(self.markers_dir)["skills"]
+                except (OSError, zipfile.BadZipFile, CatalogBundleError) as e:
+                    return [ValidationIssue(file=self.markers_dir.name, message=f"ошибка чтения архива: {e}")]
+            elif self.markers_dir.suffix == MAPPED_CATALOG_SUFFIX:
+                try:
+                    skills = _read_mapped_skills(self.markers_dir)
+                except (OSError, ValueError, IndexError, struct.error) as e:
+                    return [ValidationIssue(file=self.markers_dir.name, message=f"ошибка чтения каталога: {e}")]
+            else:
+                return [ValidationIssue(file=self.markers_dir.name,
+                                        message=f"неподдерживаемый формат каталога (нужна директория, "
+                                                f"{BUNDLE_SUFFIX} или {MAPPED_CATALOG_SUFFIX})")]
+            for file_name, skill_data in sorted(skills.items()):
+                issues.extend(self.validate_skill(file_name, skill_data, id_index))
+            return issues
+
+        for file_path in sorted(self.markers_dir.glob("*.json")):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    skill_data = json.load(f)
+            except json.JSONDecodeError as e:
+                issues.append(ValidationIssue(file=file_path.name, message=f"ошибка парсинга JSON: {e}"))
+                continue
+            except (OSError, UnicodeDecodeError) as e:
+                issues.append(ValidationIssue(file=file_path.name, message=f"ошибка чтения файла: {e}"))
+                continue
+            issues.extend(self.validate_skill(file_path.name, skill_data, id_index))
+        return issues
+
+    def validate_skill(self, file_name: str, skill_data: Any,
+                       id_index: Optional[Dict[str, ValidationIssue]] = None) -> List[ValidationIssue]:
+        if not isinstance(skill_data, dict):
+            return [ValidationIssue(file=file_name, message="корневой элемент должен быть объектом")]
+
+        issues = [
+            ValidationIssue(file=file_name, message=message)
+            for message in (check(skill_data) for check in self._skill_checks) if message
+        ]
+        levels = skill_data.get("levels")
+        if not isinstance(levels, dict):
+            return issues
+
+        id_index = {} if id_index is None else id_index
+        marker_checks = self._marker_checks
+        for level_key, markers_list in levels.items():
+            if not isinstance(markers_list, list):
+                issues.append(ValidationIssue(file=file_name, level=level_key,
+                                              message=f"уровень должен быть списком, получено {_type_name(markers_list)}"))
+                continue
+
+            for position, marker_data in enumerate(markers_list):
+                if not isinstance(marker_data, dict):
+                    issues.append(ValidationIssue(file=file_name, level=level_key, position=position,
+                                                  message="маркер должен быть объектом"))
+                    continue
+
+                marker_id = marker_data.get("id")
+                marker_id = marker_id if isinstance(marker_id, str) else None
+                for check in marker_checks:
+                    message = check(marker_data)
+                    if message:
+                        issues.append(ValidationIssue(file=file_name, level=level_key, position=position,
+                                                      marker_id=marker_id, message=message))
+
+                if marker_id is None:
+                    continue
+                location = ValidationIssue(file=file_name, level=level_key, position=position,
+                                           marker_id=marker_id, message="")
+                first = id_index.setdefault(marker_id, location)
+                if first is not location:
+                    issues.append(ValidationIssue(
+                        file=file_name, level=level_key, position=position, marker_id=marker_id,
+                        message=f"дублирующийся id, впервые объявлен в {first.file} [уровень {first.level}, #{first.position + 1}]"
+                    ))
+        return issues
+
+
+def validate_catalog(markers_dir: str = "src/data/markers") -> List[ValidationIssue]:
+    return CatalogValidator(markers_dir).validate()
+
+
+__all__ = ['CatalogValidator', 'ValidationIssue', 'compile_schema', 'validate_catalog']
@@ -0,0 +1,159 @@
+"""
+Правила автоматической проверки маркеров по локальному git-репозиторию учащегося.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import fnmatch
+import logging
+import re
+import subprocess
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Правило -> параметры и их типы (все перечисленные параметры обязательны)
+RULE_PARAMS: Dict[str, Dict[str, type]] = {
+    "file_exists": {"path": str},
+    "file_contains": {"path": str, "pattern": str},
+    "tests_present": {},
+    "ci_config": {},
+    "min_commits": {"count": int},
+}
+OPTIONAL_RULE_KEYS = ("description",)
+
+TEST_PATTERNS = ("test_*.py", "*_test.py", "tests/*", "test/*", "*.test.js", "*.test.ts", "*.spec.js",
+                 "*.spec.ts", "*_test.go", "src/test/*")
+CI_PATTERNS = (".github/workflows/*.yml", ".github/workflows/*.yaml", ".gitlab-ci.yml", "Jenkinsfile",
+               ".circleci/config.yml", "azure-pipelines.yml", ".travis.yml")
+GIT_TIMEOUT = 30
+MAX_CONTAINS_FILES = 50
+
+
+def _git(repo: str, *args: str) -> str:
+    result = subprocess.run(
+        ["git", "-C", repo, *args], capture_output=True, timeout=GIT_TIMEOUT, check=True
+    )
+    return result.stdout.decode("utf-8", errors="replace")
+
+
+def _matches(path: str, pattern: str) -> bool:
+    # Шаблон без "/" ищется в любой директории, с "/" — от корня репозитория
+    if "/" not in pattern:
+        return fnmatch.fnmatch(path.rsplit("/", 1)[-1], pattern)
+    return fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(path, f"*/{pattern}")
+
+
+class RepoSnapshot:
+    """Состояние репозитория на коммите HEAD (незакоммиченные файлы не учитываются)."""
+
+    def __init__(self, repo: str):
+        self.repo = str(repo)
+        self.head = _git(self.repo, "rev-parse", "HEAD").strip()
+        self._files: Optional[List[str]] = None
+        self._commit_count: Optional[int] = None
+
+    @property
+    def files(self) -> List[str]:
+        if self._files is None:
+            output = _git(self.repo, "ls-tree", "-r", "--name-only", "-z", "HEAD")
+            self._files = [name for name in output.split("\0") if name]
+        return self._files
+
+    @property
+    def commit_count(self) -> int:
+        if self._commit_count is None:
+            self._commit_count = int(_git(self.repo, "rev-list", "--count", "HEAD").strip())
+        return self._commit_count
+
+    def find(self, *patterns: str) -> List[str]:
+        return [path for path in self.files if any(_matches(path, pattern) for pattern in patterns)]
+
+    def read(self, path: str) -> str:
+        return _git(self.repo, "show", f"HEAD:{path}")
+
+
+RuleResult = Tuple[bool, str]
+
+
+def _file_exists(snapshot: RepoSnapshot, params: Dict[str, Any]) -> RuleResult:
+    found = snapshot.find(params["path"])
+    return (True, f"найден {found[0]}") if found else (False, f"нет файла {params['path']}")
+
+
+def _file_contains(snapshot: RepoSnapshot, params: Dict[str, Any]) -> RuleResult:
+    pattern = re.compile(params["pattern"])
+    for path in snapshot.find(params["path"])[:MAX_CONTAINS_FILES]:
+        if pattern.search(snapshot.read(path)):
+            return True, f"{path} содержит /{params['pattern']}/"
+    return False, f"нет {params['path']} с /{params['pattern']}/"
+
+
+def _tests_present(snapshot: RepoSnapshot, params: Dict[str, Any]) -> RuleResult:
+    found = snapshot.find(*TEST_PATTERNS)
+    return (True, f"тестов: {len(found)}") if found else (False, "тесты не найдены")
+
+
+def _ci_config(snapshot: RepoSnapshot, params: Dict[str, Any]) -> RuleResult:
+    found = snapshot.find(*CI_PATTERNS)
+    return (True, f"CI: {found[0]}") if found else (False, "нет конфигурации CI")
+
+
+def _min_commits(snapshot: RepoSnapshot, params: Dict[str, Any]) -> RuleResult:
+    count = snapshot.commit_count
+    return count >= params["count"], f"коммитов: {count} (нужно ≥ {params['count']})"
+
+
+RULES: Dict[str, Callable[[RepoSnapshot, Dict[str, Any]], RuleResult]] = {
+    "file_exists": _file_exists,
+    "file_contains": _file_contains,
+    "tests_present": _tests_present,
+    "ci_config": _ci_config,
+    "min_commits": _min_commits,
+}
+
+
+def check_rule(rule: Dict[str, Any]) -> Optional[str]:
+    """Ошибка в описании правила (для валидатора каталога) или None."""
+    if not isinstance(rule, dict):
+        return "правило проверки должно быть объектом"
+    name = rule.get("rule")
+    if name not in RULE_PARAMS:
+        return f"неизвестное правило проверки {name!r} (допустимо: {', '.join(RULE_PARAMS)})"
+    params = RULE_PARAMS[name]
+    unknown = sorted(set(rule) - set(params) - {"rule", *OPTIONAL_RULE_KEYS})
+    if unknown:
+        return f"правило {name} содержит неизвестные ключи: {', '.join(unknown)}"
+    for key, expected in params.items():
+        if key not in rule:
+            return f"правило {name}: отсутствует параметр '{key}'"
+        if not isinstance(rule[key], expected) or isinstance(rule[key], bool):
+            return f"правило {name}: параметр '{key}' должен быть {expected.__name__}"
+    if name == "file_contains":
+        try:
+            re.compile(rule["pattern"])
+        except re.error as e:
+            return f"правило {name}: некорректное регулярное выражение ({e})"
+    return None
+
+
+def evaluate(snapshot: RepoSnapshot, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Маркер подтверждён, если выполнены все его правила."""
+    checks = []
+    for rule in rules:
+        try:
+            passed, detail = RULES[rule["rule"]](snapshot, rule)
+        except (subprocess.SubprocessError, OSError, KeyError, re.error) as e:
+            passed, detail = False, f"ошибка проверки: {e}"
+        check = {"rule": rule["rule"], "passed": passed, "detail": detail}
+        if rule.get("description"):
+            check["description"] = rule["description"]
+        checks.append(check)
+    return {"passed": bool(checks) and all(c["passed"] for c in checks), "checks": checks}
+
+
+def is_git_repo(path: Path) -> bool:
+    return (path / ".git").exists()
+
+
+__all__ = ['RULES', 'RULE_PARAMS', 'RepoSnapshot', 'check_rule', 'evaluate', 'is_git_repo']
@@ -5,14 +5,27 @@ IT Compass — объективная карта роста в IT через в
 © 2025 Ekaterina Kudelya. CC BY-ND 4.0
 """
 import sys
+import json
+import argparse
 import logging
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
 try:
-    from src.core.tracker import CareerTracker
+    from src.core.tracker import CareerTracker, load_catalog
+    from src.core.validator import validate_catalog
+    from src.core.catalog_bundle import read_catalog_bundle, write_catalog_bundle
+    from src.core.mapped_catalog import write_mapped_catalog
+    from src.core.events import FileEventBus
+    from src.core import sync
+    from src.core.ranking import DEFAULT_RANKING_DIR, build_ranking_from_progress, load_or_build_ranking
+    from src.core.evidence import EvidenceStore
+    from src.core.sessions import user_progress_path
     from src.utils.portfolio_gen import generate_portfolio
+    from src.utils.cohort import aggregate_cohort, build_report, format_report
+    from src.utils import catalog_migration
+    from src.utils.catalog_migration import DEFAULT_RENAME_THRESHOLD
 except ImportError as e:
     print(f"❌ Ошибка импорта модулей: {e}")
     print("Убедитесь, что вы находитесь в корневой директории проекта")
@@ -28,9 +41,423 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main():
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="IT Compass — объективная карта роста в IT")
+    parser.add_argument("--user", default=None, help="ID учащегося (прогресс в src/data/users/<ID>.json, как в веб-интерфейсе)")
+    parser.add_argument("--locale", default=None, help="Язык текстов маркеров (по умолчанию ru; доступные — в src/data/locales)")
+    subparsers = parser.add_subparsers(dest="command")
+    
+    validate_parser = subparsers.add_parser("validate", help="Проверить каталог маркеров (для CI)")
+    validate_parser.add_argument("--markers-dir", default="src/data/markers")
+    
+    build_parser = subparsers.add_parser("build-catalog", help="Собрать общий mmap-каталог для веб-воркеров")
+    build_parser.add_argument("--markers-dir", default="src/data/markers")
+    build_parser.add_argument("--output", default="src/data/catalog.cmap")
+    
+    bundle_parser = subparsers.add_parser("build-bundle", help="Упаковать каталог в один архив с манифестом")
+    bundle_parser.add_argument("--markers-dir", default="src/data/markers")
+    bundle_parser.add_argument("--output", default="src/data/catalog.zip")
+    bundle_parser.add_argument("--version", dest="catalog_version", default=None,
+                               help="Версия каталога (по умолчанию — отпечаток содержимого)")
+    
+    cohort_parser = subparsers.add_parser("cohort", help="Агрегировать прогресс когорты по файлам прогресса")
+    cohort_parser.add_argument("source", help="Директория или glob-шаблон файлов прогресса")
+    cohort_parser.add_argument("--markers-dir", default="src/data/markers")
+    cohort_parser.add_argument("--workers", type=int, default=None)
+    cohort_parser.add_argument("--json", dest="json_output", default=None, help="Сохранить отчёт в JSON-файл")
+    
+    export_parser = subparsers.add_parser("export", help="Выгрузить каталог и события прогресса для BI (Parquet/CSV/JSONL)")
+    export_parser.add_argument("--progress-dir", default="src/data/users")
+    export_parser.add_argument("--markers-dir", default="src/data/markers")
+    export_parser.add_argument("--output", default="exports", help="Директория выгрузки")
+    export_parser.add_argument("--format", dest="export_format", choices=("auto", "parquet", "csv", "jsonl"), default="auto",
+                               help="auto — Parquet при установленном pyarrow, иначе CSV")
+    export_parser.add_argument("--full", action="store_true", help="Полная выгрузка вместо событий с прошлого запуска")
+    export_parser.add_argument("--workers", type=int, default=None)
+    
+    coverage_parser = subparsers.add_parser("coverage", help="Покрытие требований вакансий выполненными маркерами")
+    coverage_parser.add_argument("--corpus", default="examples/vacancies", help="Директория с вакансиями (*.txt, *.json)")
+    coverage_parser.add_argument("--markers-dir", default="src/data/markers")
+    coverage_parser.add_argument("--progress-file", default="src/data/user_progress.json")
+    
+    diff_parser = subparsers.add_parser("catalog-diff", help="Сравнить две версии каталога и построить маппинг ID")
+    diff_parser.add_argument("old", help="Прежняя версия каталога (директория JSON или .cmap)")
+    diff_parser.add_argument("new", help="Новая версия каталога")
+    diff_parser.add_argument("--output", default=None, help="Сохранить маппинг в JSON-файл")
+    diff_parser.add_argument("--threshold", type=float, default=DEFAULT_RENAME_THRESHOLD,
+                             help="Минимальная схожесть для признания маркера переименованным")
+    
+    migrate_parser = subparsers.add_parser("migrate-progress", help="Применить маппинг ID к файлам прогресса")
+    migrate_parser.add_argument("source", help="Директория или glob-шаблон файлов прогресса")
+    migrate_parser.add_argument("--mapping", required=True, help="Файл маппинга из catalog-diff")
+    migrate_parser.add_argument("--apply", action="store_true", help="Записать изменения (по умолчанию — пробный прогон)")
+    migrate_parser.add_argument("--workers", type=int, default=None)
+    
+    plan_parser = subparsers.add_parser("plan", help="Понедельный план обучения по time_bound маркеров")
+    plan_parser.add_argument("--hours", type=float, default=10.0, help="Часов на обучение в неделю")
+    plan_parser.add_argument("--weeks", type=int, default=8, help="Сколько недель показать")
+    plan_parser.add_argument("--markers-dir", default="src/data/markers")
+    plan_parser.add_argument("--progress-file", default=None, help="Файл прогресса (по умолчанию — по --user)")
+    plan_parser.add_argument("--batch", default=None, metavar="SOURCE",
+                             help="Построить планы для всех файлов прогресса (директория или glob)")
+    plan_parser.add_argument("--output", default=None, help="JSON Lines с планами для --batch")
+    
+    attach_parser = subparsers.add_parser("attach", help="Прикрепить артефакты (файлы, ссылки) к маркеру")
+    attach_parser.add_argument("marker_id")
+    attach_parser.add_argument("sources", nargs="+", help="Пути к файлам или ссылки http(s)://")
+    attach_parser.add_argument("--complete", action="store_true", help="Заодно отметить маркер выполненным")
+    
+    ranking_parser = subparsers.add_parser("ranking", help="Место учащегося в когорте (по навыкам и в целом)")
+    ranking_parser.add_argument("--progress-dir", default="src/data/users")
+    ranking_parser.add_argument("--markers-dir", default="src/data/markers")
+    ranking_parser.add_argument("--rebuild", action="store_true", help="Пересобрать сохранённый рейтинг по файлам прогресса")
+    
+    sync_parser = subparsers.add_parser("sync", help="Синхронизировать прогресс с сервером (только изменения)")
+    sync_parser.add_argument("target", help="URL сервера синхронизации или директория локального сервера")
+    sync_parser.add_argument("--progress-file", default=None, help="Файл прогресса (по умолчанию — по --user)")
+    
+    sync_server_parser = subparsers.add_parser("sync-server", help="Запустить HTTP-сервер синхронизации прогресса")
+    sync_server_parser.add_argument("root", help="Директория, где сервер хранит прогресс учащихся")
+    sync_server_parser.add_argument("--host", default="127.0.0.1")
+    sync_server_parser.add_argument("--port", type=int, default=8765)
+    
+    verify_parser = subparsers.add_parser("verify-repos", help="Проверить маркеры по локальным git-репозиториям")
+    verify_parser.add_argument("root", help="Репозиторий или директория вида <ID учащегося>/<репозиторий>")
+    verify_parser.add_argument("--markers-dir", default="src/data/markers")
+    verify_parser.add_argument("--workers", type=int, default=None)
+    verify_parser.add_argument("--apply", action="store_true", help="Отметить подтверждённые маркеры выполненными")
+    
+    load_parser = subparsers.add_parser("load-test", help="Нагрузочный тест: одновременные учащиеся на временных данных")
+    load_parser.add_argument("--learners", type=int, default=50)
+    load_parser.add_argument("--mode", choices=("threads", "processes", "mixed"), default="threads",
+                             help="mixed — веб-сессии с отложенной записью и CLI-процессы над одними файлами")
+    load_parser.add_argument("--workers", type=int, default=8, help="Число потоков или процессов")
+    load_parser.add_argument("--ops", type=int, default=40, help="Операций на одного клиента")
+    load_parser.add_argument("--writers-per-learner", type=int, default=1,
+                             help="Одновременных клиентов (вкладок, скриптов) на одного учащегося")
+    load_parser.add_argument("--markers-dir", default="src/data/markers")
+    load_parser.add_argument("--seed", type=int, default=1)
+    load_parser.add_argument("--json", dest="json_output", default=None, help="Сохранить отчёт в JSON-файл")
+    
+    return parser.parse_args(argv)
+
+def run_validate(markers_dir: str) -> int:
+    issues = validate_catalog(markers_dir)
+    for issue in issues:
+        print(f"❌ {issue}")
+    
+    if issues:
+        print(f"\nНайдено ошибок в каталоге: {len(issues)}")
+        return 1
+    
+    print(f"✅ Каталог маркеров корректен: {markers_dir}")
+    return 0
+
+def run_build_catalog(markers_dir: str, output: str) -> int:
+    markers = load_catalog(markers_dir)
+    if not markers:
+        print(f"❌ Нет маркеров для сборки каталога: {markers_dir}")
+        return 1
+    
+    path = write_mapped_catalog(markers, output)
+    print(f"✅ Общий каталог собран: {path} ({path.stat().st_size} байт)")
+    print(f"💡 Укажите его как markers_dir: CareerTracker(markers_dir=\"{path}\")")
+    return 0
+
+def run_build_bundle(markers_dir: str, output: str, version=None) -> int:
+    try:
+        path = write_catalog_bundle(markers_dir, output, version)
+        bundle = read_catalog_bundle(str(path))
+    except (OSError, ValueError) as e:
+        print(f"❌ Не удалось собрать архив каталога: {e}")
+        return 1
+    
+    print(f"✅ Архив каталога собран: {path} ({path.stat().st_size} байт, навыков: {len(bundle['skills'])})")
+    print(f"🏷️ Версия: {bundle['version']}")
+    print("💡 Укажите его как markers_dir или положите в пакет src/data — он будет найден через importlib.resources")
+    return 0
+
+def run_cohort(source: str, markers_dir: str, workers=None, json_output=None) -> int:
+    report = build_report(aggregate_cohort(source, markers_dir=markers_dir, workers=workers))
+    print("\n".join(format_report(report)))
+    
+    if json_output:
+        with open(json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Отчёт сохранён: {json_output}")
+    return 0 if report["learners"] else 1
+
+def run_export(args) -> int:
+    from src.utils.bi_export import export_all
+    
+    try:
+        report = export_all(progress_dir=args.progress_dir, markers_dir=args.markers_dir, output_dir=args.output,
+                            fmt=args.export_format, full=args.full, workers=args.workers)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    
+    kind = "инкрементальная" if report["incremental"] else "полная"
+    print(f"📦 Выгрузка ({kind}, {report['format']}) в {args.output}")
+    print(f"   Навыков: {report['skills']} • маркеров: {report['markers']}")
+    print(f"   Учащихся прочитано: {report['learners']} • без изменений: {report['unchanged']} "
+          f"• некорректных файлов: {report['invalid']}")
+    print(f"   Новых событий: {report['events']}" + (f" → {report['events_file']}" if report["events_file"] else ""))
+    return 0
+
+def run_coverage(corpus: str, markers_dir: str, progress_file: str) -> int:
+    try:
+        from src.utils.vacancy_matcher import VacancyMatcher
+    except ImportError as e:
+        print(f"❌ Для анализа вакансий нужны numpy и scipy: {e}")
+        return 1
+    
+    if not Path(corpus).exists():
+        print(f"❌ Директория с вакансиями не найдена: {corpus}")
+        return 1
+    
+    tracker = CareerTracker(markers_dir=markers_dir, progress_file=progress_file)
+    result = VacancyMatcher(tracker.markers, corpus).build().coverage(tracker.progress["completed_markers"])
+    
+    print("\n💼 ПОКРЫТИЕ РЫНОЧНЫХ ТРЕБОВАНИЙ")
+    print("-" * 50)
+    for posting in sorted(result["postings"], key=lambda p: -p["coverage"]):
+        if posting["matched"]:
+            print(f"{posting['title']:<35} {posting['coverage']:5.1f}% ({posting['covered']}/{posting['matched']})")
+    print(f"\n📊 Покрытие по корпусу: {result['overall']:.1f}% • в среднем по вакансии: {result['average_posting']:.1f}%")
+    
+    if result["top_missing"]:
+        print("\n🎯 Чаще всего требуются, но ещё не выполнены:")
+        for marker_id, count in result["top_missing"]:
+            print(f"• {marker_id}: {count} требований")
+    return 0
+
+def run_catalog_diff(old: str, new: str, output=None, threshold: float = DEFAULT_RENAME_THRESHOLD) -> int:
+    old_markers, new_markers = load_catalog(old), load_catalog(new)
+    if not old_markers or not new_markers:
+        print(f"❌ Не удалось загрузить каталоги: {old}, {new}")
+        return 1
+    
+    mapping = catalog_migration.diff_catalogs(old_markers, new_markers, threshold=threshold)
+    print("\n".join(catalog_migration.format_diff(mapping)))
+    
+    if output:
+        catalog_migration.save_mapping(mapping, output)
+        print(f"\n💾 Маппинг сохранён: {output}")
+        print(f"💡 Проверьте его и запустите: python src/main.py migrate-progress <файлы> --mapping {output}")
+    return 0
+
+def run_migrate_progress(source: str, mapping_file: str, apply: bool = False, workers=None) -> int:
     try:
-        app = ITCompassApp()
+        mapping = catalog_migration.load_mapping(mapping_file)
+    except (OSError, ValueError) as e:
+        print(f"❌ Ошибка чтения маппинга: {e}")
+        return 1
+    
+    report = catalog_migration.migrate_progress(source, mapping, dry_run=not apply, workers=workers)
+    print("\n".join(catalog_migration.format_report(report)))
+    if not apply and report["changed_files"]:
+        print("\n💡 Для записи изменений добавьте --apply")
+    return 0 if not report["invalid_files"] else 1
+
+def run_plan(args) -> int:
+    if args.batch:
+        return run_plan_batch(args)
+    
+    progress_file = args.progress_file or progress_file_for(args.user)
+    tracker = CareerTracker(markers_dir=args.markers_dir, progress_file=progress_file, user_id=args.user)
+    plan = tracker.learning_plan(args.hours)
+    
+    print(f"\n🗓️ ПЛАН ОБУЧЕНИЯ ({args.hours:g} ч в неделю)")
+    print("-" * 50)
+    for week in plan.weeks[:args.weeks]:
+        print(f"Неделя {week.index + 1} ({week.start:%d.%m}) — {week.hours:g} ч")
+        for item in week.items:
+            suffix = " (продолжение)" if item.continued else ""
+            print(f"  • {item.marker_id} [{item.skill_name}, уровень {item.level}] {item.hours:g} ч{suffix}")
+    if len(plan.weeks) > args.weeks:
+        print(f"... ещё {len(plan.weeks) - args.weeks} недель")
+    print(f"\n⏰ Всего: {plan.total_hours:g} ч • {len(plan.weeks)} недель")
+    return 0
+
+def run_plan_batch(args) -> int:
+    from src.core.planner import LearningPlanner
+    from src.utils.cohort import iter_progress_files, read_progress
+    
+    planner = LearningPlanner(load_catalog(args.markers_dir), args.hours)
+    
+    def learners():
+        for path in iter_progress_files(args.batch):
+            completed, _, error = read_progress(path)
+            if error:
+                logger.warning(f"Пропущен файл прогресса {path}: {error}")
+                continue
+            yield Path(path).stem, completed
+    
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    count, weeks_total = 0, 0
+    try:
+        for user_id, plan in planner.plan_many(learners()):
+            count += 1
+            weeks_total += len(plan.weeks)
+            if output:
+                output.write(json.dumps({"user_id": user_id, **plan.to_dict()}, ensure_ascii=False) + "\n")
+    finally:
+        if output:
+            output.close()
+    
+    if not count:
+        print(f"❌ Файлы прогресса не найдены: {args.batch}")
+        return 1
+    print(f"✅ Планы построены: {count} учащихся • в среднем {weeks_total / count:.1f} недель до конца каталога")
+    if args.output:
+        print(f"💾 Планы сохранены: {args.output}")
+    return 0
+
+def progress_file_for(user_id=None) -> str:
+    return str(user_progress_path(user_id)) if user_id else "src/data/user_progress.json"
+
+def run_attach(args) -> int:
+    store = EvidenceStore()
+    try:
+        artifacts = [store.add(source) for source in args.sources]
+    except (OSError, ValueError) as e:
+        print(f"❌ Не удалось сохранить артефакт: {e}")
+        return 1
+    
+    tracker = CareerTracker(progress_file=progress_file_for(args.user), user_id=args.user, event_bus=FileEventBus())
+    if args.complete:
+        ok = tracker.mark_completed(args.marker_id, evidence=artifacts)
+    else:
+        ok = tracker.attach_evidence(args.marker_id, artifacts)
+    for artifact in artifacts:
+        print(f"📎 {artifact.name}: {artifact.url or 'sha256:' + artifact.sha256[:12]}")
+    return 0 if ok else 1
+
+def run_ranking(args) -> int:
+    markers = load_catalog(args.markers_dir)
+    if args.rebuild:
+        ranking = build_ranking_from_progress(args.progress_dir, markers)
+        ranking.save(DEFAULT_RANKING_DIR)
+    else:
+        ranking = load_or_build_ranking(markers, args.progress_dir)
+    
+    print(f"🏅 Учащихся в когорте: {len(ranking)}")
+    if not args.user:
+        print("💡 Укажите --user, чтобы увидеть место учащегося")
+        return 0
+    if args.user not in ranking:
+        print(f"❌ Учащийся {args.user} не найден в {args.progress_dir}")
+        return 1
+    
+    def line(title, skill=None):
+        rank = ranking.rank(args.user, skill)
+        return (f"{title:<20} впереди {ranking.percentile(args.user, skill):5.1f}% когорты "
+                f"(выполнено {ranking.completed_count(args.user, skill)}, опережают: {rank['behind']})")
+    
+    print(line("Всего"))
+    for skill_name in markers:
+        print(line(skill_name, skill_name))
+    return 0
+
+def run_sync(args) -> int:
+    progress_file = args.progress_file or progress_file_for(args.user)
+    tracker = CareerTracker(progress_file=progress_file, user_id=args.user, event_bus=FileEventBus())
+    try:
+        result = tracker.sync(sync.make_endpoint(args.target))
+    except sync.SyncError as e:
+        print(f"❌ Ошибка синхронизации: {e}")
+        return 1
+    
+    print(f"🔄 Синхронизировано с {args.target}: отправлено событий {result['sent']}, "
+          f"получено {result['received']}, изменено маркеров {result['changed']}")
+    return 0
+
+def run_verify_repos(args) -> int:
+    from src.utils import repo_verifier
+    
+    if not Path(args.root).is_dir():
+        print(f"❌ Директория не найдена: {args.root}")
+        return 1
+    
+    repos = list(repo_verifier.discover_repos(args.root, args.user))
+    if not repos:
+        print(f"❌ Git-репозитории не найдены: {args.root}")
+        return 1
+    
+    markers = load_catalog(args.markers_dir)
+    report = repo_verifier.verify_repos(repos, markers, workers=args.workers, cache=repo_verifier.VerificationCache())
+    
+    trackers = {}
+    for user_id in {user_id for user_id, _ in repos}:
+        try:
+            trackers[user_id] = CareerTracker(markers_dir=args.markers_dir, progress_file=progress_file_for(user_id),
+                                              user_id=user_id, markers=markers, event_bus=FileEventBus())
+        except ValueError as e:
+            logger.warning(f"Пропущен учащийся: {e}")
+    
+    completed = {user_id: tracker.progress["completed_markers"] for user_id, tracker in trackers.items()}
+    proposals = {user_id: found for user_id, found in repo_verifier.propose_completions(report, completed).items()
+                 if user_id in trackers}
+    print("\n".join(repo_verifier.format_report(report, proposals)))
+    
+    if args.apply:
+        for user_id, found in proposals.items():
+            for marker_id in found:
+                trackers[user_id].mark_completed(marker_id)
+    elif proposals:
+        print("\n💡 Для отметки маркеров добавьте --apply")
+    return 0
+
+def run_load_test(args) -> int:
+    from src.utils.load_test import run_load_test as run, format_report as format_load_report
+    
+    report = run(learners=args.learners, mode=args.mode, workers=args.workers, ops_per_learner=args.ops,
+                 writers_per_learner=args.writers_per_learner, markers_dir=args.markers_dir, seed=args.seed)
+    print("\n".join(format_load_report(report)))
+    
+    if args.json_output:
+        with open(args.json_output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Отчёт сохранён: {args.json_output}")
+    return 0 if report["ok"] else 1
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "validate":
+        sys.exit(run_validate(args.markers_dir))
+    if args.command == "build-catalog":
+        sys.exit(run_build_catalog(args.markers_dir, args.output))
+    if args.command == "build-bundle":
+        sys.exit(run_build_bundle(args.markers_dir, args.output, args.catalog_version))
+    if args.command == "cohort":
+        sys.exit(run_cohort(args.source, args.markers_dir, args.workers, args.json_output))
+    if args.command == "export":
+        sys.exit(run_export(args))
+    if args.command == "coverage":
+        sys.exit(run_coverage(args.corpus, args.markers_dir, args.progress_file))
+    if args.command == "catalog-diff":
+        sys.exit(run_catalog_diff(args.old, args.new, args.output, args.threshold))
+    if args.command == "migrate-progress":
+        sys.exit(run_migrate_progress(args.source, args.mapping, args.apply, args.workers))
+    if args.command == "plan":
+        sys.exit(run_plan(args))
+    if args.command == "attach":
+        sys.exit(run_attach(args))
+    if args.command == "ranking":
+        sys.exit(run_ranking(args))
+    if args.command == "sync":
+        sys.exit(run_sync(args))
+    if args.command == "sync-server":
+        sync.serve(args.root, args.host, args.port)
+        sys.exit(0)
+    if args.command == "verify-repos":
+        sys.exit(run_verify_repos(args))
+    if args.command == "load-test":
+        sys.exit(run_load_test(args))
+    
+    try:
+        app = ITCompassApp(user_id=args.user, locale=args.locale)
         app.run()
     except KeyboardInterrupt:
         print("\n\n👋 До свидания!")
@@ -41,13 +468,18 @@ def main():
         sys.exit(1)
 
 class ITCompassApp:
-    def __init__(self):
+    def __init__(self, user_id=None, locale=None):
+        self.user_id = user_id
+        self.locale = locale
         self.tracker = None
         self.running = True
     
     def initialize(self):
         try:
-            self.tracker = CareerTracker()
+            progress_file = progress_file_for(self.user_id)
+            # Изменения публикуются в общий журнал событий, чтобы веб-интерфейс обновился без перезагрузки
+            self.tracker = CareerTracker(progress_file=progress_file, user_id=self.user_id, event_bus=FileEventBus(),
+                                         locale=self.locale)
             logger.info("IT Compass успешно инициализирован")
             return True
         except Exception as e:
@@ -139,19 +571,22 @@ class ITCompassApp:
             print("❌ Отмена операции")
             return
         
-        success = self.tracker.mark_completed(marker_id)
+        print("Путь к артефакту или ссылка на результат (Enter — пропустить)")
+        source = input("Артефакт: ").strip()
+        evidence = []
+        if source:
+            try:
+                evidence.append(EvidenceStore().add(source))
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Артефакт не сохранён: {e}")
+        
+        success = self.tracker.mark_completed(marker_id, evidence=evidence)
         if success:
             self._show_motivation_message()
     
     def _get_available_markers(self) -> list:
-        available = []
-        completed = set(self.tracker.progress["completed_markers"])
-        for skill_data in self.tracker.markers.values():
-            for level_markers in skill_data.levels.values():
-                for marker in level_markers:
-                    if marker.id not in completed:
-                        available.append((marker.id, marker.marker))
-        return available
+        return [(entry.marker.id, self.tracker.localized(entry.marker).marker)
+                for entry in self.tracker.query(status="remaining")]
     
     def _show_motivation_message(self):
         import random
@@ -176,7 +611,7 @@ class ITCompassApp:
         print("\n📄 ГЕНЕРАЦИЯ ПОРТФОЛИО")
         print("-" * 30)
         try:
-            success = generate_portfolio()
+            success = generate_portfolio(progress_file=str(self.tracker.progress_file), locale=self.locale)
             if success:
                 print("✅ Портфолио успешно создано: docs/my_portfolio.md")
                 print("💡 Используйте его для откликов на вакансии!")
@@ -207,6 +642,14 @@ class ITCompassApp:
                 
                 print(f"\n{skill_name}:")
                 print(f" Прогресс: {percentage:.1f}% ({completed}/{total})")
+
+                velocity = self.tracker.analytics.skill_velocity(skill_name)
+                if velocity > 0:
+                    print(f" Темп: {velocity:.1f} маркеров/нед. (за 4 недели)")
+
+                eta = self.tracker.analytics.eta(skill_name, completed=self.tracker.progress["completed_markers"])
+                if eta and eta["remaining_count"] and eta["nominal"]:
+                    print(f" Прогноз завершения: {eta['eta'].astimezone():%d.%m.%Y}")
         
         if total_markers > 0:
             overall = (total_completed / total_markers) * 100
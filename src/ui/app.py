@@ -4,6 +4,7 @@ IT Compass - Streamlit Web Interface for Dashboard Visualization
 Методология: © 2025 Ekaterina Kudelya, CC BY-ND 4.0
 """
 
+import atexit
 import streamlit as st
 from pathlib import Path
 import sys
@@ -12,13 +13,26 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 try:
-    from src.core.tracker import CareerTracker
-    from src.utils.portfolio_gen import generate_portfolio
+    from src.core.sessions import SessionManager
+    from src.core.ranking import load_or_build_ranking
+    from src.core.events import FileEventBus
+    from src.core.evidence import EvidenceStore
+    from src.core.locales import BASE_LOCALE, available_locales, get_locale
+    from src.utils.portfolio_jobs import DONE, FAILED, PENDING_STATUSES, QUEUED, PortfolioJobQueue, portfolio_path
 except ImportError as e:
     st.error(f"❌ Ошибка импорта модулей: {e}")
     st.error("Убедитесь, что вы находитесь в корневой директории проекта")
     st.stop()
 
+try:
+    from src.utils.vacancy_matcher import VacancyMatcher
+except ImportError:
+    # numpy/scipy не установлены — анализ вакансий недоступен
+    VacancyMatcher = None
+
+VACANCIES_DIR = "examples/vacancies"
+DEFAULT_USER_ID = "default"
+
 # --- Конфигурация Страницы ---
 st.set_page_config(
     page_title="IT Compass Dashboard",
@@ -29,15 +43,66 @@ st.set_page_config(
 
 # --- Инициализация Трекера ---
 @st.cache_resource
-def get_tracker():
-    """Кэшируем трекер для производительности."""
+def get_event_bus():
+    """Журнал событий прогресса: изменения из CLI и других процессов применяются к сессиям в фоне."""
+    bus = FileEventBus()
+    bus.start(interval=1.0)
+    return bus
+
+@st.cache_resource
+def get_session_manager():
+    """Общий каталог и LRU-кэш сессий пользователей на весь процесс."""
     try:
-        return CareerTracker()
+        manager = SessionManager(event_bus=get_event_bus())
+        # Рейтинг когорты: сохранённый, если файлы прогресса не менялись, иначе пересборка
+        manager.ranking = load_or_build_ranking(manager.markers, str(manager.progress_dir))
+        # Отложенные изменения сессий, не вытесненных из кэша, записываются при остановке сервера
+        atexit.register(manager.close)
+        return manager
     except Exception as e:
-        st.error(f"❌ Не удалось инициализировать CareerTracker: {e}")
+        st.error(f"❌ Не удалось инициализировать менеджер сессий: {e}")
         st.error("Проверьте наличие файлов маркеров в src/data/markers/")
         return None
 
+@st.cache_resource
+def get_portfolio_queue():
+    """Фоновый пул генерации портфолио: запросы не блокируют отрисовку страниц."""
+    return PortfolioJobQueue(markers_dir=str(get_session_manager().markers_dir)).start()
+
+def view_overlay():
+    """Переводы языка этой вкладки: трекер общий для всех вкладок пользователя, язык — нет."""
+    return get_locale(st.session_state.locale)
+
+def skill_title(skill_name):
+    overlay = view_overlay()
+    return overlay.skill_name(skill_name) if overlay else skill_name
+
+def localized(marker):
+    overlay = view_overlay()
+    return overlay.localize(marker) if overlay else marker
+
+def get_tracker():
+    """Трекер текущего пользователя из кэша сессий."""
+    manager = get_session_manager()
+    if manager is None:
+        return None
+    try:
+        return manager.get(st.session_state.user_id)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None
+
+@st.cache_resource
+def get_vacancy_matcher():
+    """Модель вакансий строится один раз и кэшируется на диске между запусками."""
+    if VacancyMatcher is None or not Path(VACANCIES_DIR).exists():
+        return None
+    try:
+        return VacancyMatcher(get_session_manager().markers, VACANCIES_DIR).build()
+    except Exception as e:
+        st.warning(f"⚠️ Не удалось построить модель вакансий: {e}")
+        return None
+
 def render_progress_dashboard():
     """Отображает прогресс в виде дашборда."""
     st.header("🧭 Ваш Карьерный Прогресс: Объективные Маркеры")
@@ -49,22 +114,22 @@ def render_progress_dashboard():
     st.markdown("---")
     
     # Общий прогресс
-    total_completed = len(tracker.progress.get("completed_markers", []))
-    total_markers = sum(
-        len(marker) for skill_data in tracker.markers.values()
-        for level_markers in skill_data.levels.values()
-        for marker in level_markers
-    )
+    total_completed = tracker.count(status="completed")
+    total_markers = len(tracker.index)
     
     if total_markers > 0:
         overall_percentage = (total_completed / total_markers) * 100
-        col1, col2, col3 = st.columns(3)
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
             st.metric("✅ Выполнено", f"{total_completed}")
         with col2:
             st.metric("🎯 Всего маркеров", f"{total_markers}")
         with col3:
             st.metric("📊 Общий прогресс", f"{overall_percentage:.1f}%")
+        with col4:
+            ahead = tracker.cohort_percentile()
+            if ahead is not None and len(tracker.ranking) > 1:
+                st.metric("🏅 Впереди когорты", f"{ahead:.0f}%", help=f"Учащихся в когорте: {len(tracker.ranking)}")
     
     st.markdown("---")
     
@@ -77,24 +142,19 @@ def render_progress_dashboard():
         cols = st.columns(len(skills))
         
         for i, skill_name in enumerate(skills):
-            skill_data = tracker.markers[skill_name]
-            completed = 0
-            total = 0
-            
-            for level_markers in skill_data.levels.values():
-                total += len(level_markers)
-                for marker in level_markers:
-                    if marker.id in tracker.progress["completed_markers"]:
-                        completed += 1
+            completed = tracker.count(skill=skill_name, status="completed")
+            total = tracker.count(skill=skill_name)
             
             with cols[i]:
                 if total > 0:
                     percentage = (completed / total) * 100
-                    st.markdown(f"**{skill_name}**")
+                    st.markdown(f"**{skill_title(skill_name)}**")
                     st.progress(percentage / 100)
-                    st.caption(f"{percentage:.0f}% ({completed}/{total})")
+                    ahead = tracker.cohort_percentile(skill_name)
+                    cohort = f" • впереди {ahead:.0f}% когорты" if ahead is not None and len(tracker.ranking) > 1 else ""
+                    st.caption(f"{percentage:.0f}% ({completed}/{total}){cohort}")
                 else:
-                    st.info(f"**{skill_name}**\n\n(нет маркеров)")
+                    st.info(f"**{skill_title(skill_name)}**\n\n(нет маркеров)")
     
     st.markdown("---")
     
@@ -106,31 +166,75 @@ def render_progress_dashboard():
     with col1:
         if st.button("📄 Сгенерировать портфолио", use_container_width=True):
             try:
-                success = generate_portfolio()
-                if success:
-                    st.balloons()
-                    st.success("✅ Портфолио обновлено! Файл: `docs/my_portfolio.md`")
-                else:
-                    st.error("❌ Не удалось создать портфолио")
-            except Exception as e:
+                tracker.flush()
+                job = get_portfolio_queue().submit(st.session_state.user_id, str(tracker.progress_file),
+                                                  st.session_state.locale)
+                st.session_state.portfolio_job = job["id"]
+            except (OSError, RuntimeError, ValueError) as e:
                 st.error(f"❌ Ошибка: {e}")
+        render_portfolio_job()
     
     with col2:
         if st.button("🎯 Показать рекомендации", use_container_width=True):
             st.info("Рекомендации по развитию (high priority):")
-            high_priority = []
-            for skill_name, skill_data in tracker.markers.items():
-                for level_markers in skill_data.levels.values():
-                    for marker in level_markers:
-                        if (marker.id not in tracker.progress["completed_markers"] 
-                            and marker.priority == "high"):
-                            high_priority.append((skill_name, marker))
+            high_priority = list(tracker.query(priority="high", status="remaining", limit=5))
             
             if high_priority:
-                for skill_name, marker in high_priority[:5]:  # Показываем первые 5
-                    st.markdown(f"• **{skill_name}**: {marker.marker}")
+                for skill_name, _, marker in high_priority:
+                    st.markdown(f"• **{skill_title(skill_name)}**: {localized(marker).marker}")
             else:
                 st.success("🎉 Все high-priority маркеры выполнены!")
+    
+    render_evidence_form()
+
+def _polling(func):
+    """Периодический перезапуск фрагмента страницы (если версия Streamlit поддерживает фрагменты)."""
+    fragment = getattr(st, "fragment", None)
+    return fragment(run_every=2)(func) if fragment else func
+
+@_polling
+def render_portfolio_job():
+    """Статус фоновой генерации портфолио текущего пользователя."""
+    job_id = st.session_state.get("portfolio_job")
+    if not job_id:
+        return
+    job = get_portfolio_queue().status(job_id)
+    if job is None:
+        return
+    if job["status"] in PENDING_STATUSES:
+        st.info("🕒 Портфолио в очереди на генерацию" if job["status"] == QUEUED else "⏳ Портфолио формируется в фоне...")
+        if not hasattr(st, "fragment") and st.button("🔄 Проверить статус", key="portfolio_poll"):
+            st.rerun()
+    elif job["status"] == DONE:
+        st.success(f"✅ Портфолио обновлено! Файл: `{job['output_file']}`")
+    elif job["status"] == FAILED:
+        st.error(f"❌ Не удалось создать портфолио: {job['error']}")
+
+def render_evidence_form():
+    """Отметка маркера с артефактом: файл сохраняется в хранилище потоково, ссылка — как есть."""
+    with st.expander("📎 Подтвердить маркер артефактом"):
+        options = [entry.marker.id for entry in tracker.query()]
+        marker_id = st.selectbox("Маркер", options, key="evidence_marker")
+        uploaded = st.file_uploader("Файл (код, скриншот, лог)", key="evidence_file")
+        link = st.text_input("Или ссылка (деплой, репозиторий)", key="evidence_link")
+        
+        if st.button("✅ Отметить выполненным", use_container_width=True):
+            store = EvidenceStore()
+            try:
+                evidence = []
+                if uploaded is not None:
+                    evidence.append(store.put_stream(uploaded, uploaded.name, uploaded.type))
+                if link.strip():
+                    evidence.append(store.add_link(link.strip()))
+            except (OSError, ValueError) as e:
+                st.error(f"❌ Артефакт не сохранён: {e}")
+                return
+            
+            if tracker.mark_completed(marker_id, evidence=evidence):
+                get_session_manager().touch(st.session_state.user_id)
+                st.success(f"✅ Маркер {marker_id} выполнен, артефактов: {len(tracker.get_evidence(marker_id))}")
+            else:
+                st.error(f"❌ Не удалось отметить маркер {marker_id}")
 
 def render_documentation():
     """Отображает документацию проекта."""
@@ -164,7 +268,7 @@ def render_documentation():
         
         if st.button("📋 Посмотреть портфолио", use_container_width=True):
             try:
-                with open("docs/my_portfolio.md", "r", encoding="utf-8") as f:
+                with open(portfolio_path(st.session_state.user_id, st.session_state.locale), "r", encoding="utf-8") as f:
                     st.markdown(f.read())
             except:
                 st.warning("Портфолио ещё не сгенерировано")
@@ -184,7 +288,24 @@ def render_strategy():
     
     with tab1:
         st.subheader("Питч для собеседования")
-        st.code("""
+        
+        coverage_text = "X%"
+        matcher = get_vacancy_matcher()
+        if matcher is not None:
+            coverage = matcher.coverage(tracker.progress["completed_markers"])
+            coverage_text = f"{coverage['overall']:.0f}%"
+            relevant = [p for p in coverage["postings"] if p["matched"]]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("💼 Покрытие рыночных требований", coverage_text)
+            with col2:
+                st.metric("📋 Вакансий в анализе", f"{len(relevant)}")
+            if coverage["top_missing"]:
+                st.caption("Чаще всего требуются: " + ", ".join(m for m, _ in coverage["top_missing"]))
+        else:
+            st.caption(f"Добавьте вакансии (*.txt, *.json) в {VACANCIES_DIR}, чтобы рассчитать покрытие.")
+        
+        st.code(f"""
 «Я разработала IT Compass — систему объективной оценки навыков 
 на основе верифицируемых артефактов. 
 
@@ -192,7 +313,7 @@ def render_strategy():
 я показываю конкретные маркеры: "написал скрипт, собрал в Docker, 
 выложил на GitHub".
 
-Вот моё портфолио, подтверждающее X% покрытия рыночных требований 
+Вот моё портфолио, подтверждающее {coverage_text} покрытия рыночных требований 
 по ключевым направлениям: Python, Docker, MLOps, DevOps...»
         """, language="markdown")
         
@@ -261,6 +382,8 @@ def main():
     """Главная функция приложения."""
     st.sidebar.title("🧭 IT Compass")
     st.sidebar.markdown("Объективная карта IT-роста")
+    st.sidebar.text_input("👤 ID учащегося", key="user_id")
+    st.sidebar.selectbox("🌐 Язык маркеров", available_locales(), key="locale")
     st.sidebar.markdown("---")
     
     # Навигация
@@ -282,8 +405,12 @@ def main():
     st.sidebar.markdown("### ⚡ Быстрые действия")
     
     if st.sidebar.button("🔄 Обновить данные", use_container_width=True):
+        get_event_bus().poll()
         st.rerun()
     
+    stats = get_session_manager().stats()
+    st.sidebar.caption(f"Сессий в памяти: {stats['sessions']} • попаданий в кэш: {stats['hit_rate']:.0%}")
+    
     # Отображение выбранной страницы
     if menu_option == "📊 Прогресс":
         render_progress_dashboard()
@@ -293,10 +420,12 @@ def main():
         render_strategy()
 
 # Инициализация трекера
+st.session_state.setdefault("user_id", DEFAULT_USER_ID)
+st.session_state.setdefault("locale", BASE_LOCALE)
+get_event_bus().poll()
 tracker = get_tracker()
 if tracker is None:
     st.stop()
 
 if __name__ == "__main__":
     main()
-```
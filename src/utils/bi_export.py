@@ -0,0 +1,355 @@
+"""
+Выгрузка каталога и событий прогресса для BI в колоночном сжатом формате.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Таблицы в <output_dir>:
+    skills.<ext>              навыки каталога (перезаписывается при каждой выгрузке)
+    markers.<ext>             маркеры: навык, уровень, приоритет, тексты
+    events/part-*.<ext>       события истории учащихся; каждая выгрузка добавляет новую часть
+
+Формат — Parquet (если установлен pyarrow), иначе CSV или JSON Lines в gzip. Строки пишутся
+группами по row_group_size, файлы прогресса читаются пачками в пуле процессов с ограниченным
+числом пачек в работе, поэтому память не зависит от размера когорты.
+
+Инкрементальная выгрузка: в export_state.json хранится, сколько событий истории каждого
+файла прогресса (по пути относительно каталога прогресса) уже выгружено, и время начала прошлой
+выгрузки — файлы, не менявшиеся с тех пор, даже не читаются. История только дополняется, поэтому
+новые события — это её хвост. Там же перечислены опубликованные части событий: часть, которой нет
+в состоянии, осталась от прерванной выгрузки и удаляется перед следующей.
+"""
+import csv
+import gzip
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from src.core.analytics import EVENT_COMPLETED, EVENT_IN_PROGRESS, EVENT_UNCOMPLETED, format_timestamp, utc_now
+from src.core.tracker import load_catalog
+from src.utils.cohort import batched, iter_progress_files
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow не установлен — доступны только CSV и JSON Lines
+    pa = pq = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_DIR = "exports"
+STATE_FILE = "export_state.json"
+EVENTS_TABLE = "events"
+ROW_GROUP_SIZE = 50_000
+MTIME_SLACK = 2.0  # грубое время изменения файлов на некоторых ФС: лишнее чтение безопасно, пропуск — нет
+FORMATS = ("parquet", "csv", "jsonl")
+EXPORT_EVENTS = (EVENT_COMPLETED, EVENT_IN_PROGRESS, EVENT_UNCOMPLETED)
+
+Column = Tuple[str, str]  # (имя, тип: "str" или "int")
+
+SKILL_COLUMNS: Sequence[Column] = (("skill_name", "str"), ("description", "str"), ("markers", "int"))
+MARKER_COLUMNS: Sequence[Column] = (
+    ("marker_id", "str"), ("skill_name", "str"), ("level", "str"), ("priority", "str"),
+    ("marker", "str"), ("validation", "str"),
+)
+EVENT_COLUMNS: Sequence[Column] = (
+    ("user_id", "str"), ("seq", "int"), ("marker_id", "str"), ("skill_name", "str"),
+    ("event", "str"), ("timestamp", "str"), ("device", "str"),
+)
+
+# Соответствие маркер -> навык загружается один раз на процесс-воркер
+_marker_skill: Dict[str, str] = {}
+
+
+class TableWriter(ABC):
+    """Потоковая запись таблицы группами строк во временный файл; close() публикует его атомарно."""
+
+    suffix = ""
+
+    def __init__(self, path: Path, columns: Sequence[Column], row_group_size: int = ROW_GROUP_SIZE):
+        self.path = path
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._tmp_file = path.with_name(f".{path.name}.tmp")
+        self._buffer: List[Tuple] = []
+        self._opened = False
+
+    def write(self, rows: Sequence[Tuple]) -> None:
+        for row in rows:
+            self._buffer.append(row)
+            if len(self._buffer) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        if not self._opened:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._open()
+            self._opened = True
+        self._write_group(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer = []
+
+    def close(self) -> int:
+        """Дописывает буфер и публикует файл; пустая таблица файла не создаёт. Возвращает число строк."""
+        self._flush()
+        if self._opened:
+            self._close()
+            os.replace(self._tmp_file, self.path)
+        return self.rows_written
+
+    def abort(self) -> None:
+        if self._opened:
+            self._close()
+            self._tmp_file.unlink()
+        self._buffer = []
+
+    @abstractmethod
+    def _open(self) -> None:
+        """Создаёт временный файл и записывающий объект формата."""
+
+    @abstractmethod
+    def _write_group(self, rows: List[Tuple]) -> None:
+        """Записывает одну группу строк."""
+
+    @abstractmethod
+    def _close(self) -> None:
+        """Завершает запись временного файла."""
+
+
+class ParquetTableWriter(TableWriter):
+    suffix = ".parquet"
+
+    def _open(self) -> None:
+        self._schema = pa.schema([(name, pa.int64() if kind == "int" else pa.string()) for name, kind in self.columns])
+        self._writer = pq.ParquetWriter(str(self._tmp_file), self._schema, compression="zstd")
+
+    def _write_group(self, rows: List[Tuple]) -> None:
+        arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), self._schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema), row_group_size=len(rows))
+
+    def _close(self) -> None:
+        self._writer.close()
+
+
+class CsvTableWriter(TableWriter):
+    suffix = ".csv.gz"
+
+    def _open(self) -> None:
+        self._file = gzip.open(self._tmp_file, 'wt', encoding='utf-8', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([name for name, _ in self.columns])
+
+    def _write_group(self, rows: List[Tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+class JsonLinesTableWriter(TableWriter):
+    suffix = ".jsonl.gz"
+
+    def _open(self) -> None:
+        self._file = gzip.open(self._tmp_file, 'wt', encoding='utf-8')
+        self._names = [name for name, _ in self.columns]
+
+    def _write_group(self, rows: List[Tuple]) -> None:
+        self._file.write("".join(json.dumps(dict(zip(self._names, row)), ensure_ascii=False) + "\n" for row in rows))
+
+    def _close(self) -> None:
+        self._file.close()
+
+
+WRITERS = {"parquet": ParquetTableWriter, "csv": CsvTableWriter, "jsonl": JsonLinesTableWriter}
+
+
+def resolve_format(fmt: str = "auto") -> str:
+    """"auto" — Parquet при установленном pyarrow, иначе CSV; ValueError для недоступного формата."""
+    if fmt == "auto":
+        return "parquet" if pa is not None else "csv"
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат выгрузки: {fmt!r} (доступны: {', '.join(FORMATS)})")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Для выгрузки в Parquet установите pyarrow")
+    return fmt
+
+
+def catalog_rows(markers: Dict[str, Any]) -> Tuple[List[Tuple], List[Tuple]]:
+    """Строки таблиц skills и markers."""
+    skills, marker_rows = [], []
+    for skill_name, skill_data in markers.items():
+        count = 0
+        for level, level_markers in skill_data.levels.items():
+            for marker in level_markers:
+                marker_rows.append((marker.id, skill_name, str(level), marker.priority, marker.marker, marker.validation))
+                count += 1
+        skills.append((skill_name, skill_data.description, count))
+    return skills, marker_rows
+
+
+def _init_worker(markers_dir: str) -> None:
+    global _marker_skill
+    logging.getLogger("src.core.tracker").setLevel(logging.WARNING)
+    _marker_skill = {marker.id: skill_name
+                     for skill_name, skill_data in load_catalog(markers_dir).items()
+                     for level_markers in skill_data.levels.values() for marker in level_markers}
+
+
+def read_events(batch: List[Tuple[str, str, int]], since: float) -> Dict[str, Any]:
+    """
+    Новые события пачки файлов (выполняется в процессе-воркере).
+
+    batch — (путь, ключ состояния, сколько событий уже выгружено); файлы, не менявшиеся с since, пропускаются.
+    """
+    result = {"rows": [], "offsets": {}, "learners": 0, "unchanged": 0, "invalid": 0}
+    for path, key, offset in batch:
+        user_id = Path(path).stem
+        try:
+            if offset and os.path.getmtime(path) < since:
+                result["unchanged"] += 1
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                history = json.load(f).get("history", [])
+        except (OSError, json.JSONDecodeError, AttributeError) as e:
+            logger.warning(f"Пропущен файл прогресса {path}: {e}")
+            result["invalid"] += 1
+            continue
+        if not isinstance(history, list):
+            result["invalid"] += 1
+            continue
+
+        result["learners"] += 1
+        if len(history) < offset:
+            logger.warning(f"История {key} короче уже выгруженной, выгружается заново")
+            offset = 0
+        for seq in range(offset, len(history)):
+            entry = history[seq]
+            if (isinstance(entry, dict) and entry.get("event") in EXPORT_EVENTS
+                    and isinstance(entry.get("marker_id"), str) and isinstance(entry.get("timestamp"), str)):
+                marker_id = entry["marker_id"]
+                result["rows"].append((user_id, seq, marker_id, _marker_skill.get(marker_id, ""), entry["event"],
+                                       entry["timestamp"], str(entry.get("dev", ""))))
+        result["offsets"][key] = len(history)
+    return result
+
+
+def load_state(output_dir: str) -> Dict[str, Any]:
+    try:
+        with open(Path(output_dir) / STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if isinstance(state, dict) and isinstance(state.get("offsets"), dict):
+            return state
+    except FileNotFoundError:
+        pass
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Состояние выгрузки повреждено, выполняется полная выгрузка: {e}")
+    return {"runs": 0, "since": 0.0, "offsets": {}, "parts": []}
+
+
+def _save_state(output_dir: str, state: Dict[str, Any]) -> None:
+    target = Path(output_dir) / STATE_FILE
+    tmp_file = target.with_name(f".{STATE_FILE}.tmp")
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_file, target)
+
+
+def _state_key(path: str, progress_dir: str) -> str:
+    """Ключ файла в состоянии: путь относительно каталога прогресса (для glob-шаблона — сам путь)."""
+    if os.path.isdir(progress_dir):
+        path = os.path.relpath(path, progress_dir)
+    return Path(path).as_posix()
+
+
+def _drop_unlisted_parts(root: Path, parts: Sequence[str]) -> None:
+    """Удаляет части событий, не перечисленные в состоянии выгрузки."""
+    for old in (root / EVENTS_TABLE).glob("part-*"):
+        if old.name not in parts:
+            old.unlink()
+
+
+def export_all(progress_dir: str = "src/data/users", markers_dir: str = "src/data/markers",
+               output_dir: str = DEFAULT_EXPORT_DIR, fmt: str = "auto", full: bool = False,
+               workers: Optional[int] = None, batch_size: int = 500,
+               row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, Any]:
+    """
+    Выгружает каталог и события; без full — только события, появившиеся после прошлой выгрузки.
+
+    Состояние сохраняется только после успешной записи всех таблиц, а часть событий прерванной
+    выгрузки в нём не числится и удаляется при следующем запуске, так что прерванная выгрузка
+    просто повторится целиком без дублей.
+    """
+    fmt = resolve_format(fmt)
+    writer_cls = WRITERS[fmt]
+    root = Path(output_dir)
+    state = load_state(output_dir)
+    if isinstance(state.get("parts"), list):
+        _drop_unlisted_parts(root, state["parts"])
+    else:
+        full = True  # состояние без списка частей: неизвестно, какие части опубликованы
+    if full or state.get("format") != fmt:
+        state = {"runs": 0, "since": 0.0, "offsets": {}, "parts": []}
+    offsets: Dict[str, int] = state["offsets"]
+    started = time.time()
+    run = state["runs"] + 1
+
+    skills, marker_rows = catalog_rows(load_catalog(markers_dir))
+    for table, columns, rows in (("skills", SKILL_COLUMNS, skills), ("markers", MARKER_COLUMNS, marker_rows)):
+        writer = writer_cls(root / f"{table}{writer_cls.suffix}", columns, row_group_size)
+        writer.write(rows)
+        writer.close()
+
+    part = root / EVENTS_TABLE / f"part-{run:05d}-{utc_now():%Y%m%dT%H%M%SZ}{writer_cls.suffix}"
+    events = writer_cls(part, EVENT_COLUMNS, row_group_size)
+    report = {"format": fmt, "incremental": run > 1, "skills": len(skills), "markers": len(marker_rows),
+              "learners": 0, "unchanged": 0, "invalid": 0, "events": 0, "events_file": None}
+
+    def merge(partial: Dict[str, Any]) -> None:
+        events.write(partial["rows"])
+        offsets.update(partial["offsets"])
+        for key in ("learners", "unchanged", "invalid"):
+            report[key] += partial[key]
+
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    keys = ((path, _state_key(path, progress_dir)) for path in iter_progress_files(progress_dir))
+    items = ((path, key, offsets.get(key, 0)) for path, key in keys)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(markers_dir,)) as pool:
+            pending = set()
+            for batch in batched(items, batch_size):
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        merge(future.result())
+                pending.add(pool.submit(read_events, batch, state["since"]))
+            for future in pending:
+                merge(future.result())
+        report["events"] = events.close()
+    except BaseException:
+        events.abort()
+        raise
+
+    parts = [] if run == 1 else list(state["parts"])
+    if report["events"]:
+        report["events_file"] = str(part)
+        parts.append(part.name)
+
+    _save_state(output_dir, {"format": fmt, "runs": run, "since": started - MTIME_SLACK,
+                             "last_run": format_timestamp(utc_now()), "offsets": offsets, "parts": parts})
+    if run == 1:
+        # Полная выгрузка заменяет все прежние части событий — удаляются после сохранения состояния
+        _drop_unlisted_parts(root, parts)
+    logger.info(f"Выгрузка {fmt}: событий {report['events']}, учащихся прочитано {report['learners']}")
+    return report
+
+
+__all__ = ['DEFAULT_EXPORT_DIR', 'FORMATS', 'TableWriter', 'catalog_rows', 'export_all', 'load_state',
+           'resolve_format']
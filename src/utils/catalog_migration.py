@@ -0,0 +1,325 @@
+"""
+Версионирование каталога маркеров и миграция прогресса при изменении ID маркеров.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from src.core.tracker import progress_file_lock
+from src.utils.cohort import batched, iter_progress_files
+
+logger = logging.getLogger(__name__)
+
+MAPPING_FORMAT = 1
+DEFAULT_RENAME_THRESHOLD = 0.75
+# Вес текста маркера и структурной близости (тот же навык / уровень) в оценке переименования
+TEXT_WEIGHT = 0.7
+SKILL_WEIGHT = 0.2
+LEVEL_WEIGHT = 0.1
+MAX_ERROR_SAMPLES = 20
+
+_WORD_RE = re.compile(r"\w+")
+
+# Маппинг загружается один раз на процесс-воркер
+_mapping: Optional[Dict[str, Any]] = None
+
+
+def _flatten(markers: Dict[str, Any]) -> Dict[str, Tuple[str, str, Any]]:
+    flat = {}
+    for skill_name, skill_data in markers.items():
+        for level_key, level_markers in skill_data.levels.items():
+            for marker in level_markers:
+                flat.setdefault(marker.id, (skill_name, level_key, marker))
+    return flat
+
+
+def _content(marker: Any) -> str:
+    criteria = " ".join(str(v) for _, v in sorted(marker.smart_criteria.items()))
+    return f"{marker.marker}\n{marker.validation}\n{criteria}"
+
+
+def _tokens(marker: Any) -> Set[str]:
+    return set(_WORD_RE.findall(_content(marker).lower()))
+
+
+def catalog_version(markers: Dict[str, Any]) -> str:
+    """Отпечаток каталога: хэш ID и содержимого маркеров (не зависит от порядка файлов)."""
+    digest = hashlib.sha256()
+    for marker_id, (skill_name, level_key, marker) in sorted(_flatten(markers).items()):
+        digest.update(f"{marker_id}\0{skill_name}\0{level_key}\0{_content(marker)}\0".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def rename_score(old: Tuple[str, str, Any], new: Tuple[str, str, Any], old_tokens: Set[str],
+                 new_tokens: Set[str]) -> float:
+    union = old_tokens | new_tokens
+    text = len(old_tokens & new_tokens) / len(union) if union else 0.0
+    if _content(old[2]) == _content(new[2]):
+        text = 1.0
+    return TEXT_WEIGHT * text + SKILL_WEIGHT * (old[0] == new[0]) + LEVEL_WEIGHT * (old[1] == new[1])
+
+
+def diff_catalogs(old_markers: Dict[str, Any], new_markers: Dict[str, Any],
+                  threshold: float = DEFAULT_RENAME_THRESHOLD) -> Dict[str, Any]:
+    """Сравнивает две версии каталога: добавленные, удалённые, изменённые и переименованные маркеры."""
+    old_flat, new_flat = _flatten(old_markers), _flatten(new_markers)
+    removed = sorted(set(old_flat) - set(new_flat))
+    added = sorted(set(new_flat) - set(old_flat))
+    modified = sorted(
+        marker_id for marker_id in set(old_flat) & set(new_flat)
+        if _content(old_flat[marker_id][2]) != _content(new_flat[marker_id][2])
+    )
+
+    old_tokens = {marker_id: _tokens(old_flat[marker_id][2]) for marker_id in removed}
+    new_tokens = {marker_id: _tokens(new_flat[marker_id][2]) for marker_id in added}
+
+    # Кандидаты только среди маркеров с общими словами, а не все пары удалённых и добавленных
+    postings = defaultdict(list)
+    for marker_id in added:
+        for token in new_tokens[marker_id]:
+            postings[token].append(marker_id)
+
+    candidates = []
+    for old_id in removed:
+        seen = {new_id for token in old_tokens[old_id] for new_id in postings.get(token, ())}
+        for new_id in seen:
+            score = rename_score(old_flat[old_id], new_flat[new_id], old_tokens[old_id], new_tokens[new_id])
+            if score >= threshold:
+                candidates.append((-score, old_id, new_id))
+
+    # Жадное сопоставление один-к-одному: сначала самые похожие пары
+    renamed: Dict[str, str] = {}
+    scores: Dict[str, float] = {}
+    taken: Set[str] = set()
+    for negative_score, old_id, new_id in sorted(candidates):
+        if old_id in renamed or new_id in taken:
+            continue
+        renamed[old_id] = new_id
+        scores[old_id] = round(-negative_score, 3)
+        taken.add(new_id)
+
+    return {
+        "format": MAPPING_FORMAT,
+        "from_version": catalog_version(old_markers),
+        "to_version": catalog_version(new_markers),
+        "renamed": dict(sorted(renamed.items())),
+        "scores": dict(sorted(scores.items())),
+        "removed": [marker_id for marker_id in removed if marker_id not in renamed],
+        "added": [marker_id for marker_id in added if marker_id not in taken],
+        "modified": modified,
+    }
+
+
+def save_mapping(mapping: Dict[str, Any], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(mapping, f, ensure_ascii=False, indent=2)
+
+
+def load_mapping(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    if mapping.get("format") != MAPPING_FORMAT or not isinstance(mapping.get("renamed"), dict):
+        raise ValueError(f"Некорректный файл маппинга: {path}")
+    return mapping
+
+
+def _remap_ids(values: List[str], renamed: Dict[str, str], counts: Counter) -> List[str]:
+    result, seen = [], set()
+    for marker_id in values:
+        new_id = renamed.get(marker_id, marker_id)
+        if new_id != marker_id:
+            counts[marker_id] += 1
+        if new_id not in seen:
+            seen.add(new_id)
+            result.append(new_id)
+    return result
+
+
+def migrate_progress_data(data: Dict[str, Any], mapping: Dict[str, Any]) -> Tuple[bool, Counter, Counter]:
+    """Переименовывает ID в прогрессе и истории на месте; возвращает (изменено, переименования, удалённые ID)."""
+    renamed = mapping["renamed"]
+    removed = set(mapping.get("removed", ()))
+    counts, orphaned = Counter(), Counter()
+
+    for key in ("completed_markers", "in_progress_markers"):
+        values = data.get(key, [])
+        if not isinstance(values, list) or not all(isinstance(x, str) for x in values):
+            raise ValueError(f"некорректные данные {key}")
+        data[key] = _remap_ids(values, renamed, counts)
+        orphaned.update(marker_id for marker_id in data[key] if marker_id in removed)
+
+    for event in data.get("history", []):
+        if isinstance(event, dict) and event.get("marker_id") in renamed:
+            event["marker_id"] = renamed[event["marker_id"]]
+
+    sync_state = data.get("sync")
+    if isinstance(sync_state, dict) and isinstance(sync_state.get("heads"), dict):
+        sync_state["heads"] = {renamed.get(marker_id, marker_id): head for marker_id, head in sync_state["heads"].items()}
+
+    evidence = data.get("evidence")
+    if isinstance(evidence, dict) and any(marker_id in renamed for marker_id in evidence):
+        remapped: Dict[str, List[Any]] = {}
+        for marker_id, artifacts in evidence.items():
+            remapped.setdefault(renamed.get(marker_id, marker_id), []).extend(artifacts)
+        data["evidence"] = remapped
+
+    changed = bool(counts) or data.get("catalog_version") != mapping["to_version"]
+    data["catalog_version"] = mapping["to_version"]
+    return changed, counts, orphaned
+
+
+def _write_atomic(path: str, data: Dict[str, Any]) -> None:
+    directory = os.path.dirname(path) or "."
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".migrate-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def _init_worker(mapping: Dict[str, Any]) -> None:
+    global _mapping
+    _mapping = mapping
+
+
+def empty_report() -> Dict[str, Any]:
+    return {
+        "files": 0,
+        "changed_files": 0,
+        "up_to_date": 0,
+        "other_version": 0,
+        "invalid_files": 0,
+        "error_samples": [],
+        "renamed": Counter(),
+        "orphaned": Counter(),
+    }
+
+
+def migrate_files(paths: List[str], dry_run: bool = True) -> Dict[str, Any]:
+    """
+    Мигрирует пачку файлов прогресса (выполняется в процессе-воркере).
+
+    Маппинг применяется только к прогрессу версии from_version; файл переписывается под той же
+    блокировкой .lock, что и в трекере, поэтому одновременные отметки из CLI и веб-сессий не теряются.
+    """
+    result = empty_report()
+    for path in paths:
+        result["files"] += 1
+        try:
+            with contextlib.nullcontext() if dry_run else progress_file_lock(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("некорректная структура файла прогресса")
+                # Файлы без отметки версии созданы до версионирования и считаются прогрессом исходного каталога
+                version = data.get("catalog_version", _mapping["from_version"])
+                if version == _mapping["to_version"]:
+                    result["up_to_date"] += 1
+                    continue
+                if version != _mapping["from_version"]:
+                    result["other_version"] += 1
+                    if len(result["error_samples"]) < MAX_ERROR_SAMPLES:
+                        result["error_samples"].append(f"{path}: прогресс версии каталога {version}, пропущен")
+                    continue
+                changed, counts, orphaned = migrate_progress_data(data, _mapping)
+                if changed and not dry_run:
+                    _write_atomic(path, data)
+        except (OSError, ValueError) as e:
+            result["invalid_files"] += 1
+            if len(result["error_samples"]) < MAX_ERROR_SAMPLES:
+                result["error_samples"].append(f"{path}: {e}")
+            continue
+
+        result["changed_files"] += changed
+        result["renamed"].update(counts)
+        result["orphaned"].update(orphaned)
+    return result
+
+
+def merge_reports(target: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    for key in ("files", "changed_files", "up_to_date", "other_version", "invalid_files"):
+        target[key] += partial[key]
+    room = MAX_ERROR_SAMPLES - len(target["error_samples"])
+    target["error_samples"].extend(partial["error_samples"][:room])
+    target["renamed"].update(partial["renamed"])
+    target["orphaned"].update(partial["orphaned"])
+    return target
+
+
+def migrate_progress(source: str, mapping: Dict[str, Any], dry_run: bool = True, workers: Optional[int] = None,
+                     batch_size: int = 500) -> Dict[str, Any]:
+    """Применяет маппинг ко всем файлам прогресса пачками в пуле процессов (по умолчанию — без записи)."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    report = empty_report()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mapping,)) as pool:
+        pending = set()
+        for batch in batched(iter_progress_files(source), batch_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge_reports(report, future.result())
+            pending.add(pool.submit(migrate_files, batch, dry_run))
+
+        for future in pending:
+            merge_reports(report, future.result())
+
+    report["dry_run"] = dry_run
+    return report
+
+
+def format_diff(mapping: Dict[str, Any]) -> List[str]:
+    lines = [
+        "🗂️ ИЗМЕНЕНИЯ КАТАЛОГА",
+        "-" * 50,
+        f"Версия: {mapping['from_version']} → {mapping['to_version']}",
+        f"Переименовано: {len(mapping['renamed'])} • удалено: {len(mapping['removed'])} "
+        f"• добавлено: {len(mapping['added'])} • изменён текст: {len(mapping['modified'])}",
+    ]
+    if mapping["renamed"]:
+        lines.extend(["", "🔀 Переименования (по сходству содержимого):"])
+        lines.extend(f"• {old_id} → {new_id} ({mapping['scores'][old_id]:.2f})"
+                     for old_id, new_id in mapping["renamed"].items())
+    if mapping["removed"]:
+        lines.extend(["", "🗑️ Удалены без замены:"])
+        lines.extend(f"• {marker_id}" for marker_id in mapping["removed"])
+    return lines
+
+
+def format_report(report: Dict[str, Any], top: int = 10) -> List[str]:
+    title = "🔍 ПРОБНАЯ МИГРАЦИЯ ПРОГРЕССА (файлы не изменены)" if report["dry_run"] else "🚚 МИГРАЦИЯ ПРОГРЕССА"
+    lines = [
+        title,
+        "-" * 50,
+        f"Файлов: {report['files']} • {'будет изменено' if report['dry_run'] else 'изменено'}: "
+        f"{report['changed_files']} • уже актуальны: {report['up_to_date']} "
+        f"• другой версии каталога: {report['other_version']} • с ошибками: {report['invalid_files']}",
+        f"Переименований ID: {sum(report['renamed'].values())}",
+    ]
+    if report["renamed"]:
+        lines.extend(f"• {marker_id}: {count}" for marker_id, count in report["renamed"].most_common(top))
+    if report["orphaned"]:
+        lines.extend(["", "⚠️ ID удалённых маркеров остаются в прогрессе:"])
+        lines.extend(f"• {marker_id}: {count} учащихся" for marker_id, count in report["orphaned"].most_common(top))
+    if report["error_samples"]:
+        lines.extend(["", "⚠️ Примеры ошибок:"])
+        lines.extend(f"• {sample}" for sample in report["error_samples"])
+    return lines
+
+
+__all__ = ['catalog_version', 'diff_catalogs', 'save_mapping', 'load_mapping', 'migrate_progress_data',
+           'migrate_progress', 'format_diff', 'format_report']
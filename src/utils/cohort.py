@@ -0,0 +1,245 @@
+"""
+Агрегация прогресса когорты по множеству файлов прогресса.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import glob
+import json
+import logging
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.tracker import load_catalog
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_BINS = 101  # процент выполнения 0..100
+MAX_ERROR_SAMPLES = 20
+
+# Каталог загружается один раз на процесс-воркер
+_catalog: Optional[Tuple[Dict[str, str], Dict[str, int]]] = None
+
+
+def iter_progress_files(source: str) -> Iterator[str]:
+    """Лениво перечисляет файлы прогресса в директории (рекурсивно) или по glob-шаблону."""
+    if os.path.isdir(source):
+        stack = [source]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".json"):
+                        yield entry.path
+    else:
+        yield from glob.iglob(source, recursive=True)
+
+
+def batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    """Разбивает поток путей на пачки по size для отправки в пул процессов."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _init_worker(markers_dir: str) -> None:
+    global _catalog
+    logging.getLogger("src.core.tracker").setLevel(logging.WARNING)
+    markers = load_catalog(markers_dir)
+    marker_skill = {}
+    skill_totals = {}
+    for skill_name, skill_data in markers.items():
+        skill_totals[skill_name] = sum(len(level_markers) for level_markers in skill_data.levels.values())
+        for level_markers in skill_data.levels.values():
+            for marker in level_markers:
+                marker_skill[marker.id] = skill_name
+    _catalog = (marker_skill, skill_totals)
+
+
+def empty_aggregate() -> Dict[str, Any]:
+    return {
+        "files": 0,
+        "invalid_files": 0,
+        "error_samples": [],
+        "unknown_markers": 0,
+        "overall_histogram": [0] * HISTOGRAM_BINS,
+        "skill_histograms": {},
+        "skill_completed": Counter(),
+        "marker_completed": Counter(),
+        "marker_in_progress": Counter(),
+    }
+
+
+def read_progress(path: str) -> Tuple[Optional[List[str]], Optional[List[str]], str]:
+    """(выполненные, в процессе, текст ошибки) из файла прогресса; при ошибке списки — None."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        return None, None, str(e)
+
+    if not isinstance(data, dict):
+        return None, None, "некорректная структура файла прогресса"
+
+    completed = data.get("completed_markers", [])
+    in_progress = data.get("in_progress_markers", [])
+    for name, values in (("completed_markers", completed), ("in_progress_markers", in_progress)):
+        if not isinstance(values, list) or not all(isinstance(x, str) for x in values):
+            return None, None, f"некорректные данные {name}"
+    return completed, in_progress, ""
+
+
+def aggregate_files(paths: List[str]) -> Dict[str, Any]:
+    """Частичный агрегат по пачке файлов (выполняется в процессе-воркере)."""
+    marker_skill, skill_totals = _catalog
+    total_markers = sum(skill_totals.values())
+    result = empty_aggregate()
+
+    for path in paths:
+        result["files"] += 1
+        completed, in_progress, error = read_progress(path)
+        if error:
+            result["invalid_files"] += 1
+            if len(result["error_samples"]) < MAX_ERROR_SAMPLES:
+                result["error_samples"].append(f"{path}: {error}")
+            continue
+
+        per_skill = Counter()
+        for marker_id in set(completed):
+            skill_name = marker_skill.get(marker_id)
+            if skill_name is None:
+                result["unknown_markers"] += 1
+                continue
+            per_skill[skill_name] += 1
+            result["marker_completed"][marker_id] += 1
+
+        for marker_id in set(in_progress) - set(completed):
+            if marker_id in marker_skill:
+                result["marker_in_progress"][marker_id] += 1
+
+        for skill_name, total in skill_totals.items():
+            if not total:
+                continue
+            histogram = result["skill_histograms"].setdefault(skill_name, [0] * HISTOGRAM_BINS)
+            histogram[round(per_skill[skill_name] * 100 / total)] += 1
+        result["skill_completed"].update(per_skill)
+
+        if total_markers:
+            result["overall_histogram"][round(sum(per_skill.values()) * 100 / total_markers)] += 1
+
+    return result
+
+
+def merge_aggregates(target: Dict[str, Any], partial: Dict[str, Any]) -> Dict[str, Any]:
+    target["files"] += partial["files"]
+    target["invalid_files"] += partial["invalid_files"]
+    target["unknown_markers"] += partial["unknown_markers"]
+    room = MAX_ERROR_SAMPLES - len(target["error_samples"])
+    target["error_samples"].extend(partial["error_samples"][:room])
+
+    for i, count in enumerate(partial["overall_histogram"]):
+        target["overall_histogram"][i] += count
+    for skill_name, histogram in partial["skill_histograms"].items():
+        merged = target["skill_histograms"].setdefault(skill_name, [0] * HISTOGRAM_BINS)
+        for i, count in enumerate(histogram):
+            merged[i] += count
+
+    target["skill_completed"].update(partial["skill_completed"])
+    target["marker_completed"].update(partial["marker_completed"])
+    target["marker_in_progress"].update(partial["marker_in_progress"])
+    return target
+
+
+def histogram_percentile(histogram: List[int], q: float) -> float:
+    total = sum(histogram)
+    if not total:
+        return 0.0
+    rank = q / 100 * (total - 1)
+    seen = 0
+    for value, count in enumerate(histogram):
+        seen += count
+        if seen > rank:
+            return float(value)
+    return float(len(histogram) - 1)
+
+
+def aggregate_cohort(source: str, markers_dir: str = "src/data/markers", workers: Optional[int] = None,
+                     batch_size: int = 500) -> Dict[str, Any]:
+    """Потоково агрегирует файлы прогресса в пуле процессов с ограниченным числом задач в работе."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2
+    total = empty_aggregate()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(markers_dir,)) as pool:
+        pending = set()
+        for batch in batched(iter_progress_files(source), batch_size):
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    merge_aggregates(total, future.result())
+            pending.add(pool.submit(aggregate_files, batch))
+
+        for future in pending:
+            merge_aggregates(total, future.result())
+
+    return total
+
+
+def build_report(aggregate: Dict[str, Any], top: int = 10) -> Dict[str, Any]:
+    learners = aggregate["files"] - aggregate["invalid_files"]
+    skills = {}
+    for skill_name, histogram in sorted(aggregate["skill_histograms"].items()):
+        skills[skill_name] = {
+            "completed_markers": aggregate["skill_completed"][skill_name],
+            "p25": histogram_percentile(histogram, 25),
+            "p50": histogram_percentile(histogram, 50),
+            "p90": histogram_percentile(histogram, 90),
+        }
+
+    return {
+        "files": aggregate["files"],
+        "learners": learners,
+        "invalid_files": aggregate["invalid_files"],
+        "error_samples": aggregate["error_samples"],
+        "unknown_markers": aggregate["unknown_markers"],
+        "overall": {
+            "p25": histogram_percentile(aggregate["overall_histogram"], 25),
+            "p50": histogram_percentile(aggregate["overall_histogram"], 50),
+            "p90": histogram_percentile(aggregate["overall_histogram"], 90),
+        },
+        "skills": skills,
+        "top_completed": aggregate["marker_completed"].most_common(top),
+        "top_stuck": aggregate["marker_in_progress"].most_common(top),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    lines = [
+        "👥 ОТЧЁТ ПО КОГОРТЕ",
+        "-" * 50,
+        f"Файлов: {report['files']} • учащихся: {report['learners']} • с ошибками: {report['invalid_files']}",
+        f"Общий прогресс: p25 {report['overall']['p25']:.0f}% • медиана {report['overall']['p50']:.0f}% "
+        f"• p90 {report['overall']['p90']:.0f}%",
+        "",
+    ]
+    for skill_name, stats in report["skills"].items():
+        lines.append(f"{skill_name:<20} медиана {stats['p50']:5.0f}% • p90 {stats['p90']:5.0f}% "
+                     f"• выполнено маркеров: {stats['completed_markers']}")
+
+    if report["top_stuck"]:
+        lines.extend(["", "⏳ Маркеры, на которых застревают чаще всего:"])
+        lines.extend(f"• {marker_id}: {count} в процессе" for marker_id, count in report["top_stuck"])
+
+    if report["error_samples"]:
+        lines.extend(["", "⚠️ Примеры ошибок:"])
+        lines.extend(f"• {sample}" for sample in report["error_samples"])
+    return lines
+
+
+__all__ = ['aggregate_cohort', 'batched', 'build_report', 'format_report', 'iter_progress_files', 'read_progress']
@@ -0,0 +1,308 @@
+"""
+Проверка ссылок на ресурсы в каталоге маркеров IT Compass.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import asyncio
+import json
+import logging
+import ssl
+import sys
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "it-compass-link-checker/1.0"
+FALLBACK_TO_GET_STATUSES = {403, 404, 405, 501}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+TRANSIENT_STATUSES = {408, 425, 429}  # а также все 5xx
+
+
+@dataclass
+class LinkResult:
+    url: str
+    ok: bool
+    status: Optional[int] = None
+    method: str = "HEAD"
+    error: str = ""
+    checked_at: float = 0.0
+    transient: bool = False  # таймаут, сетевая ошибка или 5xx: повторить проверку скоро
+
+
+class LinkCache:
+    """Кэш результатов проверки с TTL, хранится в JSON-файле; временные сбои живут transient_ttl."""
+
+    def __init__(self, cache_file: str = ".cache/link_check.json", ttl: float = 24 * 3600,
+                 transient_ttl: float = 5 * 60):
+        self.cache_file = Path(cache_file)
+        self.ttl = ttl
+        self.transient_ttl = transient_ttl
+        self._entries: Dict[str, LinkResult] = self._load()
+
+    def _load(self) -> Dict[str, LinkResult]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return {url: LinkResult(**entry) for url, entry in data.items()}
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.warning(f"Кэш ссылок повреждён и будет пересоздан: {e}")
+            return {}
+
+    def get(self, url: str, now: Optional[float] = None) -> Optional[LinkResult]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        now = time.time() if now is None else now
+        if now - entry.checked_at > (self.transient_ttl if entry.transient else self.ttl):
+            return None
+        return entry
+
+    def put(self, result: LinkResult) -> None:
+        self._entries[result.url] = result
+
+    def save(self) -> bool:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({url: asdict(r) for url, r in self._entries.items()}, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.cache_file)
+            return True
+        except OSError as e:
+            logger.error(f"Ошибка сохранения кэша ссылок: {e}")
+            return False
+
+
+class _HostLimiter:
+    """Ограничивает число одновременных запросов и частоту обращений к одному хосту."""
+
+    def __init__(self, max_parallel: int, min_interval: float):
+        self._semaphore = asyncio.Semaphore(max_parallel)
+        self._lock = asyncio.Lock()
+        self._min_interval = min_interval
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_slot - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_slot = loop.time() + self._min_interval
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self._semaphore.release()
+
+
+class LinkChecker:
+    def __init__(self, max_connections: int = 32, per_host_limit: int = 2,
+                 per_host_interval: float = 0.1, timeout: float = 10.0,
+                 max_redirects: int = 5, cache: Optional[LinkCache] = None):
+        self.max_connections = max_connections
+        self.per_host_limit = per_host_limit
+        self.per_host_interval = per_host_interval
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+        self.cache = cache
+        self._ssl_context = ssl.create_default_context()
+        self._pool: Optional[asyncio.Semaphore] = None
+        self._pool_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._hosts: Dict[str, _HostLimiter] = {}
+
+    def _connection_pool(self) -> asyncio.Semaphore:
+        """Общий лимит соединений; создаётся в текущем цикле событий (check_url можно вызывать и напрямую)."""
+        loop = asyncio.get_running_loop()
+        if self._pool is None or self._pool_loop is not loop:
+            self._pool = asyncio.Semaphore(self.max_connections)
+            self._pool_loop = loop
+            self._hosts = {}
+        return self._pool
+
+    def _host_limiter(self, host: str) -> _HostLimiter:
+        limiter = self._hosts.get(host)
+        if limiter is None:
+            limiter = _HostLimiter(self.per_host_limit, self.per_host_interval)
+            self._hosts[host] = limiter
+        return limiter
+
+    async def _request(self, method: str, url: str) -> Tuple[int, Dict[str, str]]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Неподдерживаемый URL: {url}")
+
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+
+        # Сначала очередь хоста (с паузой ограничения частоты), потом общий слот: ожидание медленного
+        # хоста не должно занимать слоты, нужные запросам к другим хостам
+        pool = self._connection_pool()
+        async with self._host_limiter(parts.hostname), pool:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(
+                    parts.hostname, port,
+                    ssl=self._ssl_context if parts.scheme == "https" else None
+                ),
+                timeout=self.timeout
+            )
+            try:
+                request = (
+                    f"{method} {path} HTTP/1.1\r\n"
+                    f"Host: {parts.netloc}\r\n"
+                    f"User-Agent: {USER_AGENT}\r\n"
+                    "Accept: */*\r\n"
+                    "Connection: close\r\n\r\n"
+                )
+                writer.write(request.encode("ascii"))
+                await writer.drain()
+                status_line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+                status = int(status_line.split()[1])
+                headers = {}
+                while True:
+                    line = await asyncio.wait_for(reader.readline(), timeout=self.timeout)
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                return status, headers
+            finally:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except (OSError, ssl.SSLError):
+                    pass
+
+    async def _fetch(self, method: str, url: str) -> Tuple[int, str]:
+        current = url
+        for _ in range(self.max_redirects + 1):
+            status, headers = await self._request(method, current)
+            location = headers.get("location")
+            if status in REDIRECT_STATUSES and location:
+                current = urljoin(current, location)
+                continue
+            return status, current
+        raise ValueError(f"Слишком много перенаправлений: {url}")
+
+    async def check_url(self, url: str) -> LinkResult:
+        if self.cache is not None:
+            cached = self.cache.get(url)
+            if cached is not None:
+                return cached
+
+        result = LinkResult(url=url, ok=False)
+        try:
+            status, _ = await self._fetch("HEAD", url)
+            result.status = status
+            if status in FALLBACK_TO_GET_STATUSES:
+                result.method = "GET"
+                status, _ = await self._fetch("GET", url)
+                result.status = status
+            result.ok = 200 <= status < 400
+            result.transient = status >= 500 or status in TRANSIENT_STATUSES
+        except (OSError, asyncio.TimeoutError, ssl.SSLError) as e:
+            result.error = str(e) or e.__class__.__name__
+            result.transient = True
+        except (ValueError, IndexError) as e:
+            result.error = str(e) or e.__class__.__name__
+
+        result.checked_at = time.time()
+        if self.cache is not None:
+            self.cache.put(result)
+        return result
+
+    async def check_urls(self, urls: List[str]) -> Dict[str, LinkResult]:
+        self._pool = None
+        self._connection_pool()
+        unique_urls = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*(self.check_url(url) for url in unique_urls))
+        return dict(zip(unique_urls, results))
+
+
+def collect_catalog_links(markers_dir: str = "src/data/markers") -> Dict[str, List[Tuple[str, str]]]:
+    """Возвращает ссылки каталога по файлам: {файл: [(id маркера, url), ...]}."""
+    links = {}
+    for file_path in sorted(Path(markers_dir).glob("*.json")):
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                skill_data = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"Ошибка парсинга JSON в файле {file_path}: {e}")
+            continue
+
+        file_links = []
+        for markers_list in skill_data.get("levels", {}).values():
+            for marker in markers_list:
+                resources = marker.get("resources", [])
+                if isinstance(resources, str):
+                    resources = [resources]
+                for url in resources:
+                    file_links.append((marker.get("id", "?"), url))
+        links[file_path.name] = file_links
+    return links
+
+
+def check_catalog_links(markers_dir: str = "src/data/markers", checker: Optional[LinkChecker] = None) -> Dict[str, List[Tuple[str, LinkResult]]]:
+    """Проверяет все ресурсы каталога и возвращает отчёт по каждому файлу навыка."""
+    checker = checker or LinkChecker()
+    links = collect_catalog_links(markers_dir)
+    all_urls = [url for file_links in links.values() for _, url in file_links]
+    results = asyncio.run(checker.check_urls(all_urls))
+
+    if checker.cache is not None:
+        checker.cache.save()
+
+    return {
+        file_name: [(marker_id, results[url]) for marker_id, url in file_links]
+        for file_name, file_links in links.items()
+    }
+
+
+def format_report(report: Dict[str, List[Tuple[str, LinkResult]]]) -> List[str]:
+    lines = []
+    total = broken = 0
+    for file_name, entries in report.items():
+        file_broken = [(marker_id, r) for marker_id, r in entries if not r.ok]
+        total += len(entries)
+        broken += len(file_broken)
+        mark = "✅" if not file_broken else "❌"
+        lines.append(f"{mark} {file_name}: {len(entries) - len(file_broken)}/{len(entries)} ссылок доступны")
+        for marker_id, r in file_broken:
+            reason = f"HTTP {r.status}" if r.status is not None else r.error
+            lines.append(f"   • {marker_id}: {r.url} ({reason})")
+    lines.append(f"Итого: {total - broken}/{total} ссылок доступны")
+    return lines
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Проверка ссылок на ресурсы в каталоге маркеров")
+    parser.add_argument("--markers-dir", default="src/data/markers")
+    parser.add_argument("--cache-file", default=".cache/link_check.json")
+    parser.add_argument("--ttl", type=float, default=24 * 3600, help="Время жизни кэша, секунды")
+    parser.add_argument("--transient-ttl", type=float, default=5 * 60,
+                        help="Время жизни кэша для таймаутов и ошибок 5xx, секунды")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--per-host", type=int, default=2)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    checker = LinkChecker(
+        max_connections=args.concurrency,
+        per_host_limit=args.per_host,
+        timeout=args.timeout,
+        cache=LinkCache(args.cache_file, ttl=args.ttl, transient_ttl=args.transient_ttl)
+    )
+    report = check_catalog_links(args.markers_dir, checker)
+    print("\n".join(format_report(report)))
+    sys.exit(0 if all(r.ok for entries in report.values() for _, r in entries) else 1)
@@ -0,0 +1,283 @@
+"""
+Нагрузочное тестирование трекера: множество одновременных учащихся на временных данных.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import contextlib
+import io
+import json
+import logging
+import math
+import random
+import tempfile
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.core.sessions import SessionManager
+from src.core.tracker import CareerTracker, load_catalog
+from src.utils.portfolio_gen import PortfolioGenerator
+
+logger = logging.getLogger(__name__)
+
+MODES = ("threads", "processes", "mixed")
+DEFAULT_MIX = {
+    "mark_completed": 0.35,
+    "show_progress": 0.3,
+    "get_skill_progress": 0.25,
+    "portfolio": 0.1,
+}
+PERCENTILES = (50, 95, 99)
+MAX_ERROR_SAMPLES = 20
+_QUIET_LOGGERS = ("src.core.tracker", "src.core.sessions", "src.utils.portfolio_gen")
+
+Actor = Tuple[str, int]  # (ID учащегося, номер одновременного клиента этого учащегося)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    """Глушит вывод print() и информационные логи трекера на время прогона."""
+    loggers = [logging.getLogger(name) for name in _QUIET_LOGGERS]
+    levels = [lg.level for lg in loggers]
+    for lg in loggers:
+        lg.setLevel(logging.WARNING)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        for lg, level in zip(loggers, levels):
+            lg.setLevel(level)
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _operation(tracker: CareerTracker, name: str, rng: random.Random, marker_ids: List[str],
+               portfolio_dir: Path) -> Optional[str]:
+    """Выполняет одну операцию; возвращает ID маркера, если выполнение подтверждено трекером."""
+    if name == "mark_completed":
+        marker_id = rng.choice(marker_ids)
+        return marker_id if tracker.mark_completed(marker_id) else None
+    if name == "show_progress":
+        tracker.show_progress()
+    elif name == "get_skill_progress":
+        tracker.get_skill_progress(rng.choice(list(tracker.markers)))
+    elif name == "portfolio":
+        tracker.flush()
+        PortfolioGenerator(
+            markers_dir=str(tracker.markers_dir), progress_file=str(tracker.progress_file),
+            output_file=str(portfolio_dir / f"{tracker.user_id}.md")
+        ).generate_portfolio()
+    else:
+        raise ValueError(f"Неизвестная операция: {name}")
+    return None
+
+
+def run_actors(actors: List[Actor], markers_dir: str, data_dir: str, ops_per_actor: int, mix: Dict[str, float],
+               seed: int, manager: Optional[SessionManager] = None) -> Dict[str, Any]:
+    """Один поток или процесс: операции клиентов чередуются по кругу, как запросы разных пользователей."""
+    own_manager = manager is None
+    if own_manager:
+        # Отдельный процесс ведёт себя как CLI: каждое изменение сразу записывается на диск
+        manager = SessionManager(markers_dir=markers_dir, progress_dir=str(Path(data_dir) / "users"), write_back=False)
+    portfolio_dir = Path(data_dir) / "portfolios"
+    marker_ids = [entry.marker.id for entry in manager.index.query()]
+    names, weights = list(mix), list(mix.values())
+
+    rngs = {actor: random.Random(f"{seed}:{actor[0]}:{actor[1]}") for actor in actors}
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    confirmed: Dict[str, List[str]] = defaultdict(list)
+    errors, error_samples = 0, []
+
+    for _ in range(ops_per_actor):
+        for actor in actors:
+            rng = rngs[actor]
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                marker_id = _operation(manager.get(actor[0]), name, rng, marker_ids, portfolio_dir)
+            except Exception as e:
+                errors += 1
+                if len(error_samples) < MAX_ERROR_SAMPLES:
+                    error_samples.append(f"{name} ({actor[0]}): {e}")
+                continue
+            latencies[name].append(time.perf_counter() - started)
+            if marker_id is not None:
+                confirmed[actor[0]].append(marker_id)
+    if own_manager:
+        manager.close()
+
+    return {"latencies": dict(latencies), "confirmed": dict(confirmed), "errors": errors,
+            "error_samples": error_samples}
+
+
+def _run_in_process(*args) -> Dict[str, Any]:
+    with _quiet():
+        return run_actors(*args)
+
+
+def _partition(actors: List[Actor], workers: int) -> List[List[Actor]]:
+    # По кругу: клиенты одного учащегося попадают в разные потоки/процессы
+    groups = [actors[i::workers] for i in range(workers)]
+    return [group for group in groups if group]
+
+
+def verify_progress(progress_dir: Path, confirmed: Dict[str, set]) -> Dict[str, Any]:
+    """Сверяет подтверждённые выполнения с тем, что в итоге оказалось на диске."""
+    lost, duplicates, invalid, samples = 0, 0, 0, []
+    for user_id, expected in sorted(confirmed.items()):
+        try:
+            with open(progress_dir / f"{user_id}.json", 'r', encoding='utf-8') as f:
+                completed = json.load(f)["completed_markers"]
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            invalid += 1
+            completed = []
+            if len(samples) < MAX_ERROR_SAMPLES:
+                samples.append(f"{user_id}: файл прогресса не читается ({e})")
+        duplicates += len(completed) - len(set(completed))
+        missing = expected - set(completed)
+        lost += len(missing)
+        if missing and len(samples) < MAX_ERROR_SAMPLES:
+            samples.append(f"{user_id}: потеряны {', '.join(sorted(missing))}")
+    return {"lost_completions": lost, "duplicate_completions": duplicates, "unreadable_files": invalid,
+            "samples": samples}
+
+
+def run_load_test(learners: int = 50, mode: str = "threads", workers: int = 8, ops_per_learner: int = 40,
+                  writers_per_learner: int = 1, mix: Optional[Dict[str, float]] = None,
+                  markers_dir: str = "src/data/markers", data_dir: Optional[str] = None, seed: int = 1) -> Dict[str, Any]:
+    """
+    Запускает нагрузку и возвращает отчёт: пропускная способность, перцентили задержек, проверки корректности.
+
+    threads — общий SessionManager с отложенной записью (как веб-интерфейс Streamlit);
+    processes — независимые процессы с записью после каждого изменения (как CLI-скрипты);
+    mixed — то и другое одновременно над одними файлами: чётные клиенты учащегося в веб-сессиях, нечётные в CLI.
+    writers_per_learner > 1 моделирует одного учащегося в нескольких вкладках/скриптах одновременно.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Неизвестный режим: {mode} (допустимо: {', '.join(MODES)})")
+    if mode == "mixed" and writers_per_learner < 2:
+        raise ValueError("Режиму mixed нужно не меньше двух клиентов на учащегося (writers_per_learner >= 2)")
+    mix = mix or DEFAULT_MIX
+    if not load_catalog(markers_dir):
+        raise ValueError(f"Каталог маркеров пуст: {markers_dir}")
+
+    with contextlib.ExitStack() as stack:
+        if data_dir is None:
+            data_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="it-compass-load-"))
+        progress_dir = Path(data_dir) / "users"
+        actors = [(f"learner_{i:05d}", w) for i in range(learners) for w in range(writers_per_learner)]
+        if mode == "mixed":
+            web_actors = [actor for actor in actors if actor[1] % 2 == 0]
+            cli_actors = [actor for actor in actors if actor[1] % 2 == 1]
+            thread_groups = _partition(web_actors, max(1, workers // 2))
+            process_groups = _partition(cli_actors, max(1, workers - len(thread_groups)))
+        elif mode == "threads":
+            thread_groups, process_groups = _partition(actors, max(1, workers)), []
+        else:
+            thread_groups, process_groups = [], _partition(actors, max(1, workers))
+
+        started = time.perf_counter()
+        with contextlib.ExitStack() as pools:
+            futures = []
+            if process_groups:
+                process_pool = pools.enter_context(ProcessPoolExecutor(max_workers=len(process_groups)))
+                futures = [process_pool.submit(_run_in_process, group, markers_dir, data_dir, ops_per_learner, mix,
+                                               seed) for group in process_groups]
+            results = []
+            if thread_groups:
+                # stdout подменяется один раз на весь прогон: redirect_stdout в каждом потоке не потокобезопасен
+                with _quiet():
+                    manager = SessionManager(markers_dir=markers_dir, progress_dir=str(progress_dir), write_back=True)
+                    with ThreadPoolExecutor(max_workers=len(thread_groups)) as pool:
+                        results = list(pool.map(
+                            lambda group: run_actors(group, markers_dir, data_dir, ops_per_learner, mix, seed, manager),
+                            thread_groups
+                        ))
+                    # Веб-сессии записываются после CLI-процессов: flush должен слить их изменения, а не затереть
+                    for future in futures:
+                        results.append(future.result())
+                    manager.close()
+            else:
+                results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+
+        latencies: Dict[str, List[float]] = defaultdict(list)
+        confirmed: Dict[str, set] = defaultdict(set)
+        errors, error_samples = 0, []
+        for result in results:
+            for name, values in result["latencies"].items():
+                latencies[name].extend(values)
+            for user_id, marker_ids in result["confirmed"].items():
+                confirmed[user_id].update(marker_ids)
+            errors += result["errors"]
+            error_samples.extend(result["error_samples"][:MAX_ERROR_SAMPLES - len(error_samples)])
+
+        correctness = verify_progress(progress_dir, confirmed)
+
+    return build_report(latencies, elapsed, errors, error_samples, correctness, {
+        "mode": mode, "learners": learners, "workers": len(thread_groups) + len(process_groups),
+        "writers_per_learner": writers_per_learner, "ops_per_learner": ops_per_learner,
+    })
+
+
+def build_report(latencies: Dict[str, List[float]], elapsed: float, errors: int, error_samples: List[str],
+                 correctness: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    def summary(values: List[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        stats = {"count": len(ordered)}
+        for q in PERCENTILES:
+            stats[f"p{q}_ms"] = round(_percentile(ordered, q) * 1000, 3)
+        stats["max_ms"] = round(ordered[-1] * 1000, 3) if ordered else 0.0
+        return stats
+
+    total_ops = sum(len(values) for values in latencies.values())
+    return {
+        "config": config,
+        "elapsed_s": round(elapsed, 3),
+        "operations": total_ops,
+        "throughput_ops_s": round(total_ops / elapsed, 1) if elapsed else 0.0,
+        "overall": summary([v for values in latencies.values() for v in values]),
+        "by_operation": {name: summary(values) for name, values in sorted(latencies.items())},
+        "errors": errors,
+        "error_samples": error_samples,
+        "correctness": correctness,
+        "ok": not errors and not correctness["lost_completions"] and not correctness["unreadable_files"],
+    }
+
+
+def format_report(report: Dict[str, Any]) -> List[str]:
+    config, correctness = report["config"], report["correctness"]
+    lines = [
+        "🏋️ НАГРУЗОЧНЫЙ ТЕСТ",
+        "-" * 50,
+        f"Режим: {config['mode']} • воркеров: {config['workers']} • учащихся: {config['learners']} "
+        f"• клиентов на учащегося: {config['writers_per_learner']}",
+        f"Операций: {report['operations']} за {report['elapsed_s']:.2f} с • {report['throughput_ops_s']:.1f} оп/с",
+        "",
+        f"{'Операция':<20} {'кол-во':>7} {'p50, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'max, мс':>9}",
+    ]
+    for name, stats in list(report["by_operation"].items()) + [("ВСЕГО", report["overall"])]:
+        lines.append(f"{name:<20} {stats['count']:>7} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                     f"{stats['p99_ms']:>9.2f} {stats['max_ms']:>9.2f}")
+
+    lines.extend([
+        "",
+        f"Потеряно выполнений: {correctness['lost_completions']} • дубликатов: {correctness['duplicate_completions']} "
+        f"• нечитаемых файлов: {correctness['unreadable_files']} • ошибок операций: {report['errors']}",
+    ])
+    samples = correctness["samples"] + report["error_samples"]
+    if samples:
+        lines.extend(["", "⚠️ Примеры проблем:"])
+        lines.extend(f"• {sample}" for sample in samples[:MAX_ERROR_SAMPLES])
+    lines.append("✅ Корректность подтверждена" if report["ok"] else "❌ Обнаружены проблемы корректности")
+    return lines
+
+
+__all__ = ['run_load_test', 'format_report', 'DEFAULT_MIX', 'MODES']
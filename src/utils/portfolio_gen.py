@@ -5,18 +5,42 @@
 """
 import json
 import logging
+import os
+import tempfile
 from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime
+from dataclasses import asdict, is_dataclass
+
+from src.core.evidence import DEFAULT_EVIDENCE_DIR, EvidenceStore, KIND_LINK
+from src.core.locales import MARKER_TEXT_FIELDS, get_locale
+from src.core.tracker import load_catalog
 
 logger = logging.getLogger(__name__)
 
+def load_portfolio_markers(markers_dir: Path) -> Dict[str, Dict]:
+    """Маркеры каталога по ID (словари с добавленным skill_name): директория JSON, архив .zip, .cmap или каталог пакета."""
+    markers = {}
+    for skill_name, skill_data in load_catalog(str(markers_dir)).items():
+        for level_markers in skill_data.levels.values():
+            for marker in level_markers:
+                # Представления .cmap не dataclass — материализуем обычный Marker
+                marker_copy = asdict(marker if is_dataclass(marker) else marker.to_marker())
+                marker_copy["skill_name"] = skill_name
+                markers[marker.id] = marker_copy
+    return markers
+
 class PortfolioGenerator:
-    def __init__(self, markers_dir: str = "src/data/markers", progress_file: str = "src/data/user_progress.json", output_file: str = "docs/my_portfolio.md"):
+    def __init__(self, markers_dir: str = "src/data/markers", progress_file: str = "src/data/user_progress.json", output_file: str = "docs/my_portfolio.md",
+                 evidence_dir: str = DEFAULT_EVIDENCE_DIR, locale: Optional[str] = None,
+                 markers: Optional[Dict[str, Dict]] = None):
         self.markers_dir = Path(markers_dir)
         self.progress_file = Path(progress_file)
         self.output_file = Path(output_file)
-        self._markers_cache: Optional[Dict[str, Dict]] = None
+        self.evidence_store = EvidenceStore(evidence_dir)
+        self.overlay = get_locale(locale)
+        # Заранее загруженный каталог (фоновые воркеры) избавляет от разбора JSON на каждый запрос
+        self._markers_cache: Optional[Dict[str, Dict]] = markers
     
     def generate_portfolio(self) -> bool:
         try:
@@ -34,7 +58,10 @@ class PortfolioGenerator:
                 print("ℹ️ Нет выполненных маркеров.")
                 return False
             
-            portfolio_content = self._create_portfolio_content(completed_markers_list)
+            evidence = progress.get("evidence", {})
+            portfolio_content = self._create_portfolio_content(
+                completed_markers_list, evidence if isinstance(evidence, dict) else {}
+            )
             return self._save_portfolio(portfolio_content)
             
         except Exception as e:
@@ -67,38 +94,11 @@ class PortfolioGenerator:
         if self._markers_cache is not None:
             return self._markers_cache
         
-        markers = {}
-        
-        if not self.markers_dir.exists():
-            logger.warning(f"Директория маркеров не найдена: {self.markers_dir}")
-            return markers
-        
-        try:
-            for json_path in self.markers_dir.glob("*.json"):
-                try:
-                    with open(json_path, 'r', encoding='utf-8') as f:
-                        skill_data = json.load(f)
-                    
-                    skill_name = skill_data.get("skill_name", json_path.stem.capitalize())
-                    
-                    for level_data in skill_data.get("levels", {}).values():
-                        for marker in level_data:
-                            marker_copy = marker.copy()
-                            marker_copy["skill_name"] = skill_name
-                            markers[marker["id"]] = marker_copy
-                            
-                except json.JSONDecodeError as e:
-                    logger.error(f"Ошибка парсинга файла {json_path}: {e}")
-                except Exception as e:
-                    logger.error(f"Неожиданная ошибка при загрузке {json_path}: {e}")
-                    
-        except Exception as e:
-            logger.error(f"Критическая ошибка при загрузке маркеров: {e}")
-            
-        self._markers_cache = markers
-        return markers
+        self._markers_cache = load_portfolio_markers(self.markers_dir)
+        return self._markers_cache
     
-    def _create_portfolio_content(self, completed_markers: List[Dict]) -> List[str]:
+    def _create_portfolio_content(self, completed_markers: List[Dict], evidence: Optional[Dict[str, List[Dict]]] = None) -> List[str]:
+        evidence = evidence or {}
         by_skill = self._group_markers_by_skill(completed_markers)
         
         lines = [
@@ -114,8 +114,9 @@ class PortfolioGenerator:
         ]
         
         for skill_name in sorted(by_skill.keys()):
-            lines.append(f"### {skill_name}")
+            lines.append(f"### {self.overlay.skill_name(skill_name) if self.overlay else skill_name}")
             for marker in by_skill[skill_name]:
+                marker = self._localized(marker)
                 lines.append(f"- ✅ **{marker['marker']}**")
                 if marker.get("validation"):
                     lines.append(f" > 🔍 Валидация: {marker['validation']}")
@@ -126,6 +127,10 @@ class PortfolioGenerator:
                 methodology_author = marker.get("methodology_author", "Ekaterina Kudelya")
                 methodology_license = marker.get("methodology_license", "CC BY-ND 4.0")
                 lines.append(f" > 📋 Методология: © {methodology_author}, {methodology_license}")
+                for artifact in evidence.get(marker.get("id"), []):
+                    link = self._evidence_link(artifact)
+                    if link:
+                        lines.append(f" > 📎 Артефакт: {link}")
             lines.append("")
         
         lines.extend([
@@ -140,6 +145,23 @@ class PortfolioGenerator:
         
         return lines
     
+    def _localized(self, marker: Dict) -> Dict:
+        text = self.overlay.markers.get(marker.get("id"), {}) if self.overlay else {}
+        return {**marker, **{field: text[field] for field in MARKER_TEXT_FIELDS if text.get(field)}}
+    
+    def _evidence_link(self, artifact: Dict) -> Optional[str]:
+        name = artifact.get("name", "артефакт")
+        if artifact.get("kind") == KIND_LINK:
+            return f"[{name}]({artifact.get('url')})" if artifact.get("url") else None
+        
+        sha256 = artifact.get("sha256", "")
+        if sha256 not in self.evidence_store:
+            logger.warning(f"Артефакт {name} ({sha256[:12]}) отсутствует в хранилище")
+            return f"{name} (файл недоступен)"
+        # Ссылка относительно файла портфолио, чтобы она работала и в репозитории, и локально
+        target = os.path.relpath(self.evidence_store.object_path(sha256), self.output_file.parent)
+        return f"[{name}]({Path(target).as_posix()}) `sha256:{sha256[:12]}`"
+    
     def _group_markers_by_skill(self, markers: List[Dict]) -> Dict[str, List[Dict]]:
         grouped = {}
         for marker in markers:
@@ -148,12 +170,18 @@ class PortfolioGenerator:
         return grouped
     
     def _save_portfolio(self, content: List[str]) -> bool:
+        temp_path = None
         try:
             self.output_file.parent.mkdir(parents=True, exist_ok=True)
             portfolio_text = '\n'.join(content)
             
-            with open(self.output_file, 'w', encoding='utf-8') as f:
+            # Запись через временный файл: портфолио, открытое в UI во время генерации, не окажется обрезанным.
+            # Имя уникально: две задачи одного учащегося (устаревшая и новая) могут писать одновременно
+            fd, temp_path = tempfile.mkstemp(dir=self.output_file.parent, prefix=f".{self.output_file.name}.")
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
                 f.write(portfolio_text)
+            os.replace(temp_path, self.output_file)
+            temp_path = None
             
             print(f"✅ Портфолио сохранено: {self.output_file.absolute()}")
             logger.info(f"Портфолио успешно создано: {self.output_file}")
@@ -163,9 +191,13 @@ class PortfolioGenerator:
             logger.error(f"Ошибка при сохранении портфолио: {e}")
             print(f"⚠️ Ошибка записи: {e}")
             return False
+        finally:
+            if temp_path is not None and os.path.exists(temp_path):
+                os.unlink(temp_path)
 
-def generate_portfolio():
-    generator = PortfolioGenerator()
+def generate_portfolio(progress_file: str = "src/data/user_progress.json", output_file: str = "docs/my_portfolio.md",
+                       locale: Optional[str] = None):
+    generator = PortfolioGenerator(progress_file=progress_file, output_file=output_file, locale=locale)
     return generator.generate_portfolio()
 
 if __name__ == "__main__":
@@ -0,0 +1,236 @@
+"""
+Фоновая генерация портфолио: постоянная очередь задач на диске и ограниченный пул воркеров.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+
+Каждая задача — файл <jobs_dir>/<ID задачи>.json со статусом queued → running → done/failed,
+поэтому статус можно опрашивать из любой сессии, а незавершённые задачи переживают перезапуск.
+Портфолио пишется в отдельный файл учащегося: <output_dir>/<ID учащегося>[.<язык>].md.
+
+Повторный запрос того же учащегося и языка, пока задача ждёт в очереди, возвращает её же;
+если файл прогресса с тех пор не менялся, возвращается и выполняемая или готовая задача.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.core.analytics import format_timestamp, utc_now
+from src.core.locales import BASE_LOCALE, LOCALE_RE
+from src.core.sessions import USER_ID_RE
+from src.utils.portfolio_gen import PortfolioGenerator, load_portfolio_markers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DIR = "src/data/jobs/portfolio"
+DEFAULT_PORTFOLIO_DIR = "docs/portfolios"
+DEFAULT_WORKERS = 2
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+PENDING_STATUSES = (QUEUED, RUNNING)
+
+Job = Dict[str, Any]
+
+# Каталог загружается один раз на процесс-воркер
+_markers: Optional[Dict[str, Dict]] = None
+_markers_dir = ""
+
+
+def portfolio_path(user_id: str, locale: Optional[str] = None, output_dir: str = DEFAULT_PORTFOLIO_DIR) -> Path:
+    """Файл портфолио учащегося; ValueError для недопустимого ID или кода языка."""
+    if not USER_ID_RE.match(user_id) or user_id.startswith("."):
+        raise ValueError(f"Недопустимый ID пользователя: {user_id!r}")
+    if locale and locale != BASE_LOCALE:
+        if not LOCALE_RE.match(locale):
+            raise ValueError(f"Недопустимый код языка: {locale!r}")
+        return Path(output_dir) / f"{user_id}.{locale}.md"
+    return Path(output_dir) / f"{user_id}.md"
+
+
+def _progress_stamp(progress_file: str) -> Optional[List[int]]:
+    try:
+        stat = os.stat(progress_file)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _write_job(jobs_dir: Path, job: Job) -> None:
+    target = jobs_dir / f"{job['id']}.json"
+    tmp_file = jobs_dir / f".{job['id']}.json.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False)
+    os.replace(tmp_file, target)
+
+
+def _read_job(path: Path) -> Optional[Job]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            job = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Пропущен файл задачи {path}: {e}")
+        return None
+    return job if isinstance(job, dict) and "id" in job else None
+
+
+def _init_worker(markers_dir: str) -> None:
+    global _markers, _markers_dir
+    _markers = load_portfolio_markers(Path(markers_dir))
+    _markers_dir = markers_dir
+
+
+def run_job(job: Job, jobs_dir: str) -> Tuple[bool, Optional[str]]:
+    """Выполняет задачу в процессе-воркере: (успех, текст ошибки)."""
+    _write_job(Path(jobs_dir), dict(job, status=RUNNING, started_at=format_timestamp(utc_now())))
+    generator = PortfolioGenerator(markers_dir=_markers_dir, progress_file=job["progress_file"],
+                                   output_file=job["output_file"], locale=job["locale"], markers=_markers)
+    if generator.generate_portfolio():
+        return True, None
+    return False, "Нет выполненных маркеров или файл прогресса недоступен"
+
+
+class PortfolioJobQueue:
+    """Очередь задач генерации портфолио; не более workers задач выполняются одновременно."""
+
+    def __init__(self, jobs_dir: str = DEFAULT_JOBS_DIR, output_dir: str = DEFAULT_PORTFOLIO_DIR,
+                 markers_dir: str = "src/data/markers", workers: int = DEFAULT_WORKERS):
+        self.jobs_dir = Path(jobs_dir)
+        self.output_dir = output_dir
+        self.markers_dir = markers_dir
+        self.workers = workers
+        self._jobs: Dict[str, Job] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        # RLock: колбэк уже завершённой задачи выполняется сразу в add_done_callback под этой же блокировкой
+        self._lock = threading.RLock()
+
+    def start(self) -> "PortfolioJobQueue":
+        """Запускает пул и возвращает в очередь задачи, не завершённые до перезапуска."""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        resumed = 0
+        with self._lock:
+            if self._pool is not None:
+                return self
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                             initargs=(self.markers_dir,))
+            for path in sorted(self.jobs_dir.glob("*.json")):
+                job = _read_job(path)
+                if job is None:
+                    continue
+                self._jobs[job["id"]] = job
+                if job["status"] in PENDING_STATUSES:
+                    job["status"] = QUEUED
+                    self._dispatch(job)
+                    resumed += 1
+        if resumed:
+            logger.info(f"Возобновлено задач портфолио: {resumed}")
+        return self
+
+    def submit(self, user_id: str, progress_file: str, locale: Optional[str] = None) -> Job:
+        """Ставит генерацию в очередь или возвращает совпадающую задачу."""
+        locale = locale or BASE_LOCALE
+        output_file = portfolio_path(user_id, locale, self.output_dir)
+        stamp = _progress_stamp(progress_file)
+        with self._lock:
+            if self._pool is None:
+                raise RuntimeError("Очередь портфолио не запущена")
+            for job in self._user_jobs(user_id, locale):
+                if job["status"] == QUEUED:
+                    # Воркер мог уже взять задачу: тогда она читает прогресс на момент старта
+                    job["status"] = (_read_job(self.jobs_dir / f"{job['id']}.json") or job)["status"]
+                if job["status"] == QUEUED:
+                    return dict(job)
+                if stamp is not None and job["stamp"] == stamp and (
+                        job["status"] == RUNNING or (job["status"] == DONE and output_file.exists())):
+                    return dict(job)
+
+            job = {
+                "id": f"{time.time_ns() // 1_000_000:013d}-{uuid.uuid4().hex[:8]}",
+                "user_id": user_id,
+                "locale": locale,
+                "progress_file": str(progress_file),
+                "output_file": str(output_file),
+                "stamp": stamp,
+                "status": QUEUED,
+                "created_at": format_timestamp(utc_now()),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+            }
+            self._jobs[job["id"]] = job
+            self._dispatch(job)
+            return dict(job)
+
+    def _user_jobs(self, user_id: str, locale: str) -> List[Job]:
+        """Задачи учащегося и языка, новые первыми."""
+        jobs = [job for job in self._jobs.values() if job["user_id"] == user_id and job["locale"] == locale]
+        return sorted(jobs, key=lambda job: job["id"], reverse=True)
+
+    def _dispatch(self, job: Job) -> None:
+        _write_job(self.jobs_dir, job)
+        future = self._pool.submit(run_job, dict(job), str(self.jobs_dir))
+        future.add_done_callback(lambda f, job_id=job["id"]: self._finish(job_id, f))
+
+    def _finish(self, job_id: str, future: Future) -> None:
+        try:
+            ok, error = future.result()
+        except Exception as e:
+            ok, error = False, str(e)
+            logger.error(f"Задача портфолио {job_id} завершилась с ошибкой: {e}")
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            started = _read_job(self.jobs_dir / f"{job_id}.json") or {}
+            job.update(status=DONE if ok else FAILED, error=error, started_at=started.get("started_at"),
+                       finished_at=format_timestamp(utc_now()))
+            try:
+                _write_job(self.jobs_dir, job)
+            except OSError as e:
+                logger.error(f"Не удалось сохранить статус задачи {job_id}: {e}")
+            # Хранится только последняя завершённая задача учащегося и языка
+            for old in self._user_jobs(job["user_id"], job["locale"]):
+                if old["id"] < job_id and old["status"] not in PENDING_STATUSES:
+                    self._jobs.pop(old["id"], None)
+                    try:
+                        (self.jobs_dir / f"{old['id']}.json").unlink()
+                    except OSError:
+                        pass
+
+    def status(self, job_id: str) -> Optional[Job]:
+        """Текущее состояние задачи (с диска: статус running записывает воркер)."""
+        if not USER_ID_RE.match(job_id) or job_id.startswith("."):
+            return None
+        path = self.jobs_dir / f"{job_id}.json"
+        return _read_job(path) if path.exists() else None
+
+    def latest(self, user_id: str, locale: Optional[str] = None) -> Optional[Job]:
+        with self._lock:
+            jobs = self._user_jobs(user_id, locale or BASE_LOCALE)
+        return self.status(jobs[0]["id"]) if jobs else None
+
+    def stats(self) -> Dict[str, int]:
+        """{"pending": в очереди и выполняются, "done": готовы, "failed": с ошибкой}."""
+        counts = {"pending": 0, DONE: 0, FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts["pending" if job["status"] in PENDING_STATUSES else job["status"]] += 1
+        return counts
+
+    def close(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+
+__all__ = ['DEFAULT_PORTFOLIO_DIR', 'DONE', 'FAILED', 'PENDING_STATUSES', 'PortfolioJobQueue', 'QUEUED', 'RUNNING',
+           'portfolio_path', 'run_job']
@@ -0,0 +1,220 @@
+"""
+Параллельная проверка маркеров по локальным git-репозиториям учащихся.
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import hashlib
+import json
+import logging
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.core.verification import RepoSnapshot, evaluate, is_git_repo
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_FILE = ".cache/repo_verification.json"
+
+
+def collect_rules(markers: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """Правила проверки из каталога: ID маркера -> список правил (маркеры без правил пропускаются)."""
+    rules = {}
+    for skill_data in markers.values():
+        for level_markers in skill_data.levels.values():
+            for marker in level_markers:
+                marker_rules = getattr(marker, "verification", None)
+                if marker_rules:
+                    rules[marker.id] = marker_rules
+    return rules
+
+
+def rules_fingerprint(rules: Dict[str, List[Dict[str, Any]]]) -> str:
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def discover_repos(root: str, user_id: Optional[str] = None) -> Iterator[Tuple[Optional[str], str]]:
+    """
+    Находит репозитории: root/<ID учащегося>/<репозиторий> или root/<ID учащегося> как репозиторий.
+
+    Если root сам является репозиторием, он относится к учащемуся user_id (None — локальный прогресс).
+    """
+    root_path = Path(root)
+    if is_git_repo(root_path):
+        yield user_id, str(root_path)
+        return
+
+    for learner_dir in sorted(p for p in root_path.iterdir() if p.is_dir()):
+        if is_git_repo(learner_dir):
+            yield learner_dir.name, str(learner_dir)
+            continue
+        for repo_dir in sorted(p for p in learner_dir.iterdir() if p.is_dir()):
+            if is_git_repo(repo_dir):
+                yield learner_dir.name, str(repo_dir)
+
+
+def read_head(repo: str) -> Optional[str]:
+    """Хэш HEAD без запуска git: читаем .git/HEAD и ссылку (с запасным вариантом через git rev-parse)."""
+    git_dir = Path(repo) / ".git"
+    try:
+        head = (git_dir / "HEAD").read_text(encoding="utf-8").strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        ref_file = git_dir / ref
+        if ref_file.exists():
+            return ref_file.read_text(encoding="utf-8").strip()
+        packed = git_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text(encoding="utf-8").splitlines():
+                if line.endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    try:
+        return subprocess.run(["git", "-C", repo, "rev-parse", "HEAD"], capture_output=True, check=True,
+                              timeout=30).stdout.decode().strip()
+    except (subprocess.SubprocessError, OSError):
+        return None
+
+
+class VerificationCache:
+    """Результаты проверок по репозиториям; запись актуальна, пока не изменились HEAD и правила каталога."""
+
+    def __init__(self, cache_file: str = DEFAULT_CACHE_FILE):
+        self.cache_file = Path(cache_file)
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Кэш проверок репозиториев повреждён и будет пересоздан: {e}")
+            return {}
+
+    def get(self, repo: str, head: Optional[str], fingerprint: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(os.path.abspath(repo))
+        if entry and head and entry.get("head") == head and entry.get("rules") == fingerprint:
+            return entry
+        return None
+
+    def put(self, result: Dict[str, Any], fingerprint: str) -> None:
+        self._entries[os.path.abspath(result["repo"])] = {**result, "rules": fingerprint}
+
+    def save(self) -> bool:
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            tmp_file.replace(self.cache_file)
+            return True
+        except OSError as e:
+            logger.error(f"Ошибка сохранения кэша проверок: {e}")
+            return False
+
+
+def verify_repo(repo: str, rules: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """Проверяет все маркеры с правилами на одном репозитории (выполняется в процессе-воркере)."""
+    try:
+        snapshot = RepoSnapshot(repo)
+    except (subprocess.SubprocessError, OSError) as e:
+        return {"repo": repo, "head": None, "error": f"не удалось прочитать репозиторий: {e}", "markers": {}}
+    return {
+        "repo": repo,
+        "head": snapshot.head,
+        "error": None,
+        "markers": {marker_id: evaluate(snapshot, marker_rules) for marker_id, marker_rules in rules.items()},
+    }
+
+
+def _verify_repo_args(args: Tuple[str, Dict[str, List[Dict[str, Any]]]]) -> Dict[str, Any]:
+    return verify_repo(*args)
+
+
+def verify_repos(repos: Iterable[Tuple[str, str]], markers: Dict[str, Any], workers: Optional[int] = None,
+                 cache: Optional[VerificationCache] = None) -> Dict[str, Any]:
+    """
+    Проверяет репозитории в пуле процессов; репозитории с неизменным HEAD берутся из кэша.
+
+    Возвращает {"repos": [...], "checked": N, "cached": M, "passed": {ID учащегося: {ID маркера: репозиторий}}}.
+    """
+    rules = collect_rules(markers)
+    fingerprint = rules_fingerprint(rules)
+    owners: Dict[str, str] = {}
+    results: List[Dict[str, Any]] = []
+    to_check: List[str] = []
+
+    for user_id, repo in repos:
+        owners[repo] = user_id
+        cached = cache.get(repo, read_head(repo), fingerprint) if cache is not None else None
+        if cached is not None:
+            results.append({**cached, "repo": repo, "cached": True})
+        else:
+            to_check.append(repo)
+
+    if to_check and rules:
+        workers = min(workers or os.cpu_count() or 1, len(to_check))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_verify_repo_args, ((repo, rules) for repo in to_check), chunksize=4):
+                if cache is not None and result["head"]:
+                    cache.put(result, fingerprint)
+                results.append({**result, "cached": False})
+        if cache is not None:
+            cache.save()
+
+    passed: Dict[str, Dict[str, str]] = {}
+    for result in results:
+        result["user_id"] = owners[result["repo"]]
+        for marker_id, outcome in result["markers"].items():
+            if outcome["passed"]:
+                passed.setdefault(result["user_id"], {}).setdefault(marker_id, result["repo"])
+
+    return {
+        "repos": results,
+        "checked": sum(1 for r in results if not r["cached"]),
+        "cached": sum(1 for r in results if r["cached"]),
+        "passed": passed,
+    }
+
+
+def propose_completions(report: Dict[str, Any], completed_by_user: Dict[str, Iterable[str]]) -> Dict[str, Dict[str, str]]:
+    """Маркеры, подтверждённые репозиториями, но ещё не отмеченные учащимся: {ID учащегося: {ID маркера: репозиторий}}."""
+    proposals = {}
+    for user_id, markers in report["passed"].items():
+        completed = set(completed_by_user.get(user_id, ()))
+        new = {marker_id: repo for marker_id, repo in sorted(markers.items()) if marker_id not in completed}
+        if new:
+            proposals[user_id] = new
+    return proposals
+
+
+def format_report(report: Dict[str, Any], proposals: Dict[str, Dict[str, str]]) -> List[str]:
+    lines = [
+        "🔎 ПРОВЕРКА РЕПОЗИТОРИЕВ",
+        "-" * 50,
+        f"Репозиториев: {len(report['repos'])} • проверено: {report['checked']} • из кэша (HEAD не менялся): {report['cached']}",
+    ]
+    for result in report["repos"]:
+        if result["error"]:
+            lines.append(f"⚠️ {result['repo']}: {result['error']}")
+
+    if not proposals:
+        lines.extend(["", "ℹ️ Новых подтверждённых маркеров нет"])
+        return lines
+
+    lines.extend(["", "✅ Предлагается отметить выполненными:"])
+    for user_id, markers in proposals.items():
+        for marker_id, repo in markers.items():
+            lines.append(f"• {user_id or 'локальный прогресс'}: {marker_id} ({repo})")
+    return lines
+
+
+__all__ = ['collect_rules', 'discover_repos', 'verify_repos', 'propose_completions', 'format_report',
+           'VerificationCache', 'read_head']
@@ -0,0 +1,259 @@
+"""
+Сопоставление требований вакансий с маркерами каталога (TF-IDF).
+Методология "Объективные маркеры компетенций"
+© 2025 Ekaterina Kudelya. CC BY-ND 4.0
+"""
+import hashlib
+import json
+import logging
+import math
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+DEFAULT_THRESHOLD = 0.2
+DEFAULT_CORPUS_DIR = "examples/vacancies"  # примеры вакансий из репозитория
+
+_TOKEN_RE = re.compile(r"[a-zа-яё0-9][a-zа-яё0-9+#]*")
+_CYRILLIC_RE = re.compile(r"[а-яё]")
+_REQUIREMENT_SPLIT_RE = re.compile(r"[\n;•·]+|(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "и в во на с со по для или от до не из к а о об что как это the and of to in for with on a an or be".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in _TOKEN_RE.findall(text.lower()):
+        if token in _STOPWORDS or len(token) < 2:
+            continue
+        if _CYRILLIC_RE.search(token):
+            # Грубый стемминг: отбрасываем окончания длинных русских слов
+            token = token[:6]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def split_requirements(text: str) -> List[str]:
+    parts = (part.strip(" -*\t") for part in _REQUIREMENT_SPLIT_RE.split(text))
+    return [part for part in parts if len(tokenize(part)) >= 2]
+
+
+def iter_postings(corpus_dir: str) -> Iterator[Dict[str, Any]]:
+    """Читает вакансии из *.txt (первая строка — заголовок) и *.json (объект или список объектов)."""
+    for path in sorted(Path(corpus_dir).rglob("*")):
+        if path.suffix == ".txt":
+            try:
+                text = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError) as e:
+                logger.error(f"Ошибка чтения вакансии {path}: {e}")
+                continue
+            lines = [line.strip() for line in text.splitlines() if line.strip()]
+            yield {"id": path.stem, "title": lines[0] if lines else path.stem,
+                   "requirements": split_requirements("\n".join(lines[1:]))}
+        elif path.suffix == ".json":
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, UnicodeDecodeError, json.JSONDecodeError) as e:
+                logger.error(f"Ошибка чтения вакансии {path}: {e}")
+                continue
+            for i, posting in enumerate(data if isinstance(data, list) else [data]):
+                if not isinstance(posting, dict):
+                    logger.warning(f"Пропущена вакансия #{i} в {path}: ожидался объект, получено {type(posting).__name__}")
+                    continue
+                requirements = posting.get("requirements")
+                if not isinstance(requirements, list):
+                    text = requirements or posting.get("text") or posting.get("description")
+                    requirements = split_requirements(text) if isinstance(text, str) else []
+                yield {"id": str(posting.get("id", f"{path.stem}_{i}")),
+                       "title": posting.get("title", path.stem),
+                       "requirements": [r for r in requirements if isinstance(r, str)]}
+
+
+def marker_document(skill_name: str, marker: Any) -> str:
+    smart = marker.smart_criteria or {}
+    return " ".join([skill_name, skill_name, marker.marker, marker.validation, smart.get("specific", "")])
+
+
+def _tfidf_matrix(token_lists: List[List[str]], vocabulary: Dict[str, int], idf: np.ndarray) -> sparse.csr_matrix:
+    indptr = [0]
+    indices: List[int] = []
+    values: List[float] = []
+    for tokens in token_lists:
+        counts = Counter(vocabulary[t] for t in tokens if t in vocabulary)
+        indices.extend(counts.keys())
+        values.extend(1.0 + math.log(c) for c in counts.values())
+        indptr.append(len(indices))
+
+    matrix = sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(token_lists), len(vocabulary))
+    )
+    matrix = matrix.multiply(idf).tocsr()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr().astype(np.float32)
+
+
+class VacancyMatcher:
+    def __init__(self, markers: Dict[str, Any], corpus_dir: str = DEFAULT_CORPUS_DIR,
+                 cache_dir: str = ".cache/vacancies", threshold: float = DEFAULT_THRESHOLD):
+        self.markers = markers
+        self.corpus_dir = Path(corpus_dir)
+        self.cache_dir = Path(cache_dir)
+        self.threshold = threshold
+        self.model: Optional[Dict[str, np.ndarray]] = None
+
+    def _fingerprint(self) -> str:
+        digest = hashlib.sha256(f"v{MODEL_VERSION}".encode())
+        for skill_name, skill_data in self.markers.items():
+            for level_markers in skill_data.levels.values():
+                for marker in level_markers:
+                    digest.update(f"{marker.id}\0{marker_document(skill_name, marker)}\0".encode())
+        for path in sorted(self.corpus_dir.rglob("*")):
+            if path.suffix in (".txt", ".json"):
+                stat = path.stat()
+                digest.update(f"{path.relative_to(self.corpus_dir)}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode())
+        return digest.hexdigest()[:16]
+
+    def _corpus_key(self) -> str:
+        """Ключ корпуса в имени файла кэша: у разных корпусов в одной директории кэша свои модели."""
+        return hashlib.sha256(str(self.corpus_dir.resolve()).encode("utf-8")).hexdigest()[:8]
+
+    def build(self) -> "VacancyMatcher":
+        """Загружает модель из кэша или обучает её заново, если изменились вакансии или каталог."""
+        corpus_key = self._corpus_key()
+        cache_file = self.cache_dir / f"vacancy_model_{corpus_key}_{self._fingerprint()}.npz"
+        if cache_file.exists():
+            with np.load(cache_file, allow_pickle=False) as data:
+                self.model = {key: data[key] for key in data.files}
+            logger.info(f"Модель вакансий загружена из кэша: {cache_file}")
+            return self
+
+        self.model = self._fit()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.glob(f"vacancy_model_{corpus_key}_*.npz"):
+            stale.unlink()
+        np.savez_compressed(cache_file, **self.model)
+        logger.info(f"Модель вакансий сохранена: {cache_file}")
+        return self
+
+    def _fit(self) -> Dict[str, np.ndarray]:
+        marker_ids, marker_tokens = [], []
+        for skill_name, skill_data in self.markers.items():
+            for level_markers in skill_data.levels.values():
+                for marker in level_markers:
+                    marker_ids.append(marker.id)
+                    marker_tokens.append(tokenize(marker_document(skill_name, marker)))
+
+        posting_ids, posting_titles, requirements, posting_of_req = [], [], [], []
+        for posting in iter_postings(str(self.corpus_dir)):
+            posting_ids.append(posting["id"])
+            posting_titles.append(posting["title"])
+            for requirement in posting["requirements"]:
+                requirements.append(requirement)
+                posting_of_req.append(len(posting_ids) - 1)
+        requirement_tokens = [tokenize(r) for r in requirements]
+
+        document_frequency = Counter()
+        for tokens in marker_tokens + requirement_tokens:
+            document_frequency.update(set(tokens))
+        vocabulary = {token: i for i, token in enumerate(sorted(document_frequency))}
+        documents = len(marker_tokens) + len(requirement_tokens)
+        idf = np.asarray([math.log((1 + documents) / (1 + document_frequency[t])) + 1.0 for t in vocabulary],
+                         dtype=np.float32)
+
+        marker_matrix = _tfidf_matrix(marker_tokens, vocabulary, idf)
+        requirement_matrix = _tfidf_matrix(requirement_tokens, vocabulary, idf)
+        best_marker, best_score = self._best_matches(requirement_matrix, marker_matrix)
+
+        logger.info(f"Модель вакансий обучена: {len(posting_ids)} вакансий, {len(requirements)} требований, "
+                    f"{len(marker_ids)} маркеров")
+        return {
+            "vocabulary": np.asarray(list(vocabulary), dtype=str),
+            "idf": idf,
+            "marker_ids": np.asarray(marker_ids, dtype=str),
+            "marker_data": marker_matrix.data,
+            "marker_indices": marker_matrix.indices,
+            "marker_indptr": marker_matrix.indptr,
+            "posting_ids": np.asarray(posting_ids, dtype=str),
+            "posting_titles": np.asarray(posting_titles, dtype=str),
+            "requirements": np.asarray(requirements, dtype=str),
+            "posting_of_req": np.asarray(posting_of_req, dtype=np.int32),
+            "best_marker": best_marker,
+            "best_score": best_score,
+        }
+
+    @staticmethod
+    def _best_matches(requirement_matrix: sparse.csr_matrix, marker_matrix: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        if requirement_matrix.shape[0] == 0 or marker_matrix.shape[0] == 0:
+            return np.zeros(requirement_matrix.shape[0], dtype=np.int32), np.zeros(requirement_matrix.shape[0], dtype=np.float32)
+        similarity = requirement_matrix.dot(marker_matrix.T).tocsr()
+        best_marker = np.asarray(similarity.argmax(axis=1)).ravel().astype(np.int32)
+        best_score = similarity.max(axis=1).toarray().ravel().astype(np.float32)
+        return best_marker, best_score
+
+    def _require_model(self) -> Dict[str, np.ndarray]:
+        if self.model is None:
+            self.build()
+        return self.model
+
+    def match_text(self, text: str) -> List[Tuple[str, Optional[str], float]]:
+        """Сопоставляет требования произвольного текста вакансии с маркерами: (требование, id, оценка)."""
+        model = self._require_model()
+        requirements = split_requirements(text)
+        vocabulary = {token: i for i, token in enumerate(model["vocabulary"].tolist())}
+        marker_matrix = sparse.csr_matrix(
+            (model["marker_data"], model["marker_indices"], model["marker_indptr"]),
+            shape=(len(model["marker_ids"]), len(vocabulary))
+        )
+        requirement_matrix = _tfidf_matrix([tokenize(r) for r in requirements], vocabulary, model["idf"])
+        best_marker, best_score = self._best_matches(requirement_matrix, marker_matrix)
+        return [
+            (requirement, str(model["marker_ids"][m]) if s >= self.threshold else None, float(s))
+            for requirement, m, s in zip(requirements, best_marker, best_score)
+        ]
+
+    def coverage(self, completed_markers: Iterable[str], top_missing: int = 5) -> Dict[str, Any]:
+        """Покрытие требований вакансий выполненными маркерами: по каждой вакансии и по всему корпусу."""
+        model = self._require_model()
+        completed = set(completed_markers)
+        marker_done = np.fromiter((m in completed for m in model["marker_ids"].tolist()), dtype=bool,
+                                  count=len(model["marker_ids"]))
+        postings = len(model["posting_ids"])
+
+        matched = model["best_score"] >= self.threshold
+        covered = matched & marker_done[model["best_marker"]] if len(marker_done) else matched & False
+        matched_per_posting = np.bincount(model["posting_of_req"], weights=matched, minlength=postings)
+        covered_per_posting = np.bincount(model["posting_of_req"], weights=covered, minlength=postings)
+        posting_coverage = np.divide(covered_per_posting, matched_per_posting,
+                                     out=np.zeros(postings), where=matched_per_posting > 0)
+
+        missing = np.bincount(model["best_marker"][matched & ~covered], minlength=len(model["marker_ids"]))
+        top = np.argsort(-missing, kind="stable")[:top_missing]
+        relevant = matched_per_posting > 0
+
+        return {
+            "overall": float(covered.sum() / matched.sum() * 100) if matched.any() else 0.0,
+            "average_posting": float(posting_coverage[relevant].mean() * 100) if relevant.any() else 0.0,
+            "postings": [
+                {"id": str(pid), "title": str(title), "coverage": float(cov * 100),
+                 "matched": int(m), "covered": int(c)}
+                for pid, title, cov, m, c in zip(model["posting_ids"], model["posting_titles"], posting_coverage,
+                                                 matched_per_posting, covered_per_posting)
+            ],
+            "top_missing": [(str(model["marker_ids"][i]), int(missing[i])) for i in top if missing[i] > 0],
+        }
+
+
+__all__ = ['DEFAULT_CORPUS_DIR', 'VacancyMatcher', 'iter_postings', 'split_requirements', 'tokenize']
@@ -0,0 +1,72 @@
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.tracker import CareerTracker
+
+
+NOW = datetime(2025, 3, 12, 12, 0, tzinfo=timezone.utc)
+
+
+def _event(marker_id, event, moment):
+    return {"marker_id": marker_id, "event": event, "timestamp": moment.isoformat()}
+
+
+def test_mark_completed_records_timestamped_history():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress_file = Path(temp_dir) / "progress.json"
+        tracker = CareerTracker(progress_file=str(progress_file))
+
+        assert tracker.mark_in_progress("docker_1_1")
+        assert tracker.mark_completed("docker_1_1")
+
+        with open(progress_file, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        assert [e["event"] for e in saved["history"]] == ["in_progress", "completed"]
+        assert saved["in_progress_markers"] == []
+        assert tracker.analytics.skill_velocity("Docker") == 0.25
+
+        reloaded = CareerTracker(progress_file=str(progress_file))
+        assert reloaded.analytics.completed_at.keys() == {"docker_1_1"}
+
+
+def test_velocity_and_eta_from_history():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress_file = Path(temp_dir) / "progress.json"
+        history = [
+            _event("python_1_1", "in_progress", NOW - timedelta(days=5, hours=6)),
+            _event("python_1_1", "completed", NOW - timedelta(days=5)),
+            _event("python_1_2", "completed", NOW - timedelta(days=2)),
+            _event("git_1_1", "completed", NOW - timedelta(days=1)),
+        ]
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump({"completed_markers": ["python_1_1", "python_1_2", "git_1_1"],
+                       "in_progress_markers": [], "history": history}, f)
+
+        analytics = CareerTracker(progress_file=str(progress_file)).analytics
+
+        assert analytics.completions_per_week(weeks=2, now=NOW) == [("2025-W10", 1), ("2025-W11", 2)]
+        assert analytics.skill_velocity("Python", weeks=2, now=NOW) == 1.0
+        # python_1_1: 6 часов фактически против time_bound "2-3 часа"
+        assert analytics.pace_factor == 2.0
+
+        eta = analytics.eta("Python", now=NOW)
+        assert eta["remaining_count"] == 2
+        assert eta["nominal"] == timedelta(weeks=3)
+        assert eta["eta"] == NOW + timedelta(weeks=6)
+        assert analytics.eta("Python", level="1", now=NOW)["remaining_count"] == 0
+
+
+def test_eta_counts_legacy_completions_without_history():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress_file = Path(temp_dir) / "progress.json"
+        python_ids = ["python_1_1", "python_1_2", "python_2_1", "python_3_1"]
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump({"completed_markers": python_ids, "in_progress_markers": []}, f)
+
+        tracker = CareerTracker(progress_file=str(progress_file))
+        eta = tracker.analytics.eta("Python", now=NOW, completed=tracker.progress["completed_markers"])
+        assert eta["remaining_count"] == 0 and eta["eta"] == NOW
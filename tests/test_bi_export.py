@@ -0,0 +1,101 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.utils import bi_export
+from src.utils.bi_export import export_all, resolve_format
+
+
+def _write_progress(path, history):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"completed_markers": [], "in_progress_markers": [], "history": history}, f)
+
+
+def _event(marker_id, event="completed"):
+    return {"marker_id": marker_id, "event": event, "timestamp": "2025-01-01T10:00:00Z"}
+
+
+def _read_parts(output, pattern):
+    rows = []
+    for part in sorted((output / "events").glob(pattern)):
+        with gzip.open(part, 'rt', encoding='utf-8', newline='') as f:
+            rows.extend(csv.DictReader(f) if part.name.endswith(".csv.gz") else map(json.loads, f))
+    return rows
+
+
+def test_incremental_export_writes_only_new_events():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        users, output = root / "users", root / "exports"
+        users.mkdir()
+        _write_progress(users / "alice.json", [_event("python_1_1"), _event("python_1_2", "in_progress")])
+        _write_progress(users / "bob.json", [_event("python_1_1"), {"event": "broken"}])
+        (users / "broken.json").write_text("{", encoding="utf-8")
+
+        first = export_all(str(users), output_dir=str(output), fmt="csv", workers=1, batch_size=1, row_group_size=2)
+        assert (first["learners"], first["invalid"], first["events"]) == (2, 1, 3)
+        with gzip.open(output / "markers.csv.gz", 'rt', encoding='utf-8') as f:
+            markers = list(csv.DictReader(f))
+        assert first["markers"] == len(markers) and {"marker_id", "skill_name", "level", "priority"} <= set(markers[0])
+        assert sorted((r["user_id"], r["seq"]) for r in _read_parts(output, "*.csv.gz")) == [
+            ("alice", "0"), ("alice", "1"), ("bob", "0")]
+
+        for path in users.iterdir():
+            os.utime(path, (time.time() - 100, time.time() - 100))
+        again = export_all(str(users), output_dir=str(output), fmt="csv", workers=1)
+        assert again["incremental"] and again["events"] == 0 and again["unchanged"] == 2
+        assert again["events_file"] is None
+
+        _write_progress(users / "alice.json", [_event("python_1_1"), _event("python_1_2", "in_progress"),
+                                               _event("python_1_2")])
+        third = export_all(str(users), output_dir=str(output), fmt="csv", workers=1)
+        assert third["events"] == 1
+        rows = _read_parts(output, Path(third["events_file"]).name)
+        assert [(r["user_id"], r["seq"], r["marker_id"], r["event"]) for r in rows] == [
+            ("alice", "2", "python_1_2", "completed")]
+
+        full = export_all(str(users), output_dir=str(output), fmt="jsonl", workers=1)
+        assert not full["incremental"] and full["events"] == 4
+        assert [p.name for p in (output / "events").iterdir()] == [Path(full["events_file"]).name]
+        assert len(_read_parts(output, "*.jsonl.gz")) == 4
+
+
+def test_same_named_files_and_interrupted_run_are_exported_once(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        users, output = root / "users", root / "exports"
+        (users / "a").mkdir(parents=True)
+        (users / "b").mkdir()
+        _write_progress(users / "a" / "alice.json", [_event("python_1_1")])
+        _write_progress(users / "b" / "alice.json", [_event("python_1_1"), _event("python_1_2")])
+        export_all(str(users), output_dir=str(output), fmt="csv", workers=1)
+
+        _write_progress(users / "a" / "alice.json", [_event("python_1_1"), _event("python_1_2")])
+
+        def crash(output_dir, state):
+            raise RuntimeError("сбой после публикации части")
+
+        with monkeypatch.context() as m:
+            m.setattr(bi_export, "_save_state", crash)
+            with pytest.raises(RuntimeError):
+                export_all(str(users), output_dir=str(output), fmt="csv", workers=1)
+        assert len(list((output / "events").iterdir())) == 2
+
+        retry = export_all(str(users), output_dir=str(output), fmt="csv", workers=1)
+        assert retry["events"] == 1
+        assert sorted((r["user_id"], r["seq"]) for r in _read_parts(output, "*.csv.gz")) == [
+            ("alice", "0"), ("alice", "0"), ("alice", "1"), ("alice", "1")]
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        resolve_format("xlsx")
+    assert resolve_format("auto") in ("parquet", "csv")
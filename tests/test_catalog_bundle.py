@@ -0,0 +1,83 @@
+import io
+import os
+import subprocess
+import tempfile
+import zipfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.core.catalog_bundle import CatalogBundleError, read_catalog_bundle, write_catalog_bundle
+from src.core.tracker import CareerTracker, load_catalog
+from src.core.mapped_catalog import write_mapped_catalog
+from src.core.validator import validate_catalog
+from src.utils.portfolio_gen import load_portfolio_markers
+
+
+def test_bundle_roundtrip_matches_directory_catalog():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_catalog_bundle("src/data/markers", str(Path(temp_dir) / "catalog.zip"), version="2025.1")
+
+        bundle = read_catalog_bundle(str(path))
+        assert bundle["version"] == "2025.1"
+        assert len(bundle["skills"]) == len(list(Path("src/data/markers").glob("*.json")))
+        assert load_catalog(str(path)) == load_catalog("src/data/markers")
+        assert validate_catalog(str(path)) == []
+
+        tracker = CareerTracker(markers_dir=str(path), progress_file=str(Path(temp_dir) / "progress.json"))
+        assert tracker.mark_completed("docker_1_1")
+
+
+def test_portfolio_markers_from_any_catalog_source():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        expected = load_portfolio_markers(Path("src/data/markers"))
+        bundle = write_catalog_bundle("src/data/markers", str(Path(temp_dir) / "catalog.zip"))
+        mapped = write_mapped_catalog(load_catalog("src/data/markers"), str(Path(temp_dir) / "catalog.cmap"))
+
+        assert expected["docker_1_1"]["skill_name"] == "Docker"
+        assert load_portfolio_markers(bundle) == expected
+        assert load_portfolio_markers(mapped) == expected
+
+
+def test_tampered_bundle_is_rejected():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_catalog_bundle("src/data/markers", str(Path(temp_dir) / "catalog.zip"))
+        tampered = Path(temp_dir) / "tampered.zip"
+        with zipfile.ZipFile(path) as source, zipfile.ZipFile(tampered, 'w') as target:
+            for info in source.infolist():
+                data = source.read(info)
+                if info.filename == "markers/git.json":
+                    data = data.replace(b'"high"', b'"low"', 1)
+                target.writestr(info, data)
+
+        with pytest.raises(CatalogBundleError, match="git.json"):
+            read_catalog_bundle(str(tampered))
+        assert load_catalog(str(tampered)) == {}
+
+
+def test_default_catalog_falls_back_to_packaged_bundle(monkeypatch):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_catalog_bundle("src/data/markers", str(Path(temp_dir) / "catalog.zip"), version="packaged")
+        payload = path.read_bytes()
+        monkeypatch.setattr("src.core.tracker.open_packaged_bundle", lambda: io.BytesIO(payload))
+        monkeypatch.chdir(temp_dir)
+
+        markers = load_catalog()
+        assert "Docker" in markers and "Git" in markers
+
+
+def test_built_package_loads_bundled_catalog_outside_repo():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        build_lib = Path(temp_dir) / "lib"
+        subprocess.run([sys.executable, "setup.py", "-q", "build_py", "--build-lib", str(build_lib)],
+                       check=True, capture_output=True)
+        assert (build_lib / "src" / "data" / "catalog.zip").is_file()
+
+        # Запуск не из корня репозитория: src/data/markers не найден, каталог берётся из архива пакета
+        env = dict(os.environ, PYTHONPATH=str(build_lib))
+        script = "from src.core.tracker import load_catalog; print(sum(1 for _ in load_catalog()))"
+        result = subprocess.run([sys.executable, "-c", script], cwd=temp_dir, env=env, check=True,
+                                capture_output=True, text=True)
+        assert int(result.stdout.strip()) == len(load_catalog("src/data/markers"))
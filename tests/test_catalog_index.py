@@ -0,0 +1,46 @@
+import json
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.core.tracker import CareerTracker
+
+
+@pytest.fixture
+def tracker():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress_file = Path(temp_dir) / "progress.json"
+        with open(progress_file, 'w', encoding='utf-8') as f:
+            json.dump({"completed_markers": ["python_1_1", "docker_1_1"],
+                       "in_progress_markers": ["python_2_1", "docker_1_1"]}, f)
+        yield CareerTracker(progress_file=str(progress_file))
+
+
+def test_query_filters_and_status(tracker):
+    assert [e.marker.id for e in tracker.query(skill="Python", status="remaining")] == \
+        ["python_1_2", "python_2_1", "python_3_1"]
+    assert [e.marker.id for e in tracker.query(skill="Python", level="1", priority="high")] == ["python_1_1"]
+    assert [e.marker.id for e in tracker.query(status="in_progress")] == ["python_2_1"]
+    assert tracker.count(status="completed") == 2
+    assert list(tracker.query(skill="Unknown")) == []
+
+    with pytest.raises(ValueError):
+        list(tracker.query(status="done"))
+
+
+def test_query_pagination_is_stable(tracker):
+    all_high = [e.marker.id for e in tracker.query(priority="high", status="remaining")]
+    pages = [[e.marker.id for e in tracker.query(priority="high", status="remaining", limit=4, offset=offset)]
+             for offset in range(0, len(all_high), 4)]
+    assert [marker_id for page in pages for marker_id in page] == all_high
+    assert "python_1_1" not in all_high
+
+
+def test_skill_progress_uses_index(tracker):
+    progress = tracker.get_skill_progress("Python")
+    assert progress["completed_markers"] == ["python_1_1"]
+    assert progress["total_count"] == 4
+    assert tracker._marker_exists("qa_1_2") and not tracker._marker_exists("qa_9_9")
@@ -0,0 +1,63 @@
+import json
+import shutil
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.tracker import load_catalog
+from src.utils.catalog_migration import diff_catalogs, migrate_progress
+
+
+def _restructure(catalog_dir: Path) -> None:
+    path = catalog_dir / "git.json"
+    data = json.loads(path.read_text(encoding='utf-8'))
+    basic, advanced = data["levels"]["1"]
+    basic["id"] = "git_basics_1"
+    advanced["id"] = "git_new_1"
+    advanced["marker"] = "Настроил подпись коммитов GPG-ключом"
+    advanced["validation"] = "Подписанные коммиты в репозитории"
+    advanced["smart_criteria"] = {}
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+
+
+def test_diff_and_parallel_migration():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        new_dir = root / "markers_v2"
+        shutil.copytree("src/data/markers", new_dir)
+        _restructure(new_dir)
+
+        mapping = diff_catalogs(load_catalog("src/data/markers"), load_catalog(str(new_dir)))
+        assert mapping["renamed"] == {"git_1_1": "git_basics_1"}
+        assert mapping["removed"] == ["git_1_2"]
+        assert mapping["added"] == ["git_new_1"]
+        assert mapping["from_version"] != mapping["to_version"]
+
+        users = root / "users"
+        users.mkdir()
+        for i in range(12):
+            progress = {"completed_markers": ["git_1_1", "python_1_1"], "in_progress_markers": ["git_1_2"],
+                        "history": [{"marker_id": "git_1_1", "event": "completed", "timestamp": "2025-03-01T10:00:00+00:00"}]}
+            (users / f"learner_{i}.json").write_text(json.dumps(progress), encoding='utf-8')
+        foreign = {"completed_markers": ["git_1_1"], "in_progress_markers": [], "history": [],
+                   "catalog_version": "0123456789abcdef"}
+        (users / "foreign.json").write_text(json.dumps(foreign), encoding='utf-8')
+
+        dry = migrate_progress(str(users), mapping, workers=2, batch_size=5)
+        assert dry["changed_files"] == 12 and dry["other_version"] == 1
+        assert dry["renamed"]["git_1_1"] == 12
+        assert dry["orphaned"]["git_1_2"] == 12
+        assert "git_1_1" in (users / "learner_0.json").read_text(encoding='utf-8')
+
+        applied = migrate_progress(str(users), mapping, dry_run=False, workers=2, batch_size=5)
+        assert applied["changed_files"] == 12
+        data = json.loads((users / "learner_3.json").read_text(encoding='utf-8'))
+        assert data["completed_markers"] == ["git_basics_1", "python_1_1"]
+        assert data["history"][0]["marker_id"] == "git_basics_1"
+        assert data["catalog_version"] == mapping["to_version"]
+
+        again = migrate_progress(str(users), mapping, dry_run=False, workers=2)
+        assert again["up_to_date"] == 12 and again["changed_files"] == 0 and again["other_version"] == 1
+        # Прогресс другой версии каталога не трогается
+        assert json.loads((users / "foreign.json").read_text(encoding='utf-8'))["completed_markers"] == ["git_1_1"]
@@ -0,0 +1,32 @@
+import json
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.utils.cohort import aggregate_cohort, build_report
+
+
+def test_aggregate_cohort_over_directory_tree():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for i in range(30):
+            learner_dir = root / f"group_{i % 3}"
+            learner_dir.mkdir(exist_ok=True)
+            completed = ["python_1_1", "python_1_2"] if i % 2 else ["python_1_1"]
+            with open(learner_dir / f"learner_{i}.json", 'w', encoding='utf-8') as f:
+                json.dump({"completed_markers": completed + ["removed_1_1"],
+                           "in_progress_markers": ["docker_1_1"]}, f)
+        (root / "broken.json").write_text("{not json", encoding='utf-8')
+
+        report = build_report(aggregate_cohort(temp_dir, workers=2, batch_size=4))
+
+        assert report["files"] == 31
+        assert report["learners"] == 30
+        assert report["invalid_files"] == 1
+        assert report["unknown_markers"] == 30
+        assert report["skills"]["Python"]["completed_markers"] == 45
+        assert report["skills"]["Python"]["p50"] == 25.0
+        assert report["skills"]["Python"]["p90"] == 50.0
+        assert report["skills"]["Docker"]["p90"] == 0.0
+        assert report["top_stuck"] == [("docker_1_1", 30)]
@@ -0,0 +1,74 @@
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.events import COMPLETED, EventBus, FileEventBus, IN_PROGRESS_CHANGED, ProgressChange, UNCOMPLETED
+from src.core.sessions import SessionManager
+from src.core.tracker import CareerTracker
+
+
+def test_in_process_subscription():
+    bus = EventBus()
+    received = []
+    unsubscribe = bus.subscribe(received.append, kinds=[COMPLETED, UNCOMPLETED])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tracker = CareerTracker(progress_file=str(Path(temp_dir) / "anna.json"), event_bus=bus)
+        tracker.mark_in_progress("git_1_1")
+        tracker.mark_completed("git_1_1")
+        tracker.mark_uncompleted("git_1_1")
+        unsubscribe()
+        tracker.mark_completed("git_1_2")
+
+    assert [(c.kind, c.user_id, c.marker_id) for c in received] == [
+        (COMPLETED, "anna", "git_1_1"), (UNCOMPLETED, "anna", "git_1_1")
+    ]
+
+
+def test_file_bus_updates_cached_session_incrementally():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        events_file = str(Path(temp_dir) / "events.jsonl")
+        progress_dir = Path(temp_dir) / "users"
+
+        web_bus = FileEventBus(events_file)
+        manager = SessionManager(progress_dir=str(progress_dir), event_bus=web_bus)
+        session = manager.get("anna")
+        changes = []
+        web_bus.subscribe(changes.append, user_id="anna")
+
+        cli = CareerTracker(progress_file=str(progress_dir / "anna.json"), event_bus=FileEventBus(events_file))
+        cli.mark_in_progress("docker_1_2")
+        cli.mark_completed("docker_1_1")
+
+        web_bus.start(interval=0.05)
+        deadline = time.time() + 5
+        while len(changes) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        web_bus.stop()
+
+        assert [c.kind for c in changes] == [IN_PROGRESS_CHANGED, COMPLETED]
+        assert session.progress["completed_markers"] == ["docker_1_1"]
+        assert session.progress["in_progress_markers"] == ["docker_1_2"]
+        assert session.analytics.completed_at.keys() == {"docker_1_1"}
+        assert manager.stats()["misses"] == 1
+        assert web_bus.poll() == []
+
+
+def test_file_bus_rotates_journal_without_losing_events():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        events_file = str(Path(temp_dir) / "events.jsonl")
+        cli_bus = FileEventBus(events_file, max_bytes=600)
+        web_bus = FileEventBus(events_file)
+        received = []
+
+        for i in range(30):
+            cli_bus.publish(ProgressChange(kind=COMPLETED, user_id="anna", marker_id=f"m{i}"))
+            if i % 2:
+                received.extend(change.marker_id for change in web_bus.poll())
+
+        assert received == [f"m{i}" for i in range(30)]
+        assert Path(events_file).stat().st_size < 600
+        assert sorted(path.name for path in Path(temp_dir).glob("events.jsonl*")) == [
+            "events.jsonl", "events.jsonl.1", "events.jsonl.lock"]
@@ -0,0 +1,52 @@
+import hashlib
+import io
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.evidence import EvidenceStore
+from src.core.tracker import CareerTracker
+from src.utils.portfolio_gen import PortfolioGenerator
+
+
+def test_streamed_upload_is_deduplicated():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store = EvidenceStore(str(Path(temp_dir) / "evidence"), chunk_size=1000)
+        payload = b"deploy log line\n" * 5000
+
+        first = store.put_stream(io.BytesIO(payload), "deploy.log")
+        second = store.put_stream(io.BytesIO(payload), "copy-of-deploy.log")
+
+        assert first.sha256 == second.sha256 == hashlib.sha256(payload).hexdigest()
+        assert first.size == len(payload) and first.media_type is None
+        assert list(store.iter_objects()) == [first.sha256]
+        assert store.verify(first.sha256)
+        assert not any(store.tmp_dir.iterdir())
+
+
+def test_completion_evidence_is_linked_in_portfolio():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        store = EvidenceStore(str(root / "evidence"))
+        screenshot = root / "screen.png"
+        screenshot.write_bytes(b"\x89PNG fake")
+
+        progress_file = root / "progress.json"
+        tracker = CareerTracker(progress_file=str(progress_file))
+        artifact = store.add(str(screenshot))
+        assert tracker.mark_completed("docker_1_1", evidence=[artifact])
+        assert tracker.attach_evidence("docker_1_1", [artifact, store.add("https://example.com/app")])
+
+        reloaded = CareerTracker(progress_file=str(progress_file))
+        assert [a.name for a in reloaded.get_evidence("docker_1_1")] == ["screen.png", "https://example.com/app"]
+
+        output = root / "docs" / "portfolio.md"
+        generator = PortfolioGenerator(progress_file=str(progress_file), output_file=str(output),
+                                       evidence_dir=str(root / "evidence"))
+        assert generator.generate_portfolio()
+        text = output.read_text(encoding='utf-8')
+        assert f"[screen.png](../evidence/objects/{artifact.sha256[:2]}/{artifact.sha256})" in text
+        assert "[https://example.com/app](https://example.com/app)" in text
+
+        assert store.collect_garbage([]) == 1
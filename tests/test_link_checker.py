@@ -0,0 +1,133 @@
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.utils.link_checker import LinkCache, LinkChecker, check_catalog_links
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def _respond(self, with_body: bool):
+        self.requests_seen.append((self.command, self.path))
+        if self.path == "/ok":
+            status = 200
+        elif self.path == "/redirect":
+            self.send_response(301)
+            self.send_header("Location", "/ok")
+            self.end_headers()
+            return
+        elif self.path == "/flaky":
+            status = 503
+        elif self.path == "/no-head":
+            status = 405 if self.command == "HEAD" else 200
+        else:
+            status = 404
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        if with_body:
+            self.wfile.write(b"ok")
+
+    def do_HEAD(self):
+        self._respond(with_body=False)
+
+    def do_GET(self):
+        self._respond(with_body=True)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in_server():
+    _StandInHandler.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def _write_catalog(markers_dir: Path, base_url: str):
+    skill = {
+        "skill_name": "Python",
+        "levels": {"1": [
+            {"id": "python_1_1", "marker": "m1", "resources": [f"{base_url}/ok", f"{base_url}/redirect"]},
+            {"id": "python_1_2", "marker": "m2", "resources": [f"{base_url}/no-head", f"{base_url}/missing"]},
+        ]}
+    }
+    with open(markers_dir / "python.json", 'w', encoding='utf-8') as f:
+        json.dump(skill, f)
+
+
+def test_check_catalog_links_reports_per_file(stand_in_server):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_catalog(Path(temp_dir), stand_in_server)
+        report = check_catalog_links(temp_dir, LinkChecker(per_host_interval=0))
+
+        results = {r.url.rsplit("/", 1)[1]: r for _, r in report["python.json"]}
+        assert results["ok"].ok and results["redirect"].ok
+        assert results["no-head"].ok and results["no-head"].method == "GET"
+        assert not results["missing"].ok and results["missing"].status == 404
+
+
+def test_cached_results_skip_network(stand_in_server):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_catalog(Path(temp_dir), stand_in_server)
+        cache_file = Path(temp_dir) / "cache.json"
+
+        check_catalog_links(temp_dir, LinkChecker(per_host_interval=0, cache=LinkCache(str(cache_file))))
+        seen = len(_StandInHandler.requests_seen)
+        report = check_catalog_links(temp_dir, LinkChecker(per_host_interval=0, cache=LinkCache(str(cache_file))))
+
+        assert cache_file.exists()
+        assert len(_StandInHandler.requests_seen) == seen
+        assert len(report["python.json"]) == 4
+
+
+def test_transient_failures_expire_quickly(stand_in_server):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = LinkCache(str(Path(temp_dir) / "cache.json"), transient_ttl=0)
+        checker = LinkChecker(per_host_interval=0, cache=cache)
+        flaky, missing = f"{stand_in_server}/flaky", f"{stand_in_server}/missing"
+        results = asyncio.run(checker.check_urls([flaky, missing]))
+        assert results[flaky].transient and not results[missing].transient
+
+        seen = len(_StandInHandler.requests_seen)
+        asyncio.run(checker.check_urls([flaky, missing]))
+        assert [path for _, path in _StandInHandler.requests_seen[seen:]] == ["/flaky"]
+
+
+def test_rate_limited_host_does_not_hold_global_slots(stand_in_server):
+    # Запросы к 127.0.0.2 сразу получают отказ в соединении, их задерживает только ограничение частоты
+    port = stand_in_server.rsplit(":", 1)[1]
+    slow = [f"http://127.0.0.2:{port}/ok?{i}" for i in range(3)]
+    fast = f"http://127.0.0.1:{port}/ok"
+    checker = LinkChecker(max_connections=1, per_host_limit=1, per_host_interval=0.3)
+    finished = []
+
+    async def run():
+        async def check(url):
+            await checker.check_url(url)
+            finished.append(url)
+
+        await asyncio.gather(*(check(url) for url in slow + [fast]))
+
+    asyncio.run(run())
+    assert finished.index(fast) < finished.index(slow[-1])
+
+
+def test_check_url_works_without_check_urls(stand_in_server):
+    checker = LinkChecker(per_host_interval=0)
+    assert asyncio.run(checker.check_url(f"{stand_in_server}/ok")).ok
+    # Новый цикл событий — новый пул соединений
+    assert asyncio.run(checker.check_url(f"{stand_in_server}/ok")).ok
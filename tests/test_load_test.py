@@ -0,0 +1,15 @@
+import sys
+sys.path.append('.')
+
+from src.utils.load_test import run_load_test
+
+
+def test_concurrent_writers_lose_no_completions():
+    for mode in ("threads", "processes", "mixed"):
+        report = run_load_test(learners=6, mode=mode, workers=3, ops_per_learner=15, writers_per_learner=2)
+
+        assert report["ok"], report["correctness"]["samples"] + report["error_samples"]
+        assert report["operations"] == 6 * 2 * 15
+        assert report["correctness"]["duplicate_completions"] == 0
+        assert set(report["by_operation"]) == {"mark_completed", "show_progress", "get_skill_progress", "portfolio"}
+        assert report["overall"]["p50_ms"] <= report["overall"]["p95_ms"] <= report["overall"]["p99_ms"]
@@ -0,0 +1,76 @@
+import json
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.core.locales import available_locales, clear_locale_cache, get_locale, loaded_locales
+from src.core.mapped_catalog import write_mapped_catalog
+from src.core.sessions import SessionManager
+from src.core.tracker import CareerTracker
+
+
+def test_overlay_translates_without_touching_catalog():
+    clear_locale_cache()
+    tracker = CareerTracker(progress_file=tempfile.mktemp(suffix=".json"), locale="en")
+    base = tracker.markers["Docker"].levels["1"][0]
+
+    localized = tracker.localized(base)
+    assert localized.marker == "Wrote a Dockerfile for a simple application"
+    assert localized.smart_criteria["time_bound"] == "3-4 hours"
+    assert localized.resources is base.resources
+    assert base.marker == "Создал Dockerfile для простого приложения"
+    assert "en" in available_locales() and available_locales()[0] == "ru"
+
+
+def test_overlay_translates_mapped_catalog_markers():
+    base = CareerTracker(progress_file=tempfile.mktemp(suffix=".json"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_mapped_catalog(base.markers, str(Path(temp_dir) / "catalog.cmap"))
+        tracker = CareerTracker(markers_dir=str(path), progress_file=str(Path(temp_dir) / "p.json"), locale="en")
+        marker = tracker.markers["Docker"].levels["1"][0]
+
+        localized = tracker.localized(marker)
+        assert localized.marker == "Wrote a Dockerfile for a simple application"
+        assert localized.smart_criteria["time_bound"] == "3-4 hours"
+        assert marker.marker == "Создал Dockerfile для простого приложения"
+        tracker.show_recommendations()
+
+
+def test_locales_are_loaded_lazily_once_per_process():
+    clear_locale_cache()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        (Path(temp_dir) / "de").mkdir()
+        with open(Path(temp_dir) / "de" / "git.json", 'w', encoding='utf-8') as f:
+            json.dump({"skills": {"Git": {"skill_name": "Git (de)"}},
+                       "markers": {"git_1_1": {"marker": "Grundlegender Git-Marker"}}}, f)
+
+        assert get_locale("ru", temp_dir) is None
+        assert loaded_locales() == []
+        overlay = get_locale("de", temp_dir)
+        assert get_locale("de", temp_dir) is overlay and loaded_locales() == ["de"]
+        assert overlay.skill_name("Git") == "Git (de)" and overlay.skill_name("Docker") == "Docker"
+
+        tracker = CareerTracker(progress_file=str(Path(temp_dir) / "p.json"))
+        marker = tracker.markers["Git"].levels["1"][1]
+        assert overlay.localize(marker) is marker  # нет перевода — базовый текст
+
+        with pytest.raises(ValueError):
+            get_locale("../markers", temp_dir)
+
+
+def test_shared_session_has_no_view_locale_and_catalog_is_shared():
+    clear_locale_cache()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir)
+        alice = manager.get("alice")
+        bob = manager.get("bob")
+
+        # Две вкладки одного пользователя на разных языках видят один трекер, язык передают сами
+        marker = alice.markers["Python"].levels["1"][0]
+        assert alice.markers is bob.markers
+        assert get_locale("en").localize(marker).marker != marker.marker
+        assert manager.get("alice") is alice and alice.locale is None
+        assert alice.localized(marker) is marker
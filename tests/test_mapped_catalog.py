@@ -0,0 +1,53 @@
+import multiprocessing
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.mapped_catalog import MappedCatalog, write_mapped_catalog
+from src.core.tracker import CareerTracker
+
+
+def _marker_text(path, marker_id):
+    with MappedCatalog(path) as catalog:
+        return catalog.get_marker(marker_id).marker
+
+
+def test_mapped_catalog_roundtrip():
+    tracker = CareerTracker()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_mapped_catalog(tracker.markers, str(Path(temp_dir) / "catalog.cmap"))
+
+        with MappedCatalog(str(path)) as catalog:
+            assert catalog.to_skill_data() == tracker.markers
+            assert catalog.get_marker("python_2_1").to_marker() == tracker.markers["Python"].levels["2"][0]
+            assert catalog.skill_name_of("docker_1_2") == "Docker"
+            assert "missing_1_1" not in catalog
+
+
+def test_tracker_on_mapped_catalog_and_workers():
+    tracker = CareerTracker()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = str(write_mapped_catalog(tracker.markers, str(Path(temp_dir) / "catalog.cmap")))
+        mapped = CareerTracker(markers_dir=path, progress_file=str(Path(temp_dir) / "progress.json"))
+
+        assert sorted(mapped.markers) == sorted(tracker.markers)
+        assert mapped.get_skill_progress("Python")["total_count"] == 4
+        assert mapped.mark_completed("python_1_1")
+
+        with multiprocessing.Pool(2) as pool:
+            texts = pool.starmap(_marker_text, [(path, "git_1_1"), (path, "qa_1_2")])
+        assert texts == [tracker.markers["Git"].levels["1"][0].marker, tracker.markers["Qa"].levels["1"][1].marker]
+
+
+def test_trackers_share_one_mapped_catalog_and_index():
+    tracker = CareerTracker()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = str(write_mapped_catalog(tracker.markers, str(Path(temp_dir) / "catalog.cmap")))
+        first = CareerTracker(markers_dir=path, progress_file=str(Path(temp_dir) / "a.json"))
+        second = CareerTracker(markers_dir=path, progress_file=str(Path(temp_dir) / "b.json"))
+
+        assert first.markers is second.markers and first.index is second.index
+        marker = first.index.get("python_1_1").marker
+        assert marker is second.markers["Python"].levels["1"][0]
+        assert marker.smart_criteria is marker.smart_criteria
@@ -0,0 +1,54 @@
+import tempfile
+from datetime import date
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.planner import LearningPlanner, effort_hours
+from src.core.tracker import CareerTracker, load_catalog
+
+START = date(2025, 3, 3)
+
+
+def test_effort_hours():
+    assert effort_hours("2-3 часа") == 3
+    assert effort_hours("1 неделя") == 10
+    assert effort_hours("2 недели", nominal_hours_per_week=6) == 12
+    assert effort_hours("когда-нибудь") is None
+
+
+def test_plan_respects_budget_and_levels():
+    planner = LearningPlanner(load_catalog("src/data/markers"), hours_per_week=8)
+    plan = planner.plan(["python_1_1"], start=START)
+
+    scheduled = {}
+    for week in plan.weeks:
+        assert week.hours <= 8
+        for item in week.items:
+            scheduled.setdefault(item.marker_id, week.index)
+    assert "python_1_1" not in scheduled
+    assert scheduled["python_1_2"] <= scheduled["python_2_1"] <= scheduled["python_3_1"]
+    assert abs(plan.total_hours - sum(planner.effort(m) for m in scheduled)) < 0.05
+
+
+def test_incremental_update_matches_full_replan():
+    planner = LearningPlanner(load_catalog("src/data/markers"), hours_per_week=8)
+    plan = planner.plan(start=START)
+    first = plan.weeks[0].items[0].marker_id
+    plan.complete(first)
+    assert plan.to_dict() == planner.plan([first], start=START).to_dict()
+
+    kept = plan.weeks[:3]
+    plan.complete(plan.weeks[3].items[-1].marker_id)
+    assert plan.weeks[:3] == kept
+
+
+def test_tracker_plan_follows_completions():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tracker = CareerTracker(progress_file=str(Path(temp_dir) / "progress.json"))
+        plan = tracker.learning_plan(hours_per_week=10)
+        marker_id = plan.weeks[0].items[0].marker_id
+
+        tracker.mark_completed(marker_id)
+        assert tracker.learning_plan(hours_per_week=10) is plan
+        assert plan.week_of(marker_id) is None
@@ -0,0 +1,87 @@
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.utils.portfolio_gen import PortfolioGenerator
+from src.utils.portfolio_jobs import DONE, FAILED, PENDING_STATUSES, QUEUED, PortfolioJobQueue, portfolio_path
+
+
+def _wait(queue, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.status(job_id)
+        if job["status"] not in PENDING_STATUSES:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Задача {job_id} не завершилась")
+
+
+def _write_progress(path, completed):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"completed_markers": completed, "in_progress_markers": [], "history": []}, f)
+
+
+def test_jobs_write_per_user_portfolios_and_deduplicate():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        _write_progress(root / "alice.json", ["python_1_1"])
+        _write_progress(root / "bob.json", [])
+
+        queue = PortfolioJobQueue(jobs_dir=str(root / "jobs"), output_dir=str(root / "out"), workers=1).start()
+        try:
+            first = queue.submit("alice", str(root / "alice.json"))
+            assert first["status"] == QUEUED
+            assert queue.submit("alice", str(root / "alice.json"))["id"] == first["id"]
+            failed = queue.submit("bob", str(root / "bob.json"))
+
+            done = _wait(queue, first["id"])
+            assert done["status"] == DONE and done["started_at"] and done["finished_at"]
+            assert Path(done["output_file"]) == portfolio_path("alice", output_dir=str(root / "out"))
+            assert "Моё IT-портфолио" in Path(done["output_file"]).read_text(encoding="utf-8")
+            assert _wait(queue, failed["id"])["status"] == FAILED
+
+            # Прогресс не менялся — готовый результат переиспользуется; изменился — новая задача
+            assert queue.submit("alice", str(root / "alice.json"))["id"] == first["id"]
+            _write_progress(root / "alice.json", ["python_1_1", "python_1_2"])
+            second = queue.submit("alice", str(root / "alice.json"))
+            assert second["id"] != first["id"]
+            assert _wait(queue, second["id"])["status"] == DONE
+            assert queue.latest("alice")["id"] == second["id"]
+            assert not (root / "jobs" / f"{first['id']}.json").exists()
+        finally:
+            queue.close()
+
+
+def test_pending_jobs_resume_after_restart():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        _write_progress(root / "alice.json", ["python_1_1"])
+        (root / "jobs").mkdir()
+        job = {"id": "0000000000001-abcdef12", "user_id": "alice", "locale": "en",
+               "progress_file": str(root / "alice.json"), "output_file": str(root / "out" / "alice.en.md"),
+               "stamp": None, "status": "running", "created_at": None, "started_at": None,
+               "finished_at": None, "error": None}
+        (root / "jobs" / f"{job['id']}.json").write_text(json.dumps(job), encoding="utf-8")
+
+        queue = PortfolioJobQueue(jobs_dir=str(root / "jobs"), output_dir=str(root / "out"), workers=1).start()
+        try:
+            assert _wait(queue, job["id"])["status"] == DONE
+            assert (root / "out" / "alice.en.md").exists()
+            assert queue.status("../alice") is None
+        finally:
+            queue.close()
+
+
+def test_concurrent_saves_of_one_portfolio_do_not_collide():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output = Path(temp_dir) / "anna.md"
+        generators = [PortfolioGenerator(output_file=str(output), markers={}) for _ in range(2)]
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            results = list(pool.map(lambda i: generators[i % 2]._save_portfolio([f"# {i}"]), range(200)))
+
+        assert all(results)
+        assert [path.name for path in Path(temp_dir).iterdir()] == ["anna.md"]
@@ -0,0 +1,82 @@
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.ranking import CohortRanking, FenwickTree, build_ranking_from_progress, load_or_build_ranking
+from src.core.tracker import CareerTracker, load_catalog
+
+
+def _brute_percentile(completed_by_user, user_id, marker_skill, skill=None):
+    def count(user):
+        return sum(1 for m in completed_by_user[user] if skill is None or marker_skill[m] == skill)
+    others = [u for u in completed_by_user if u != user_id]
+    return 100.0 * sum(1 for u in others if count(u) < count(user_id)) / len(others)
+
+
+def test_fenwick_prefix_sums():
+    rng = random.Random(7)
+    values = [rng.randrange(5) for _ in range(37)]
+    built, incremental = FenwickTree.from_counts(values), FenwickTree(len(values))
+    for i, value in enumerate(values):
+        incremental.add(i, value)
+    for i in range(-1, len(values) + 2):
+        assert built.prefix(i) == incremental.prefix(i) == sum(values[:max(i + 1, 0)])
+
+
+def test_percentiles_follow_completions_and_survive_persistence():
+    markers = load_catalog()
+    marker_skill = {m.id: s for s, data in markers.items() for level in data.levels.values() for m in level}
+    rng = random.Random(3)
+    completed = {f"user{i}": set(rng.sample(sorted(marker_skill), rng.randrange(len(marker_skill)))) for i in range(40)}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        for user_id, ids in completed.items():
+            with open(root / f"{user_id}.json", 'w', encoding='utf-8') as f:
+                json.dump({"completed_markers": sorted(ids), "in_progress_markers": [], "history": []}, f)
+
+        ranking = build_ranking_from_progress(str(root), markers)
+        assert len(ranking) == 40
+        for user_id in ("user0", "user17"):
+            assert ranking.percentile(user_id) == _brute_percentile(completed, user_id, marker_skill)
+            assert ranking.percentile(user_id, "Python") == _brute_percentile(completed, user_id, marker_skill, "Python")
+
+        tracker = CareerTracker(progress_file=str(root / "user0.json"), user_id="user0", markers=markers, ranking=ranking)
+        missing = sorted(set(marker_skill) - completed["user0"])[0]
+        assert tracker.mark_completed(missing)
+        completed["user0"].add(missing)
+        assert tracker.cohort_percentile() == _brute_percentile(completed, "user0", marker_skill)
+        tracker.mark_uncompleted(missing)
+        completed["user0"].discard(missing)
+        assert tracker.cohort_percentile() == _brute_percentile(completed, "user0", marker_skill)
+
+        ranking.save(str(root / "ranking"))
+        loaded = CohortRanking.load(str(root / "ranking"), markers)
+        for user_id in completed:
+            assert loaded.rank(user_id) == ranking.rank(user_id)
+            assert loaded.rank(user_id, "Docker") == ranking.rank(user_id, "Docker")
+
+        ranking.remove("user5")
+        del completed["user5"]
+        assert ranking.percentile("user17") == _brute_percentile(completed, "user17", marker_skill)
+
+
+def test_saved_ranking_is_rebuilt_when_progress_changes():
+    markers = load_catalog()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        progress_dir, ranking_dir = Path(temp_dir) / "users", str(Path(temp_dir) / "ranking")
+        progress_dir.mkdir()
+        CareerTracker(progress_file=str(progress_dir / "alice.json"), markers=markers).mark_completed("git_1_1")
+
+        assert load_or_build_ranking(markers, str(progress_dir), ranking_dir).completed_count("alice") == 1
+        CareerTracker(progress_file=str(progress_dir / "bob.json"), markers=markers).mark_completed("git_1_1")
+        future = time.time() + 5
+        os.utime(progress_dir / "bob.json", (future, future))
+
+        rebuilt = load_or_build_ranking(markers, str(progress_dir), ranking_dir)
+        assert "bob" in rebuilt and rebuilt.rank("alice")["tied"] == 1
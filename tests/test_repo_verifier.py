@@ -0,0 +1,74 @@
+import json
+import subprocess
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.tracker import load_catalog
+from src.core.validator import CatalogValidator
+from src.utils.repo_verifier import VerificationCache, discover_repos, propose_completions, verify_repos
+
+
+def _git(repo, *args):
+    subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+
+def _make_repo(path, files, commits=1):
+    path.mkdir(parents=True)
+    _git(path, "init", "-q")
+    _git(path, "config", "user.email", "learner@example.com")
+    _git(path, "config", "user.name", "Learner")
+    for name, content in files.items():
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(content, encoding="utf-8")
+    _git(path, "add", "-A")
+    for i in range(commits):
+        _git(path, "commit", "-q", "--allow-empty", "-m", f"commit {i}")
+
+
+def test_repos_are_verified_in_parallel_and_cached_by_head():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir) / "repos"
+        _make_repo(root / "alice" / "shop", {"Dockerfile": "FROM python:3.11\n", "tests/test_app.py": "def test(): pass\n"})
+        _make_repo(root / "bob" / "notes", {"README.md": "notes\n"})
+        (root / "bob" / "notes" / "Dockerfile").write_text("FROM scratch\n")  # не закоммичен — не учитывается
+
+        markers = load_catalog("src/data/markers")
+        cache = VerificationCache(str(Path(temp_dir) / "cache.json"))
+        repos = list(discover_repos(str(root)))
+        assert [user for user, _ in repos] == ["alice", "bob"]
+
+        report = verify_repos(repos, markers, workers=2, cache=cache)
+        assert report["checked"] == 2 and report["cached"] == 0
+        assert {"docker_1_1", "qa_1_1"} <= set(report["passed"]["alice"])
+        assert "docker_1_1" not in report["passed"].get("bob", {})
+
+        proposals = propose_completions(report, {"alice": ["docker_1_1"]})
+        assert "docker_1_1" not in proposals["alice"] and "qa_1_1" in proposals["alice"]
+
+        again = verify_repos(repos, markers, workers=2, cache=VerificationCache(str(Path(temp_dir) / "cache.json")))
+        assert again["checked"] == 0 and again["cached"] == 2
+        assert again["passed"] == report["passed"]
+
+        _git(root / "bob" / "notes", "add", "Dockerfile")
+        _git(root / "bob" / "notes", "commit", "-q", "-m", "docker")
+        third = verify_repos(repos, markers, workers=2, cache=VerificationCache(str(Path(temp_dir) / "cache.json")))
+        assert third["checked"] == 1 and third["cached"] == 1
+        assert "docker_1_1" in third["passed"]["bob"]
+
+
+def test_validator_rejects_malformed_rules():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        rules = [{"rule": "file_exists"}, {"rule": "min_commits", "count": "10"}, {"rule": "magic"}]
+        markers = [{"id": f"a_1_{i}", "marker": "Сделал что-то", "priority": "high", "resources": [],
+                    "smart_criteria": {}, "verification": [{"rule": "tests_present"}, rule]}
+                   for i, rule in enumerate(rules, 1)]
+        with open(Path(temp_dir) / "a.json", 'w', encoding='utf-8') as f:
+            json.dump({"skill_name": "A", "levels": {"1": markers}}, f)
+
+        messages = [str(issue) for issue in CatalogValidator(temp_dir).validate()]
+        assert len(messages) == 3
+        assert any("'path'" in m for m in messages)
+        assert any("'count'" in m for m in messages)
+        assert any("magic" in m for m in messages)
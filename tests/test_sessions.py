@@ -0,0 +1,82 @@
+import json
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+from src.core.sessions import SessionManager
+from src.core.tracker import CareerTracker
+
+
+def test_sessions_share_catalog_and_count_hits():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir)
+        anna = manager.get("anna")
+        boris = manager.get("boris")
+
+        assert manager.get("anna") is anna
+        assert anna.markers is boris.markers and anna.index is boris.index
+        assert manager.stats()["hits"] == 1 and manager.stats()["misses"] == 2
+
+        with pytest.raises(ValueError):
+            manager.get("../etc/passwd")
+
+
+def test_lru_eviction_writes_back_dirty_progress():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir, max_sessions=2)
+        assert manager.get("anna").mark_completed("python_1_1")
+        assert not (Path(temp_dir) / "anna.json").exists()
+
+        manager.get("boris")
+        manager.get("vera")
+
+        stats = manager.stats()
+        assert stats["sessions"] == 2 and stats["evictions"] == 1 and stats["write_backs"] == 1
+        with open(Path(temp_dir) / "anna.json", 'r', encoding='utf-8') as f:
+            assert json.load(f)["completed_markers"] == ["python_1_1"]
+        assert manager.get("anna").progress["completed_markers"] == ["python_1_1"]
+
+
+def test_memory_bound_limits_sessions():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir, max_bytes=3 * 4096)
+        for i in range(10):
+            manager.get(f"user{i}")
+        assert manager.stats()["sessions"] == 3
+        assert manager.stats()["approx_bytes"] <= 3 * 4096
+
+
+def test_write_back_flush_keeps_concurrent_cli_writes():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir)
+        web = manager.get("anna")
+        assert web.mark_completed("python_1_1")
+
+        # CLI-процесс пишет в тот же файл, пока веб-сессия держит изменения в памяти
+        cli = CareerTracker(progress_file=str(Path(temp_dir) / "anna.json"))
+        assert cli.mark_completed("python_1_2")
+        assert web.mark_in_progress("python_2_1")
+
+        manager.close()
+        assert not web.dirty
+        with open(Path(temp_dir) / "anna.json", 'r', encoding='utf-8') as f:
+            progress = json.load(f)
+        assert sorted(progress["completed_markers"]) == ["python_1_1", "python_1_2"]
+        assert progress["in_progress_markers"] == ["python_2_1"]
+        assert [entry["marker_id"] for entry in progress["history"]] == ["python_1_2", "python_1_1", "python_2_1"]
+
+
+def test_evicted_session_still_saves_changes():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manager = SessionManager(progress_dir=temp_dir, max_sessions=1)
+        anna = manager.get("anna")
+        manager.get("boris")
+
+        # Запрос, получивший трекер до вытеснения, продолжает с ним работать
+        assert anna.mark_completed("python_1_1")
+        assert not anna.dirty
+        manager.close()
+        assert manager.get("anna").progress["completed_markers"] == ["python_1_1"]
@@ -0,0 +1,57 @@
+import random
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.similarity import SimilarityIndex
+from src.core.tracker import CareerTracker
+
+
+def test_similar_learners_and_recommendations():
+    index = SimilarityIndex()
+    index.insert("anna", ["python_1_1", "python_1_2", "docker_1_1", "git_1_1"])
+    index.insert("boris", ["python_1_1", "python_1_2", "docker_1_1", "git_1_1", "docker_1_2"])
+    index.insert("vera", ["qa_1_1", "qa_1_2", "linux_1_1"])
+
+    similar = index.similar("anna", k=5)
+    assert similar[0] == ("boris", 0.8)
+    assert all(user != "vera" for user, _ in similar)
+    assert index.recommend("anna") == [("docker_1_2", 0.8)]
+
+
+def test_incremental_insert_matches_full_rebuild_and_persists():
+    index = SimilarityIndex()
+    index.insert("anna", ["python_1_1"])
+    for marker_id in ["python_1_2", "docker_1_1"]:
+        index.add_marker("anna", marker_id)
+
+    assert index._signatures["anna"] == index.signature(["python_1_1", "python_1_2", "docker_1_1"])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index.insert("boris", ["python_1_1", "python_1_2"])
+        loaded = SimilarityIndex.load(str(index.save(temp_dir)))
+        assert loaded.similar("boris") == index.similar("boris")
+
+
+def test_tracker_updates_index_on_mark_completed():
+    index = SimilarityIndex()
+    index.insert("peer", ["docker_1_1", "docker_1_2"])
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tracker = CareerTracker(progress_file=str(Path(temp_dir) / "learner.json"), similarity_index=index)
+        tracker.mark_completed("docker_1_1")
+        assert index.similar("learner") == [("peer", 0.5)]
+
+
+def test_queries_are_fast_on_large_user_base():
+    rng = random.Random(7)
+    markers = [f"skill{s}_{l}_{i}" for s in range(20) for l in range(1, 4) for i in range(5)]
+    index = SimilarityIndex()
+    for user in range(2000):
+        index.insert(f"user{user}", rng.sample(markers, 15))
+
+    started = time.perf_counter()
+    for user in range(100):
+        index.similar(f"user{user}", k=10)
+    assert (time.perf_counter() - started) / 100 < 0.05
@@ -0,0 +1,182 @@
+import json
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from src.core import sync
+from src.core.events import FileEventBus
+from src.core.tracker import CareerTracker
+
+
+def _tracker(path, markers):
+    return CareerTracker(progress_file=str(path), user_id="alice", markers=markers)
+
+
+def _state(tracker):
+    return sorted(tracker.progress["completed_markers"]), sorted(tracker.progress["in_progress_markers"])
+
+
+def test_two_devices_exchange_only_deltas_and_converge():
+    base = CareerTracker(progress_file=tempfile.mktemp(suffix=".json"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        hub = sync.LocalSyncEndpoint(str(root / "server"))
+        laptop = _tracker(root / "laptop.json", base.markers)
+        web = _tracker(root / "web.json", base.markers)
+
+        laptop.mark_completed("git_1_1")
+        laptop.mark_in_progress("docker_1_1")
+        assert laptop.sync(hub) == {"sent": 2, "received": 0, "changed": 0}
+        assert web.sync(hub) == {"sent": 0, "received": 2, "changed": 2}
+        assert _state(web) == (["git_1_1"], ["docker_1_1"])
+
+        # Одновременные правки: веб снимает отметку, ноутбук завершает другие маркеры
+        web.mark_uncompleted("git_1_1")
+        web.mark_completed("docker_1_1")
+        laptop.mark_completed("qa_1_1")
+        assert web.sync(hub)["sent"] == 2
+        assert laptop.sync(hub) == {"sent": 1, "received": 2, "changed": 2}
+        web.sync(hub)
+
+        assert _state(laptop) == _state(web) == (["docker_1_1", "qa_1_1"], [])
+        assert laptop.sync(hub) == {"sent": 0, "received": 0, "changed": 0}
+
+        reloaded = _tracker(root / "laptop.json", base.markers)
+        assert _state(reloaded) == _state(laptop)
+        assert reloaded.analytics.completed_at.keys() == {"docker_1_1", "qa_1_1"}
+
+
+def test_concurrent_conflict_resolves_the_same_on_every_replica():
+    base = CareerTracker(progress_file=tempfile.mktemp(suffix=".json"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        hub = sync.LocalSyncEndpoint(str(root / "server"))
+        first, second = _tracker(root / "a.json", base.markers), _tracker(root / "b.json", base.markers)
+
+        first.mark_completed("python_1_1")
+        second.mark_completed("python_1_1")
+        second.mark_uncompleted("python_1_1")
+        for tracker in (first, second, first):
+            tracker.sync(hub)
+
+        server = _tracker(root / "server" / "alice.json", base.markers)
+        assert _state(first) == _state(second) == _state(server)
+
+
+def test_legacy_history_is_adopted_and_wire_format_is_compact():
+    base = CareerTracker(progress_file=tempfile.mktemp(suffix=".json"))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        history = [{"marker_id": f"old_{i}", "event": "completed", "timestamp": "2025-01-01T10:00:00+00:00"}
+                   for i in range(300)]
+        with open(root / "legacy.json", 'w', encoding='utf-8') as f:
+            json.dump({"completed_markers": [e["marker_id"] for e in history], "in_progress_markers": [],
+                       "history": history}, f)
+
+        hub = sync.LocalSyncEndpoint(str(root / "server"))
+        legacy = _tracker(root / "legacy.json", base.markers)
+        assert legacy.sync(hub)["sent"] == 300
+
+        legacy.mark_completed("git_1_2")
+        state = legacy.progress["sync"]
+        delta = sync.changes_since(legacy.progress, state["peers"][hub.name])
+        assert [e["marker_id"] for e in delta] == ["git_1_2"]
+        wire = sync.encode_message(sync.build_message(legacy.progress, "alice", delta))
+        assert len(wire) < 200
+        assert sync.decode_message(wire)["entries"] == delta
+
+        with pytest.raises(sync.SyncError):
+            sync.decode_message(b"not a sync message")
+
+
+def test_write_back_session_keeps_sync_tags_of_cli_events():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        path = root / "alice.json"
+        cli_bus = FileEventBus(str(root / "events.jsonl"))
+        web_bus = FileEventBus(str(root / "events.jsonl"))
+        cli = CareerTracker(progress_file=str(path), user_id="alice", event_bus=cli_bus)
+        cli.handle_sync({"entries": [], "vector": {}})
+        web = CareerTracker(progress_file=str(path), user_id="alice", markers=cli.markers, autosave=False)
+        web_bus.subscribe(web.apply_change)
+
+        assert cli.mark_completed("git_1_1")
+        assert [change.tag for change in web_bus.poll()] == [{"dev": cli.progress["sync"]["device"], "seq": 1, "lc": 1}]
+        assert web.progress["history"][-1]["seq"] == 1
+        assert web.mark_completed("qa_1_1")
+        assert web.progress["history"][-1]["seq"] == 2
+        assert web.flush()
+
+        with open(path, 'r', encoding='utf-8') as f:
+            history = json.load(f)["history"]
+        assert [(entry["marker_id"], entry["seq"]) for entry in history] == [("git_1_1", 1), ("qa_1_1", 2)]
+        hub = sync.LocalSyncEndpoint(str(root / "server"))
+        assert CareerTracker(progress_file=str(path), user_id="alice", markers=cli.markers).sync(hub)["sent"] == 2
+
+
+class _LockProbeEndpoint(sync.LocalSyncEndpoint):
+    """Проверяет во время обмена, что файл прогресса клиента не заблокирован."""
+
+    def __init__(self, root, progress_file):
+        super().__init__(root)
+        self.progress_file = progress_file
+        self.lock_free = None
+
+    def exchange(self, data):
+        with open(str(self.progress_file) + ".lock", 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.lock_free = False
+            else:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                self.lock_free = True
+        return super().exchange(data)
+
+
+@pytest.mark.skipif(fcntl is None, reason="нет fcntl")
+def test_sync_does_not_hold_progress_lock_during_exchange():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        tracker = CareerTracker(progress_file=str(root / "alice.json"), user_id="alice")
+        tracker.mark_completed("git_1_1")
+        endpoint = _LockProbeEndpoint(str(root / "server"), root / "alice.json")
+
+        assert tracker.sync(endpoint)["sent"] == 1
+        assert endpoint.lock_free is True
+
+
+def test_sync_server_answers_500_on_unexpected_errors(monkeypatch):
+    def broken_exchange(self, data):
+        raise OSError("диск недоступен")
+
+    monkeypatch.setattr(sync.LocalSyncEndpoint, "exchange", broken_exchange)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        threading.Thread(target=sync.serve, args=(temp_dir, "127.0.0.1", port), daemon=True).start()
+        request = urllib.request.Request(f"http://127.0.0.1:{port}", data=b"x", method="POST")
+        for _ in range(50):
+            try:
+                urllib.request.urlopen(request, timeout=5)
+            except urllib.error.HTTPError as e:
+                assert e.code == 500
+                break
+            except urllib.error.URLError:
+                time.sleep(0.05)
+        else:
+            raise AssertionError("Сервер синхронизации не ответил")
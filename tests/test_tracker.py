@@ -21,5 +21,14 @@ def test_progress_file_creation():
         assert tracker.progress["completed_markers"] == []
         assert tracker.progress["in_progress_markers"] == []
 
+def test_empty_marker_id_is_rejected():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        temp_progress = Path(temp_dir) / "progress.json"
+        tracker = CareerTracker(progress_file=str(temp_progress))
+        
+        assert tracker.mark_in_progress("") is False
+        assert tracker.progress["in_progress_markers"] == []
+        assert tracker.progress.get("history", []) == []
+
 if __name__ == "__main__":
     pytest.main([__file__])
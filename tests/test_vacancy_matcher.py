@@ -0,0 +1,68 @@
+import tempfile
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+from src.core.tracker import load_catalog
+from src.utils.vacancy_matcher import VacancyMatcher, iter_postings
+
+
+def test_coverage_per_posting_and_corpus():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        matcher = VacancyMatcher(load_catalog(), "examples/vacancies", cache_dir=temp_dir).build()
+        result = matcher.coverage(["python_1_1", "python_2_1", "docker_1_1"])
+
+        postings = {p["id"]: p for p in result["postings"]}
+        assert postings["python_developer"]["matched"] >= 4
+        assert postings["python_developer"]["coverage"] > postings["devops_engineer"]["coverage"]
+        assert 0 < result["overall"] < 100
+        assert "python_1_1" not in dict(result["top_missing"])
+
+        matches = matcher.match_text("Опыт написания Dockerfile для Python-приложения")
+        assert matches[0][1] == "docker_1_1"
+
+
+def test_model_is_cached_between_runs():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        VacancyMatcher(load_catalog(), "examples/vacancies", cache_dir=temp_dir).build()
+        cache_files = list(Path(temp_dir).glob("vacancy_model_*.npz"))
+        assert len(cache_files) == 1
+
+        matcher = VacancyMatcher(load_catalog(), "examples/vacancies", cache_dir=temp_dir)
+        matcher._fit = None  # повторное обучение не должно понадобиться
+        assert matcher.build().coverage([])["overall"] == 0.0
+
+
+def test_rebuild_keeps_models_of_other_corpora():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        other = Path(temp_dir) / "other"
+        other.mkdir()
+        (other / "go.txt").write_text("Go developer\nОпыт работы с Docker", encoding="utf-8")
+        cache_dir = str(Path(temp_dir) / "cache")
+
+        VacancyMatcher(load_catalog(), "examples/vacancies", cache_dir=cache_dir).build()
+        VacancyMatcher(load_catalog(), str(other), cache_dir=cache_dir).build()
+        assert len(list(Path(cache_dir).glob("vacancy_model_*.npz"))) == 2
+
+        (other / "go.txt").write_text("Go developer\nОпыт работы с Kubernetes", encoding="utf-8")
+        VacancyMatcher(load_catalog(), str(other), cache_dir=cache_dir).build()
+        assert len(list(Path(cache_dir).glob("vacancy_model_*.npz"))) == 2
+
+
+def test_malformed_postings_are_skipped():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        (root / "mixed.json").write_text(
+            '[["Python", "SQL"], "строка", {"id": "ok", "title": "Backend", '
+            '"requirements": "Опыт разработки на Python\\nЗнание SQL и PostgreSQL"}]', encoding="utf-8")
+        (root / "broken.json").write_bytes(b'{"title": "\xff"}')
+        (root / "broken.txt").write_bytes(b"\xff\xfe")
+
+        postings = list(iter_postings(temp_dir))
+        assert [posting["id"] for posting in postings] == ["ok"]
+        assert len(postings[0]["requirements"]) == 2
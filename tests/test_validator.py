@@ -0,0 +1,71 @@
+import json
+import tempfile
+import time
+from pathlib import Path
+import sys
+sys.path.append('.')
+
+from src.core.mapped_catalog import write_mapped_catalog
+from src.core.tracker import load_catalog
+from src.core.validator import CatalogValidator, validate_catalog
+
+
+def _marker(marker_id, **overrides):
+    data = {"id": marker_id, "marker": "Сделал что-то", "priority": "high", "resources": [], "smart_criteria": {}}
+    data.update(overrides)
+    return data
+
+
+def test_shipped_catalog_is_valid():
+    assert validate_catalog("src/data/markers") == []
+
+
+def test_reports_all_errors_with_location():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(Path(temp_dir) / "a.json", 'w', encoding='utf-8') as f:
+            json.dump({"skill_name": "A", "levels": {"1": [
+                _marker("a_1_1"),
+                _marker("a_1_2", resources="https://example.com", priority="urgent"),
+            ]}}, f)
+        with open(Path(temp_dir) / "b.json", 'w', encoding='utf-8') as f:
+            json.dump({"skill_name": "B", "levels": {"2": [{"marker": "без id"}, _marker("a_1_1")]}}, f)
+
+        issues = CatalogValidator(temp_dir).validate()
+        messages = [str(issue) for issue in issues]
+
+        assert len(issues) == 4
+        assert any("a.json [уровень 1, #2] a_1_2" in m and "'resources'" in m for m in messages)
+        assert any("'priority'" in m and "urgent" in m for m in messages)
+        assert any("b.json [уровень 2, #1]" in m and "'id'" in m for m in messages)
+        assert any("b.json [уровень 2, #2] a_1_1" in m and "a.json" in m for m in messages)
+
+
+def test_large_catalog_validates_quickly():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for skill in range(20):
+            levels = {str(level): [_marker(f"s{skill}_{level}_{i}") for i in range(100)] for level in range(1, 4)}
+            with open(Path(temp_dir) / f"s{skill}.json", 'w', encoding='utf-8') as f:
+                json.dump({"skill_name": f"S{skill}", "levels": levels}, f)
+
+        started = time.perf_counter()
+        issues = validate_catalog(temp_dir)
+        assert issues == []
+        assert time.perf_counter() - started < 1.0
+
+
+
+def test_validates_mapped_catalogs_and_rejects_unreadable_sources():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        root = Path(temp_dir)
+        with open(root / "a.json", 'w', encoding='utf-8') as f:
+            json.dump({"skill_name": "A", "levels": {"1": [_marker("a_1_1", priority="urgent")]}}, f)
+        mapped = write_mapped_catalog(load_catalog(temp_dir), str(root / "catalog.cmap"))
+        (root / "b.json").write_bytes(b'{"skill_name": "\xff"}')
+
+        messages = [str(issue) for issue in validate_catalog(temp_dir)]
+        assert any("b.json" in m and "ошибка чтения файла" in m for m in messages)
+        assert any("a_1_1" in str(issue) and "urgent" in str(issue) for issue in validate_catalog(str(mapped)))
+
+        (root / "broken.cmap").write_bytes(b"not a catalog")
+        assert "ошибка чтения каталога" in validate_catalog(str(root / "broken.cmap"))[0].message
+        assert "неподдерживаемый формат" in validate_catalog(str(root / "a.json"))[0].message